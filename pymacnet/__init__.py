@@ -1,2 +1,14 @@
 from .channel_interface import ChannelInterface
 from .cycler_interface import CyclerInterface
+from .async_channel_interface import AsyncChannelInterface
+from .async_cycler_interface import AsyncCyclerInterface
+from .session import MacNetSession, AsyncMacNetSession
+from .metrics import SessionMetrics
+from .hooks import RequestHooks, RequestInfo
+from .records import ChannelStatus, AuxReading, SafetyLimits
+from .status_cache import StatusCache, AsyncStatusCache
+from .poller import StatusPoller, AsyncStatusPoller
+from .recorder import StatusRecorder, read_recording
+from .ring_buffer import StatusRingBuffer
+from .record_follower import RecordFollower, AsyncRecordFollower
+from .launcher import TestLauncher, AsyncTestLauncher
@@ -0,0 +1,223 @@
+from datetime import datetime
+
+import numpy as np
+
+from .messages import binary
+
+status_dtype = np.dtype([
+    ('Chan', np.uint16),
+    ('RF1', np.uint8),
+    ('RF2', np.uint8),
+    ('Stat', np.uint16),
+    ('LastRecNum', np.uint32),
+    ('Cycle', np.uint32),
+    ('Step', np.uint16),
+    ('TestTime', np.float64),
+    ('StepTime', np.float64),
+    ('Capacity', np.float64),
+    ('Energy', np.float64),
+    ('Current', np.float64),
+    ('Voltage', np.float64),
+    ('TesterTime', 'datetime64[ms]'),
+])
+"""
+Structured array dtype of channel statuses, one row per channel. `Chan` is the 1-based channel
+number and `TesterTime` is the UTC time of the tester. The row of a channel that could not be read
+has its `Chan`, NaN floats, a NaT `TesterTime` and zero for the other fields.
+"""
+
+status_fields = status_dtype.names
+"""
+The field names of `status_dtype`.
+"""
+
+profile_timing_dtype = np.dtype([
+    ('Time', np.float64),
+    ('Sent', np.bool_),
+    ('Acknowledged', np.bool_),
+    ('Jitter', np.float64),
+    ('Latency', np.float64),
+])
+"""
+Structured array dtype of the timing of each point of a played direct output profile. `Time` is
+the scheduled time of the point from the start of the profile, `Sent` whether it was sent (points
+are skipped when playback falls behind), `Acknowledged` whether the cycler accepted it, `Jitter`
+how late it was sent and `Latency` how long the cycler took to acknowledge it. Times are in
+seconds.
+"""
+
+# Layout of a complete binary (4, 7) reply, header included, so that back to back replies can be
+# viewed as one array without unpacking them one by one.
+_bin_status_msg_dtype = np.dtype([
+    ('FClass', '<u2'),
+    ('FNum', '<u2'),
+    ('Chan', '<u2'),
+    ('Len', '<u2'),
+    ('RF1', 'u1'),
+    ('RF2', 'u1'),
+    ('Stat', '<u2'),
+    ('LastRecNum', '<u4'),
+    ('Cycle', '<u4'),
+    ('Step', '<u2'),
+    ('TestTime', '<f4'),
+    ('StepTime', '<f4'),
+    ('Capacity', '<f4'),
+    ('Energy', '<f4'),
+    ('Current', '<f4'),
+    ('Voltage', '<f4'),
+    ('TesterTime', '<u8'),
+])
+
+assert (_bin_status_msg_dtype.itemsize ==
+        binary.header_struct.size + binary.read_status_struct.size)
+
+
+def unread_statuses(channels: list) -> np.ndarray:
+    """
+    Returns the rows of channels that could not be read, see `status_dtype`.
+
+    Parameters
+    ----------
+    channels : list
+        The 1-based channel numbers.
+
+    Returns
+    -------
+    statuses : np.ndarray
+        One unread row per channel with dtype `status_dtype`.
+    """
+    statuses = np.zeros(len(channels), dtype=status_dtype)
+    statuses['Chan'] = channels
+    for name in status_fields:
+        if statuses.dtype[name].kind == 'f':
+            statuses[name] = np.nan
+    statuses['TesterTime'] = np.datetime64('NaT')
+    return statuses
+
+
+def unread_mask(statuses: np.ndarray) -> np.ndarray:
+    """
+    Returns which rows of a status array are channels that could not be read, see
+    `unread_statuses`.
+
+    Parameters
+    ----------
+    statuses : np.ndarray
+        Statuses with dtype `status_dtype`.
+
+    Returns
+    -------
+    unread : np.ndarray
+        A boolean array, True for the unread rows.
+    """
+    return np.isnat(statuses['TesterTime'])
+
+
+def statuses_from_bin_msgs(frames: list, channels: list = None) -> np.ndarray:
+    """
+    Converts binary (4, 7) replies into a structured array of channel statuses.
+
+    Parameters
+    ----------
+    frames : list
+        The complete replies, one per channel.
+    channels : list
+        The channel of each reply. If given, replies that are None or not complete (4, 7)
+        replies become unread rows of their channel instead of raising.
+
+    Returns
+    -------
+    statuses : np.ndarray
+        The statuses with dtype `status_dtype`, in the order of `frames`.
+
+    Raises
+    ------
+    ValueError
+        If a reply is not a complete (4, 7) reply and `channels` is not given.
+    """
+    if channels is not None:
+        valid = np.array([_is_bin_status_msg(frame) for frame in frames], dtype=bool)
+        statuses = unread_statuses(channels)
+        if valid.any():
+            statuses[valid] = statuses_from_bin_msgs(
+                [frame for frame, is_valid in zip(frames, valid) if is_valid])
+        return statuses
+
+    raw = np.frombuffer(b''.join(frames), dtype=_bin_status_msg_dtype)
+    if len(raw) != len(frames) or not (np.all(raw['FClass'] == 4) and np.all(raw['FNum'] == 7)):
+        raise ValueError("Expected complete replies to (4, 7)!")
+
+    statuses = np.empty(len(raw), dtype=status_dtype)
+    for name in status_fields:
+        statuses[name] = raw[name]
+    # Binary channel numbers are 0-based.
+    statuses['Chan'] += 1
+    statuses['TesterTime'] = raw['TesterTime'].astype('datetime64[ms]')
+    return statuses
+
+
+def statuses_from_dicts(results: list, channels: list = None) -> np.ndarray:
+    """
+    Converts the results of JSON (4, 7) replies into a structured array of channel statuses.
+
+    Parameters
+    ----------
+    results : list
+        The `result` of each reply, one per channel, with 1-based `Chan`.
+    channels : list
+        The channel of each result. If given, results that are None become unread rows of their
+        channel.
+
+    Returns
+    -------
+    statuses : np.ndarray
+        The statuses with dtype `status_dtype`, in the order of `results`.
+    """
+    if channels is not None:
+        valid = np.array([result is not None for result in results], dtype=bool)
+        statuses = unread_statuses(channels)
+        if valid.any():
+            statuses[valid] = statuses_from_dicts([result for result in results if result is not None])
+        return statuses
+
+    statuses = np.empty(len(results), dtype=status_dtype)
+    for name in status_fields[:-1]:
+        statuses[name] = [result[name] for result in results]
+    # The JSON replies give the tester time in the local time of the server.
+    statuses['TesterTime'] = [int(datetime.strptime(result['TesterTime'], '%Y-%m-%dT%H:%M:%S').timestamp() * 1000)
+                              for result in results]
+    return statuses
+
+
+def _is_bin_status_msg(frame) -> bool:
+    """
+    Returns whether a binary reply is a complete (4, 7) reply.
+    """
+    return (frame is not None and len(frame) == _bin_status_msg_dtype.itemsize and
+            binary.header_struct.unpack_from(frame)[:2] == (4, 7))
+
+
+def aux_from_lists(readings: list, num_aux_channels: int = 0) -> np.ndarray:
+    """
+    Converts the auxiliary readings of several channels into a dense array.
+
+    Parameters
+    ----------
+    readings : list
+        The `AuxValues` of each channel. An entry is None if the channel could not be read.
+    num_aux_channels : int
+        The number of auxiliary channels of the cycler, e.g. `AuxChannels` of the general info.
+        The array is widened if a channel has more readings.
+
+    Returns
+    -------
+    aux : np.ndarray
+        A channels × auxiliary channels array of the readings, in the order of `readings`. Missing
+        readings are NaN.
+    """
+    width = max([num_aux_channels] + [len(values) for values in readings if values is not None])
+    aux = np.full((len(readings), width), np.nan)
+    for row, values in zip(aux, readings):
+        if values is not None:
+            row[:len(values)] = values
+    return aux
@@ -0,0 +1,386 @@
+import time
+import asyncio
+import logging
+
+import numpy as np
+
+import pymacnet.messages
+from .messages import binary
+from .async_cycler_interface import AsyncCyclerInterface
+from .records import ChannelStatus, SafetyLimits
+from .session import AsyncMacNetSession, _check_direct_output_bin_reply, _default_direct_output_voltage_v
+from .channel_interface import (_verify_config, _direct_output_setpoint, _start_test_with_procedure_msg,
+                                _start_test_with_direct_control_msg, _startable_status,
+                                _reset_and_safety_limits_msgs, _check_reset_reply, _check_start_reply,
+                                _check_safety_limits_reply, _pack_direct_output_profile, _DirectOutputFilter,
+                                _aux_from_reply, _check_set_variable_reply, _direct_output_params,
+                                _check_direct_output_reply, _new_profile_timings, _profile_send_at,
+                                _log_skipped_profile_points)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChannelInterface(AsyncCyclerInterface):
+    """
+    Class for controlling Maccor Cycler using MacNet from an asyncio event loop.
+    """
+
+    def __init__(self, config: dict, session: AsyncMacNetSession = None):
+        """
+        Creates an AsyncChannelInterface class instance. No connection is made until `connect()`
+        is awaited, or the instance is used as an async context manager.
+
+        Parameters
+        ----------
+        config : dict
+            A configuration dictionary. Same keys as the `ChannelInterface` configuration.
+        session : AsyncMacNetSession
+            An existing session to communicate through. If not given a new session is created
+            from `config` and connected by `connect()`.
+        """
+        self.__channel = config['channel']
+        self.__config = config
+        self.__use_binary_reads = config.get('use_binary_reads', False)
+        self.__use_binary_direct_output = config.get(
+            'use_binary_direct_output', False)
+        self.__direct_output_filter = _DirectOutputFilter(config)
+        self.__direct_output_task = None
+        self.__cache_safety_limits = config.get('cache_safety_limits', False)
+        self.__safety_limits = None
+        self.__start_timings = None
+
+        assert (_verify_config(self.__config))
+        super().__init__(config=config, session=session)
+
+    def get_channel_number(self):
+        '''
+        Returns the channel number for the class instance.
+        '''
+        return self.__channel
+
+    async def read_channel_status(self) -> ChannelStatus:
+        """
+        Method to read the status of the channel defined in the config.
+
+        Returns
+        -------
+        status : ChannelStatus
+            The status of the channel. Can also be used as a dictionary. Returns None if there is an issue.
+        """
+        return await super().read_channel_status(channel=(self.__channel))
+
+    async def read_aux(self) -> list:
+        """
+        Reads the auxiliary readings for the channel specified in the config.
+
+        Returns
+        -------
+        aux_readings : list
+            A list of the auxiliary readings.
+        """
+        if self.__use_binary_reads:
+            reply = await self._send_receive_bin_msg(
+                binary.pack_read_aux(self.__channel - 1))
+        else:
+            reply = await self._send_receive_encoded_msg(
+                pymacnet.messages.tx_read_aux_encoder, {'Chan': self.__channel})
+        return _aux_from_reply(reply, self.__use_binary_reads)
+
+    async def reset_channel(self) -> bool:
+        """
+        Resets the channel. Note this will stop any actively running test on the target channel.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the test was started or not.
+        """
+        self.__forget_direct_output()
+        self.__safety_limits = None
+        reply = await self._send_receive_encoded_msg(
+            pymacnet.messages.tx_reset_channel_encoder, {'Chan': self.__channel})
+        return _check_reset_reply(reply, self.__channel)
+
+    async def set_channel_variable(self, var_num=1, var_value=0) -> bool:
+        """
+        Sets test variables on the target channel. See the "Variables" section in the
+        Maccor manual for more details about how to use these in tests.
+
+        Parameters
+        ----------
+        var_num : int
+            Value between 1 and 16, depending on which variable to set.
+        var_value : float
+            Value to set the variable to.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether or not the variable value was set.
+        """
+        params = {'Chan': self.__channel, 'VarNum': var_num, 'Value': var_value}
+
+        # Check to make variable was set
+        reply = await self._send_receive_encoded_msg(
+            pymacnet.messages.tx_set_variable_encoder, params)
+        return _check_set_variable_reply(reply, self.__channel)
+
+    async def start_test_with_procedure(self) -> bool:
+        """
+        Starts the test on the channel and with the procedure specified in the passed config.
+        Note that it will not start a test if the channel is current running a test.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the test was started or not
+        """
+        self.__forget_direct_output()
+        return await self.__start_test(
+            _start_test_with_procedure_msg(self.__channel, self.__config))
+
+    async def start_test_with_direct_control(self) -> bool:
+        """
+        Starts a test to be manually controlled with direct output on the channel specified in the config.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the test was started or not.
+        """
+        self.__forget_direct_output()
+        return await self.__start_test(
+            _start_test_with_direct_control_msg(self.__channel, self.__config))
+
+    async def set_direct_mode_output(self, current_a, voltage_v=_default_direct_output_voltage_v) -> bool:
+        """
+        Sets the current/voltage output on the channel specified on in the config. Note that the
+        test must have been started with the start_test_direct_control method for this to work.
+        See `ChannelInterface.set_direct_mode_output` for how `current_a` and `voltage_v` are used,
+        and how setpoints are skipped or coalesced.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the values were set or not. True for a skipped setpoint,
+            and for a setpoint held for coalescing, whose result is only logged.
+        """
+        direct_output = _direct_output_setpoint(
+            current_a, voltage_v, self.__config['v_min_v'])
+        if not direct_output:
+            logger.error("Undefined state is set direct control output!")
+            return False
+
+        delay_s = self.__direct_output_filter.submit(direct_output)
+        if delay_s is None:
+            return True
+        if delay_s > 0:
+            self.__direct_output_task = asyncio.ensure_future(
+                self.__send_pending_direct_output(delay_s))
+            return True
+
+        return await self.__send_direct_output(direct_output)
+
+    def get_direct_output_stats(self) -> dict:
+        """
+        Returns how many setpoints `set_direct_mode_output` sent, skipped as unchanged and dropped
+        in favour of a newer setpoint. See `ChannelInterface.get_direct_output_stats`.
+
+        Returns
+        -------
+        stats : dict
+            The `sent`, `suppressed` and `coalesced` counts.
+        """
+        return dict(self.__direct_output_filter.stats)
+
+    async def close(self):
+        """
+        Drops any setpoint held back by coalescing and closes the connection with the Maccor
+        server. This affects every interface sharing the session.
+        """
+        self.__forget_direct_output()
+        await super().close()
+
+    def __forget_direct_output(self):
+        """
+        Forgets the last setpoint and drops any setpoint held back by coalescing, so it cannot be
+        sent after whatever replaces it.
+        """
+        self.__direct_output_filter.reset()
+        if self.__direct_output_task is not None:
+            self.__direct_output_task.cancel()
+            self.__direct_output_task = None
+
+    async def __send_pending_direct_output(self, delay_s: float):
+        """
+        Waits `delay_s` and then sends the newest setpoint held back by coalescing.
+        """
+        await asyncio.sleep(delay_s)
+        direct_output = self.__direct_output_filter.take_pending()
+        self.__direct_output_task = None
+        if direct_output:
+            await self.__send_direct_output(direct_output)
+
+    async def __send_direct_output(self, direct_output: tuple) -> bool:
+        """
+        Sends a direct output setpoint and remembers it if it was acknowledged.
+
+        Parameters
+        ----------
+        direct_output : tuple
+            The `(current_a, voltage_v, mode, current_range)` to send.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the values were set or not.
+        """
+        success = await self.__send_direct_output_msg(*direct_output)
+        self.__direct_output_filter.sent(direct_output, success)
+        return success
+
+    async def __send_direct_output_msg(self, set_current_a, set_voltage_v, mode, current_range) -> bool:
+        """
+        Sends a direct output setpoint message and checks the reply.
+        """
+        # Rest is always sent as a binary message as JSON cannot set rest currently (10/4/2022)
+        if mode == "R" or self.__use_binary_direct_output:
+            return await self._send_direct_output_bin_msg(
+                self.__channel, set_current_a, set_voltage_v, mode, current_range)
+        else:
+            params = _direct_output_params(self.__channel, set_current_a, set_voltage_v, mode, current_range)
+
+            # Send message and make sure response indicates values were accepted.
+            response = await self._send_receive_encoded_msg(
+                pymacnet.messages.tx_set_direct_output_encoder, params)
+            return _check_direct_output_reply(response)
+
+    async def play_direct_output_profile(self, profile) -> np.ndarray:
+        """
+        Plays a direct output profile, e.g. a drive cycle or pulse train, on the channel specified
+        in the config. The test must have been started with the start_test_direct_control method.
+
+        The setpoint messages of every point are packed before playback starts, and points are
+        sent on a schedule kept on the monotonic clock, so time spent sending does not drift the
+        profile. A point following a late one is held until 100 ms after it, and if playback falls
+        so far behind that the next point is due by then, the late point is skipped rather than
+        sent. Setpoints are sent as binary messages, which can be
+        packed in advance and can also set rest.
+
+        Parameters
+        ----------
+        profile : array-like
+            One `(time_s, current_a)` or `(time_s, current_a, voltage_v)` row per point, with
+            times at least 100 ms apart as MacNet rejects setpoints sent faster. Currents and
+            voltages are as for `set_direct_mode_output`. A missing or NaN voltage uses the
+            `set_direct_mode_output` default.
+
+        Returns
+        -------
+        timings : np.ndarray
+            The timing of each point, see `pymacnet.arrays.profile_timing_dtype`. Returns None if
+            the profile is invalid.
+        """
+        try:
+            times_s, msgs = _pack_direct_output_profile(
+                self.__channel, profile, self.__config['v_min_v'])
+        except ValueError as e:
+            logger.error(f"Invalid direct output profile! {e}")
+            return None
+        self.__forget_direct_output()
+
+        timings = _new_profile_timings(times_s)
+        start = time.monotonic()
+        sent = -np.inf
+        for index, msg in enumerate(msgs):
+            due = start + times_s[index]
+            send_at = _profile_send_at(times_s, index, start, sent)
+            if send_at is None:
+                continue
+            delay_s = send_at - time.monotonic()
+            if delay_s > 0:
+                await asyncio.sleep(delay_s)
+
+            sent = time.monotonic()
+            reply = await self._send_receive_bin_msg(msg)
+            acknowledged = time.monotonic()
+            timings[index] = (times_s[index], True, _check_direct_output_bin_reply(msg, reply),
+                              sent - due, acknowledged - sent)
+
+        _log_skipped_profile_points(timings)
+        return timings
+
+    def get_last_start_timings(self) -> dict:
+        """
+        Returns how long each step of the last test start took. Same as for `ChannelInterface`.
+        """
+        return self.__start_timings
+
+    async def __start_test(self, msg_outgoing_dict: dict) -> bool:
+        """
+        Reads the status of the channel, resets it if its last test completed, sets the safety
+        limits and then sends the start test message. The safety limits are only set once the
+        status shows the channel can start a test, so a running test keeps its limits. The reset
+        and the safety limits are pipelined, so a start takes three round trips, or two if the
+        cached safety limits match.
+
+        Parameters
+        ----------
+        msg_outgoing_dict : dict
+            The start test message to send.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the test was started or not.
+        """
+        timings = {}
+        self.__start_timings = timings
+        started = time.monotonic()
+
+        # Check the status of the channel before we try to start the test.
+        replies = await self._send_receive_encoded_msgs(
+            [(pymacnet.messages.tx_read_status_encoder, {'Chan': self.__channel})])
+        timings['status_s'] = time.monotonic() - started
+        status = _startable_status(replies[0], self.__channel)
+        if status is None:
+            return False
+
+        # Reset a completed channel, which also needs its safety limits set again.
+        reset = status == 'Completed'
+        if reset or not self.__safety_limits_cached():
+            step_started = time.monotonic()
+            replies = await self._send_receive_encoded_msgs(
+                _reset_and_safety_limits_msgs(self.__channel, self.__config, reset))
+            timings['reset_s' if reset else 'safety_limits_s'] = time.monotonic() - step_started
+            safety_limits_set = self.__check_safety_limits_reply(replies[-1])
+            if reset and not _check_reset_reply(replies[0], self.__channel):
+                return False
+            if not safety_limits_set:
+                logger.error("Failed to set channel safety limits!")
+                return False
+
+        # Start the test.
+        step_started = time.monotonic()
+        response = await self._send_receive_json_msg(msg_outgoing_dict)
+        timings['start_s'] = time.monotonic() - step_started
+        timings['total_s'] = time.monotonic() - started
+        return _check_start_reply(response, [self.__channel])
+
+    def __safety_limits_cached(self) -> bool:
+        """
+        Checks whether the safety limits last set on the channel match the config, so they need
+        not be set again. Always False unless `cache_safety_limits` is set in the config.
+        """
+        return (self.__cache_safety_limits and self.__safety_limits is not None and
+                self.__safety_limits.is_close(SafetyLimits.from_config(self.__config)))
+
+    def __check_safety_limits_reply(self, reply: dict) -> bool:
+        """
+        Checks the reply to setting the safety limits and caches the limits that were set.
+        """
+        self.__safety_limits = None
+        if not _check_safety_limits_reply(reply, self.__config):
+            return False
+        self.__safety_limits = SafetyLimits.from_dict(reply['result'])
+        return True
@@ -0,0 +1,517 @@
+import asyncio
+import logging
+
+import numpy as np
+
+import pymacnet.messages
+from .messages import binary
+from .records import ChannelStatus
+from .cycler_interface import (_status_msg_chunks, _merge_status_msg_chunks, _SweepSchedule, _check_channels,
+                               _reply_result, _status_from_bin_reply, _read_status_bin_msgs, _read_status_msgs,
+                               _statuses_from_replies, _read_aux_bin_msgs, _read_aux_msgs, _aux_from_replies,
+                               _check_direct_output_bin_replies)
+from .session import (AsyncMacNetSession, _pack_direct_output_bin_msg, _check_direct_output_bin_reply,
+                      _direct_output_setpoints, _pack_direct_output_bin_msgs,
+                      _default_direct_output_voltage_v)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCyclerInterface():
+    """
+    Class for interfacing with Maccor Cycler using MacNet from an asyncio event loop.
+    """
+
+    def __init__(self, config: dict, session: AsyncMacNetSession = None):
+        """
+        Creates an AsyncCyclerInterface class instance. No connection is made until `connect()`
+        is awaited, or the instance is used as an async context manager.
+
+        Parameters
+        ----------
+        config : dict
+            A configuration dictionary. Same keys as the `CyclerInterface` configuration. Note
+            that `max_outstanding_requests` limits how many JSON requests are in flight at once
+            for all coroutines sharing the connection.
+        session : AsyncMacNetSession
+            An existing session to communicate through. If not given a new session is created
+            from `config` and connected by `connect()`.
+        """
+        self.__owns_session = session is None
+        self.__session = session if session else AsyncMacNetSession(config)
+        self.__num_channels = None
+        self.__num_aux_channels = 0
+        self.__use_binary_reads = config.get('use_binary_reads', False)
+
+    async def connect(self) -> bool:
+        """
+        Creates the connection with the Maccor server, if the instance does not share an already
+        connected session, and reads the number of channels.
+
+        Returns
+        -------
+        success : bool
+            True or False based on whether the connection was created successfully.
+        """
+        if self.__owns_session:
+            if not await self.__session.connect():
+                return False
+
+        general_info = await self.__session.get_general_info()
+        if not general_info:
+            return False
+        self.__num_channels = general_info['TestChannels']
+        self.__num_aux_channels = general_info.get('AuxChannels', 0)
+
+        return True
+
+    async def close(self):
+        """
+        Closes the connection with the Maccor server. This affects every interface sharing the session.
+        """
+        await self.__session.close()
+
+    async def __aenter__(self):
+        assert (await self.connect())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def channel(self, channel: int, config: dict = None):
+        """
+        Creates an `AsyncChannelInterface` for one of the cycler's channels that shares this
+        instance's connection and cycler metadata. No connections are opened and no messages
+        are sent.
+
+        Parameters
+        ----------
+        channel : int
+            The channel to be targeted by the handle.
+        config : dict
+            The channel specific keys of the `ChannelInterface` configuration (test name, safety
+            limits etc.) The connection keys are taken from this instance's configuration.
+
+        Returns
+        -------
+        channel_interface : AsyncChannelInterface
+            A connected channel handle bound to this instance's session.
+        """
+        from .async_channel_interface import AsyncChannelInterface
+
+        channel_config = dict(self.__session.get_config())
+        channel_config.update(config or {})
+        channel_config['channel'] = channel
+
+        channel_interface = AsyncChannelInterface(
+            channel_config, session=self.__session)
+        assert (await channel_interface.connect())
+        return channel_interface
+
+    def get_session(self):
+        '''
+        Returns the AsyncMacNetSession the instance communicates through.
+        '''
+        return self.__session
+
+    def add_request_hooks(self, hooks):
+        '''
+        Registers `RequestHooks` to be called on the lifecycle of every request sent through the
+        AsyncMacNetSession, e.g. for profiling or tracing. This affects every interface sharing the session.
+        '''
+        self.__session.add_request_hooks(hooks)
+
+    def remove_request_hooks(self, hooks):
+        '''
+        Unregisters hooks added with `add_request_hooks`.
+        '''
+        self.__session.remove_request_hooks(hooks)
+
+    def get_num_channels(self) -> int:
+        '''
+        Returns the number of channels associated with the cycler
+        '''
+        return self.__num_channels
+
+    async def read_system_info(self) -> dict:
+        """
+        Reads the system info from the cycler.  MacNet message (1,1)
+
+        Returns
+        -------
+        system_info : dict
+            The system information for the cycler.
+        """
+        rx_msg = await self._send_receive_encoded_msg(
+            pymacnet.messages.tx_system_info_encoder)
+        return _reply_result(rx_msg, 'system info')
+
+    async def read_general_info(self) -> dict:
+        """
+        Reads the general system info from the cycler.  MacNet message (1,2)
+
+        Returns
+        -------
+        general_info : dict
+            The general information for the cycler.
+        """
+        rx_msg = await self._send_receive_encoded_msg(
+            pymacnet.messages.tx_general_info_encoder)
+        return _reply_result(rx_msg, 'general info')
+
+    async def read_channel_status(self, channel: int) -> ChannelStatus:
+        """
+        Reads channel status for the specified `channel`.
+
+        Returns
+        -------
+        status : ChannelStatus
+            The status of the channel. Can also be used as a dictionary. Returns None if there is an issue.
+        """
+        if not _check_channels([channel], self.__num_channels):
+            return None
+
+        if self.__use_binary_reads:
+            reply = await self._send_receive_bin_msg(binary.pack_read_status(channel - 1))
+            return _status_from_bin_reply(reply, channel)
+
+        reply = await self._send_receive_encoded_msg(
+            pymacnet.messages.tx_read_status_encoder, {'Chan': channel})
+        result = _reply_result(reply, 'channel status')
+        return ChannelStatus.from_dict(result) if result is not None else None
+
+    async def read_all_channel_statuses(self) -> list:
+        """
+        Reads the channel status for all channels on the cycler.
+
+        Returns
+        -------
+        statuses : list
+            A list of channel statues where the index corresponds to the channel number (zero indexed.)
+        """
+        return await self.read_multiple_channel_statuses(1, self.__num_channels)
+
+    async def read_multiple_channel_statuses(self, first_channel: int, num_channels: int) -> list:
+        """
+        Reads the channel status (RF1, RF2 and Stat) of `num_channels` consecutive channels starting
+        from `first_channel`.  MacNet message (4,1)
+
+        MacNet limits a single message to 128 channels, so larger ranges are split into several
+        messages which are sent concurrently.
+
+        Parameters
+        ----------
+        first_channel : int
+            The first channel to read.
+        num_channels : int
+            The number of channels to read.
+
+        Returns
+        -------
+        statuses : list
+            A list of channel statuses where index `i` corresponds to channel `first_channel + i`.
+            Returns None if there is an issue.
+        """
+        if not (0 < first_channel and 0 <= num_channels and
+                first_channel + num_channels - 1 <= self.__num_channels):
+            logger.warning("Invalid channel range!")
+            return None
+
+        chunks = _status_msg_chunks(first_channel, num_channels)
+        if self.__use_binary_reads:
+            replies = await self._send_receive_bin_msgs(
+                [binary.pack_read_statuses(chan - 1, length) for chan, length in chunks])
+        else:
+            replies = await self._send_receive_encoded_msgs(
+                [(pymacnet.messages.tx_channel_status_multiple_channels_encoder, {'Chan': chan, 'Len': length})
+                 for chan, length in chunks])
+
+        return _merge_status_msg_chunks(chunks, replies, self.__use_binary_reads)
+
+    async def read_channel_statuses(self, channels: list) -> np.ndarray:
+        """
+        Reads the full channel status (MacNet message (4,7)) of several channels at once. The
+        requests are sent concurrently and the replies are collected into columns rather than one
+        dictionary per channel.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to read.
+
+        Returns
+        -------
+        statuses : np.ndarray
+            A structured array with one row per channel, in the order of `channels`, and one field
+            per status value, see `pymacnet.arrays.status_dtype`. E.g. `statuses['Voltage']` is
+            the voltage of every channel. The row of a channel that could not be read has NaN
+            values, see `pymacnet.arrays.status_dtype`. Returns None if there is an issue.
+        """
+        channels = list(channels)
+        if not _check_channels(channels, self.__num_channels):
+            return None
+
+        if self.__use_binary_reads:
+            replies = await self._send_receive_bin_msgs(_read_status_bin_msgs(channels))
+        else:
+            replies = await self._send_receive_encoded_msgs(_read_status_msgs(channels))
+        return _statuses_from_replies(replies, channels, self.__use_binary_reads)
+
+    async def read_aux_all(self, channels: list = None) -> np.ndarray:
+        """
+        Reads the auxiliary readings (MacNet message (4,4)) of several channels at once. The
+        requests are sent concurrently and the readings are collected into one array.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to read. Defaults to every channel of the cycler.
+
+        Returns
+        -------
+        aux : np.ndarray
+            A channels × auxiliary channels array with one row per channel, in the order of
+            `channels`, and at least `AuxChannels` (see `read_general_info`) columns. Readings a
+            channel does not have, or of channels that could not be read, are NaN. Returns None if
+            there is an issue.
+        """
+        if channels is None:
+            channels = range(1, self.__num_channels + 1)
+        channels = list(channels)
+        if not _check_channels(channels, self.__num_channels):
+            return None
+
+        if self.__use_binary_reads:
+            replies = await self._send_receive_bin_msgs(_read_aux_bin_msgs(channels))
+        else:
+            replies = await self._send_receive_encoded_msgs(_read_aux_msgs(channels))
+        return _aux_from_replies(replies, channels, self.__use_binary_reads, self.__num_aux_channels)
+
+    async def stream_status(self, channels: list, interval_s: float, num_sweeps: int = None, on_overrun=None):
+        """
+        Streams the status of `channels`, reading every channel once per `interval_s`. Sweeps are
+        scheduled on the monotonic clock, so the time spent reading does not add up into drift.
+        A sweep that takes longer than `interval_s` is reported as an overrun and the sweeps it
+        ran into are skipped rather than run back to back to catch up.
+
+        The reads of a sweep are sent concurrently and statuses are produced as their replies
+        arrive. The next sweep is not started until the consumer has taken every status of the
+        current one, so a slow consumer slows the stream down instead of statuses piling up in
+        memory.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to read.
+        interval_s : float
+            The time between the starts of consecutive sweeps, in seconds.
+        num_sweeps : int
+            How many sweeps to run. If not given the stream runs until the consumer stops.
+        on_overrun : callable
+            Called with the sweep number and the duration of the sweep, in seconds, when a sweep
+            overruns `interval_s`. Overruns are logged either way.
+
+        Yields
+        ------
+        status : ChannelStatus
+            The status of a channel. Channels that fail to be read are skipped.
+
+        Raises
+        ------
+        ValueError
+            If `interval_s` is not positive.
+        """
+        channels = list(channels)
+        schedule = _SweepSchedule(interval_s, on_overrun)
+        while num_sweeps is None or schedule.sweep < num_sweeps:
+            # Not self.read_channel_status, which an AsyncChannelInterface overrides without a channel.
+            reads = [asyncio.ensure_future(AsyncCyclerInterface.read_channel_status(self, channel))
+                     for channel in channels]
+            try:
+                for read in asyncio.as_completed(reads):
+                    status = await read
+                    if status is not None:
+                        yield status
+            finally:
+                for read in reads:
+                    read.cancel()
+            delay_s = schedule.finish_sweep()
+            if num_sweeps is None or schedule.sweep < num_sweeps:
+                await asyncio.sleep(delay_s)
+
+    async def set_direct_mode_outputs(self, channels: list, currents_a, voltages_v=_default_direct_output_voltage_v, *,
+                                      v_min_v) -> tuple:
+        """
+        Sets the current/voltage output of several channels at once, e.g. for synchronized step
+        changes across parallel strings. The tests must have been started with direct control.
+        Modes and current ranges are worked out as for `ChannelInterface.set_direct_mode_output`
+        and every setpoint is sent as a binary message in one pipelined batch, so the channels
+        change output within a few milliseconds of each other.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to set.
+        currents_a : array-like
+            The current of each channel. Positive charges, negative discharges and zero rests.
+        voltages_v : array-like or float
+            The voltage limit to charge to, per channel or for all channels. Defaults to the
+            `ChannelInterface.set_direct_mode_output` default.
+        v_min_v : array-like or float
+            The voltage limit to discharge to, per channel or for all channels. Keyword only.
+
+        Returns
+        -------
+        acknowledged : np.ndarray
+            Whether each channel accepted its setpoint. Returns None if the setpoints are invalid.
+        skew_s : float
+            The time between the first and last acknowledgement, in seconds. NaN if fewer than
+            two were received.
+        """
+        channels = np.asarray(channels, dtype=np.intp)
+        if not _check_channels(channels, self.__num_channels):
+            return None, np.nan
+        try:
+            setpoints = _direct_output_setpoints(currents_a, voltages_v, v_min_v)
+            msgs = _pack_direct_output_bin_msgs(channels, *setpoints)
+        except ValueError as e:
+            logger.error(f"Undefined state in set direct control outputs! {e}")
+            return None, np.nan
+
+        receive_times = []
+        replies = await self._send_receive_bin_msgs(msgs, receive_times)
+        return _check_direct_output_bin_replies(msgs, replies, receive_times)
+
+    async def _send_receive_json_msg(self, outgoing_msg_dict) -> dict:
+        """
+        Sends and receives a JSON message to/from the Maccor server. Many coroutines may call
+        this at once; up to `max_outstanding_requests` messages are kept in flight and each
+        reply is routed back to its request using the JSON-RPC `id`.
+
+        Parameters
+        ----------
+        msg_outgoing_dict : dict
+            A dictionary containing the message to be sent.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return await self.__session.send_receive_json_msg(outgoing_msg_dict)
+
+    async def _send_receive_json_msgs(self, outgoing_msg_dicts: list) -> list:
+        """
+        Sends several JSON messages to the Maccor server concurrently and collects their replies.
+
+        Parameters
+        ----------
+        outgoing_msg_dicts : list
+            A list of dictionaries containing the messages to be sent.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msg_dicts`. An entry is None
+            if there was an issue with that message.
+        """
+        return await self.__session.send_receive_json_msgs(outgoing_msg_dicts)
+
+    async def _send_receive_encoded_msg(self, encoder, params: dict = None) -> dict:
+        """
+        Sends a message using a compiled encoder from `pymacnet.messages` and receives the reply.
+
+        Parameters
+        ----------
+        encoder : pymacnet.messages.MessageEncoder
+            The compiled message to send.
+        params : dict
+            Values for the variable fields of the message, e.g. `{'Chan': 1}`.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return await self.__session.send_receive_encoded_msg(encoder, params)
+
+    async def _send_receive_encoded_msgs(self, outgoing_msgs: list) -> list:
+        """
+        Sends several messages using compiled encoders and collects their replies.
+
+        Parameters
+        ----------
+        outgoing_msgs : list
+            A list of `(encoder, params)` pairs.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msgs`. An entry is None if
+            there was an issue with that message.
+        """
+        return await self.__session.send_receive_encoded_msgs(outgoing_msgs)
+
+    async def _send_receive_bin_msg(self, msg_outgoing_bytes: bytes) -> bytes:
+        """
+        Sends a binary message to the Maccor server and receives the response.
+
+        Parameters
+        ----------
+        msg_outgoing_bytes : bytes
+            The packed binary message, see `pymacnet.messages.binary`.
+
+        Returns
+        -------
+        response : bytes
+            The complete response message. Returns None if there is an issue.
+        """
+        return await self.__session.send_receive_bin_msg(msg_outgoing_bytes)
+
+    async def _send_receive_bin_msgs(self, msgs_outgoing_bytes: list, receive_times: list = None) -> list:
+        """
+        Sends several binary messages to the Maccor server back to back and receives their responses.
+
+        Parameters
+        ----------
+        msgs_outgoing_bytes : list
+            The packed binary messages, see `pymacnet.messages.binary`.
+        receive_times : list
+            If given, the `time.monotonic()` at which each response was received is appended.
+
+        Returns
+        -------
+        responses : list
+            The complete response messages in the same order as `msgs_outgoing_bytes`. An entry
+            is None if there was an issue with that message.
+        """
+        return await self.__session.send_receive_bin_msgs(msgs_outgoing_bytes, receive_times)
+
+    async def _send_direct_output_bin_msg(self, channel: int, current_a: float, voltage_v: float,
+                                          mode: str, current_range: int) -> bool:
+        """
+        Sets the direct mode output of a channel with a binary (6,8) message and checks that the
+        reply echoes the message and reports success.
+
+        Parameters
+        ----------
+        channel : int
+            The channel to set the output of.
+        current_a : float
+            The current magnitude.
+        voltage_v : float
+            The voltage limit.
+        mode : str
+            'C' for charge, 'D' for discharge or 'R' for rest.
+        current_range : int
+            The current range, 1 to 4.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether or not the output was set.
+        """
+        msg_outgoing_bytes = _pack_direct_output_bin_msg(
+            channel, current_a, voltage_v, mode, current_range)
+        response = await self._send_receive_bin_msg(msg_outgoing_bytes)
+        return _check_direct_output_bin_reply(msg_outgoing_bytes, response)
@@ -1,9 +1,18 @@
 import copy
+import time
 import logging
+import threading
 from datetime import datetime
 
+import numpy as np
+
 import pymacnet.messages
-from .cycler_interface import CyclerInterface
+from .messages import binary
+from .cycler_interface import CyclerInterface, _aux_values_from_reply
+from .records import ChannelStatus, SafetyLimits
+from .arrays import profile_timing_dtype
+from .session import (MacNetSession, _pack_direct_output_bin_msg, _check_direct_output_bin_reply,
+                      _direct_output_setpoints, _default_direct_output_voltage_v, _min_direct_output_interval_s)
 
 logger = logging.getLogger(__name__)
 
@@ -13,9 +22,10 @@ class ChannelInterface(CyclerInterface):
     Class for controlling Maccor Cycler using MacNet.
     """
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, session: MacNetSession = None):
         """
-        Creates a ChannelInterface class instance.
+        Creates a ChannelInterface class instance. To create many channel interfaces that share one
+        connection, use `CyclerInterface.channel()` or pass the same `session` to each.
 
         Parameters
         ----------
@@ -46,12 +56,38 @@ class ChannelInterface(CyclerInterface):
                 Zero disables. Used only for direct control.
             - `data_record_current_delta_abys` - The dI/dt at which data points are taken during direct control tests.
                 Zero disables. Used only for direct control.
+
+            Optionally the following keys may be included, in addition to the optional `CyclerInterface` keys:
+            - `use_binary_direct_output` - If True, `set_direct_mode_output` sends charge and discharge setpoints
+                as binary messages instead of JSON. Rest is always sent as a binary message. Defaults to False.
+            - `direct_output_tolerance_a` and `direct_output_tolerance_v` - If either is given, `set_direct_mode_output`
+                skips setpoints with the same mode and current range as the last acknowledged setpoint, whose current
+                and voltage are within these tolerances. Units of amps and volts. Both default to 0.
+            - `direct_output_refresh_s` - How long a skipped setpoint may go without being sent again, so the cycler
+                stays in sync. Units of seconds. Defaults to 10.
+            - `cache_safety_limits` - If True, starting a test skips setting the safety limits when the limits
+                this instance last set on the channel already match the config. Defaults to False.
+            - `direct_output_coalesce_s` - If set, setpoints are sent at most once per this many seconds. Setpoints
+                arriving sooner are held and only the newest is sent once the time is up. Units of seconds.
+                Defaults to 0, i.e. every setpoint is sent immediately.
+        session : MacNetSession
+            An existing session to communicate through. If not given a new session is created and
+            connected using `config`.
         """
         self.__channel = config['channel']
         self.__config = config
+        self.__use_binary_reads = config.get('use_binary_reads', False)
+        self.__use_binary_direct_output = config.get(
+            'use_binary_direct_output', False)
+        self.__direct_output_filter = _DirectOutputFilter(config)
+        self.__direct_output_lock = threading.Lock()
+        self.__direct_output_timer = None
+        self.__cache_safety_limits = config.get('cache_safety_limits', False)
+        self.__safety_limits = None
+        self.__start_timings = None
 
         assert (self.__verify_config())
-        super().__init__(config=config)
+        super().__init__(config=config, session=session)
 
     def get_channel_number(self):
         '''
@@ -59,14 +95,14 @@ class ChannelInterface(CyclerInterface):
         '''
         return self.__channel
 
-    def read_channel_status(self) -> dict:
+    def read_channel_status(self) -> ChannelStatus:
         """
         Method to read the status of the channel defined in the config.
 
         Returns
         -------
-        status : dict
-            A dictionary detailing the status of the channel. Returns None if there is an issue.
+        status : ChannelStatus
+            The status of the channel. Can also be used as a dictionary. Returns None if there is an issue.
         """
         return super().read_channel_status(channel=(self.__channel))
 
@@ -80,15 +116,13 @@ class ChannelInterface(CyclerInterface):
             A list of the auxiliary readings.
         """
 
-        msg_outgoing_dict = copy.deepcopy(pymacnet.messages.tx_read_aux_msg)
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-
-        aux_readings = self._send_receive_json_msg(msg_outgoing_dict)
-        if aux_readings:
-            return aux_readings['result']['AuxValues']
+        if self.__use_binary_reads:
+            reply = self._send_receive_bin_msg(
+                binary.pack_read_aux(self.__channel - 1))
         else:
-            logger.error("Failed to read channel aux values!")
-            return None
+            reply = self._send_receive_encoded_msg(
+                pymacnet.messages.tx_read_aux_encoder, {'Chan': self.__channel})
+        return _aux_from_reply(reply, self.__use_binary_reads)
 
     def reset_channel(self) -> bool:
         """
@@ -99,23 +133,11 @@ class ChannelInterface(CyclerInterface):
         success : bool
             True of False based on whether the test was started or not.
         """
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_reset_channel_msg
-        )
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-
-        reply = self._send_receive_json_msg(msg_outgoing_dict)
-        if reply:
-            if reply['result']['Result'] == 'OK':
-                success = True
-            else:
-                logger.error("Failed reset channel! Channel did not reset!")
-                success = False
-        else:
-            logger.error("Failed reset channel! Did not receive reply!")
-            success = False
-
-        return success
+        self.__forget_direct_output()
+        self.__safety_limits = None
+        reply = self._send_receive_encoded_msg(
+            pymacnet.messages.tx_reset_channel_encoder, {'Chan': self.__channel})
+        return _check_reset_reply(reply, self.__channel)
 
     def set_channel_variable(self, var_num=1, var_value=0) -> bool:
         """
@@ -134,28 +156,12 @@ class ChannelInterface(CyclerInterface):
         success : bool
             True of False based on whether or not the variable value was set.
         """
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_set_variable_msg)
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-        msg_outgoing_dict['params']['VarNum'] = var_num
-        msg_outgoing_dict['params']['Value'] = var_value
+        params = {'Chan': self.__channel, 'VarNum': var_num, 'Value': var_value}
 
         # Check to make variable was set
-        reply = self._send_receive_json_msg(msg_outgoing_dict)
-        if reply:
-            try:
-                assert ((reply['result']['Chan']) == self.__config['channel'])
-                assert (reply['result']['Result'] == 'OK')
-            except Exception as e:
-                logger.error("Variable not set!")
-                logger.error(e)
-                return False
-        else:
-            logger.error(
-                "Failed to receive reply message when trying to set variable!")
-            return False
-
-        return True
+        reply = self._send_receive_encoded_msg(
+            pymacnet.messages.tx_set_variable_encoder, params)
+        return _check_set_variable_reply(reply, self.__channel)
 
     def start_test_with_procedure(self) -> bool:
         """
@@ -167,47 +173,9 @@ class ChannelInterface(CyclerInterface):
         success : bool
             True of False based on whether the test was started or not
         """
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_start_test_with_procedure_msg)
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-        msg_outgoing_dict['params']['ProcName'] = self.__config['test_procedure']
-        msg_outgoing_dict['params']['Crate'] = self.__config['c_rate_ah']
-        msg_outgoing_dict['params']['Comment'] = "Started with pymacnet at " + \
-            str(datetime.timestamp(datetime.now()))
-
-        # If test name is not specified then start test with a random test
-        if not self.__config['test_name']:
-            msg_outgoing_dict['params']['TestName'] = 'Random'
-        else:
-            msg_outgoing_dict['params']['TestName'] = self.__config['test_name']
-
-        # Check the status of the channel before we try to start the test.]
-        status = self.read_channel_status()
-        if status:
-            if pymacnet.messages.status_dictionary[status['Stat']] == 'Completed':
-                self.reset_channel()
-        else:
-            logger.error("Cannot read channel status!")
-            return False
-
-        # Set the safety limits.
-        if not self.__set_channel_safety_limits():
-            logger.error("Failed to set channel safety limits!")
-            return False
-
-        # Start the test.
-        response = self._send_receive_json_msg(msg_outgoing_dict)
-        if response:
-            if response['result']['Result'] != 'OK':
-                logger.error("Error starting test! Comment from Maccor: " +
-                             response['result']['Result'])
-                return False
-            else:
-                return True
-        else:
-            logger.error(
-                "Failed to get message response when trying to start test!")
-            return False
+        self.__forget_direct_output()
+        return self.__start_test(
+            _start_test_with_procedure_msg(self.__channel, self.__config))
 
     def start_test_with_direct_control(self) -> bool:
         """
@@ -218,55 +186,11 @@ class ChannelInterface(CyclerInterface):
         success : bool
             True of False based on whether the test was started or not.
         """
+        self.__forget_direct_output()
+        return self.__start_test(
+            _start_test_with_direct_control_msg(self.__channel, self.__config))
 
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_start_test_with_direct_control_msg)
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-        msg_outgoing_dict['params']['DataTime'] = self.__config['data_record_time_s']
-        msg_outgoing_dict['params']['DataV'] = self.__config['data_record_voltage_delta_vbys']
-        msg_outgoing_dict['params']['DataI'] = self.__config['data_record_current_delta_abys']
-        # Make sure the start current is always zero.
-        msg_outgoing_dict['params']['Current'] = 0
-        # Set to something within range so it's not disabled.
-        msg_outgoing_dict['params']['Voltage'] = self.__config['v_max_v']
-        # TODO: FIX having a weird issue where I can't set the mode to rest.
-        msg_outgoing_dict['params']['ChMode'] = "C"
-
-        # If test name is not specified then start test with a random test
-        if not self.__config['test_name']:
-            msg_outgoing_dict['params']['TestName'] = "Random"
-        else:
-            msg_outgoing_dict['params']['TestName'] = self.__config['test_name']
-
-        # Check the status of the channel before we try to start the test.
-        status = self.read_channel_status()
-        if status:
-            if pymacnet.messages.status_dictionary[status['Stat']] == 'Completed':
-                self.reset_channel()
-        else:
-            logger.error("Cannot read channel status!")
-            return False
-
-        # Set the safety limits.
-        if not self.__set_channel_safety_limits():
-            logger.error("Failed to set channel safety limits!")
-            return False
-
-        # Start the test
-        response = self._send_receive_json_msg(msg_outgoing_dict)
-        if response:
-            if response['result']['Result'] != 'OK':
-                logger.error("Error starting test! Comment from Maccor: " +
-                             response['result']['Result'])
-                return False
-            else:
-                return True
-        else:
-            logger.error(
-                "Failed to get message response when trying to start test!")
-            return False
-
-    def set_direct_mode_output(self, current_a, voltage_v=4900) -> bool:
+    def set_direct_mode_output(self, current_a, voltage_v=_default_direct_output_voltage_v) -> bool:
         """
         Sets the current/voltage output on the channel specified on in the config. Note that the
         test must have been started with the start_test_direct_control method for this to work.
@@ -279,116 +203,251 @@ class ChannelInterface(CyclerInterface):
             If a `voltage_v` argument is passed in addition to `current_a`, then the cycler will do a CCCV
             charge with the requested voltage.
 
+        If the `direct_output_*` config keys are set, setpoints matching the last acknowledged one are
+        skipped and setpoints sent in quick succession are coalesced, see `get_direct_output_stats`.
 
         Returns
         -------
         success : bool
-            True of False based on whether the values were set or not.
+            True of False based on whether the values were set or not. True for a skipped setpoint,
+            and for a setpoint held for coalescing, whose result is only logged.
         """
 
-        # Determine mode and voltage limits based on sign of passed current.
-        if current_a == 0:
-            set_current_a = 0
-            set_voltage_v = 0
-            mode = "R"
-        elif current_a > 0:
-            set_current_a = current_a
-            set_voltage_v = voltage_v
-            mode = "C"
-        elif current_a < 0:
-            set_current_a = abs(current_a)
-            set_voltage_v = self.__config['v_min_v']
-            mode = "D"
-        else:
+        direct_output = _direct_output_setpoint(
+            current_a, voltage_v, self.__config['v_min_v'])
+        if not direct_output:
             logger.error("Undefined state is set direct control output!")
             return False
 
-        # Determine range based on the magnitude of the current
-        if set_current_a == 0:
-            # Don't bother changing current range if we're just setting to zero.
-            current_range = 4
-        elif set_current_a < 0.000150:
-            current_range = 1
-        elif set_current_a < 0.005:
-            current_range = 2
-        elif set_current_a < 0.150:
-            current_range = 3
-        else:
-            current_range = 4
-
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_set_direct_output_msg)
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-        msg_outgoing_dict['params']['Current'] = set_current_a
-        msg_outgoing_dict['params']['Voltage'] = set_voltage_v
-        msg_outgoing_dict['params']['ChMode'] = mode
-        msg_outgoing_dict['params']['CurrentRange'] = current_range
-
-        # Send the rest command using the caveman method as JSON cannot set rest currently (10/4/2022)
-        if mode == "R":
-            return self._send_direct_output_rest_bin_msg(msg_outgoing_dict)
+        with self.__direct_output_lock:
+            delay_s = self.__direct_output_filter.submit(direct_output)
+            if delay_s is None:
+                return True
+            if delay_s > 0:
+                timer = threading.Timer(delay_s, lambda: self.__send_pending_direct_output(timer))
+                timer.daemon = True
+                timer.start()
+                self.__direct_output_timer = timer
+                return True
+
+        return self.__send_direct_output(direct_output)
+
+    def get_direct_output_stats(self) -> dict:
+        """
+        Returns how many setpoints `set_direct_mode_output` sent, skipped as unchanged and dropped
+        in favour of a newer setpoint. See the `direct_output_*` config keys.
+
+        Returns
+        -------
+        stats : dict
+            The `sent`, `suppressed` and `coalesced` counts.
+        """
+        with self.__direct_output_lock:
+            return dict(self.__direct_output_filter.stats)
+
+    def close(self):
+        """
+        Drops any setpoint held back by coalescing and closes the connection with the Maccor
+        server. This affects every interface sharing the session.
+        """
+        self.__forget_direct_output()
+        super().close()
+
+    def __forget_direct_output(self):
+        """
+        Forgets the last setpoint and drops any setpoint held back by coalescing, so it cannot be
+        sent after whatever replaces it.
+        """
+        with self.__direct_output_lock:
+            self.__direct_output_filter.reset()
+            if self.__direct_output_timer is not None:
+                self.__direct_output_timer.cancel()
+                self.__direct_output_timer = None
+
+    def __send_pending_direct_output(self, timer: threading.Timer):
+        """
+        Sends the newest setpoint held back by coalescing, unless `timer` was cancelled after it
+        fired.
+        """
+        with self.__direct_output_lock:
+            if timer is not self.__direct_output_timer:
+                return
+            direct_output = self.__direct_output_filter.take_pending()
+            self.__direct_output_timer = None
+        if direct_output:
+            self.__send_direct_output(direct_output)
+
+    def __send_direct_output(self, direct_output: tuple) -> bool:
+        """
+        Sends a direct output setpoint and remembers it if it was acknowledged.
+
+        Parameters
+        ----------
+        direct_output : tuple
+            The `(current_a, voltage_v, mode, current_range)` to send.
+
+        Returns
+        -------
+        success : bool
+            True of False based on whether the values were set or not.
+        """
+        success = self.__send_direct_output_msg(*direct_output)
+        with self.__direct_output_lock:
+            self.__direct_output_filter.sent(direct_output, success)
+        return success
+
+    def __send_direct_output_msg(self, set_current_a, set_voltage_v, mode, current_range) -> bool:
+        """
+        Sends a direct output setpoint message and checks the reply.
+        """
+        # Rest is always sent as a binary message as JSON cannot set rest currently (10/4/2022)
+        if mode == "R" or self.__use_binary_direct_output:
+            return self._send_direct_output_bin_msg(
+                self.__channel, set_current_a, set_voltage_v, mode, current_range)
         else:
+            params = _direct_output_params(self.__channel, set_current_a, set_voltage_v, mode, current_range)
+
             # Send message and make sure response indicates values were accepted.
-            response = self._send_receive_json_msg(msg_outgoing_dict)
-            if response:
-                if response['result']['Result'] == "OK":
-                    return True
-                else:
-                    logger.error(
-                        "Error Setting output! Message : " + str(response))
-                    return False
-            else:
-                logger.error(
-                    "Failed to get message response when trying to set output!")
-                return False
+            response = self._send_receive_encoded_msg(
+                pymacnet.messages.tx_set_direct_output_encoder, params)
+            return _check_direct_output_reply(response)
 
-    def __set_channel_safety_limits(self) -> bool:
+    def play_direct_output_profile(self, profile) -> np.ndarray:
         """
-        Sets channel safety limits on the channel specified in the config.
+        Plays a direct output profile, e.g. a drive cycle or pulse train, on the channel specified
+        in the config. The test must have been started with the start_test_direct_control method.
+
+        The setpoint messages of every point are packed before playback starts, and points are
+        sent on a schedule kept on the monotonic clock, so time spent sending does not drift the
+        profile. A point following a late one is held until 100 ms after it, and if playback falls
+        so far behind that the next point is due by then, the late point is skipped rather than
+        sent. Setpoints are sent as binary messages, which can be
+        packed in advance and can also set rest.
+
+        Parameters
+        ----------
+        profile : array-like
+            One `(time_s, current_a)` or `(time_s, current_a, voltage_v)` row per point, with
+            times at least 100 ms apart as MacNet rejects setpoints sent faster. Currents and
+            voltages are as for `set_direct_mode_output`. A missing or NaN voltage uses the
+            `set_direct_mode_output` default.
+
+        Returns
+        -------
+        timings : np.ndarray
+            The timing of each point, see `pymacnet.arrays.profile_timing_dtype`. Returns None if
+            the profile is invalid.
+        """
+        try:
+            times_s, msgs = _pack_direct_output_profile(
+                self.__channel, profile, self.__config['v_min_v'])
+        except ValueError as e:
+            logger.error(f"Invalid direct output profile! {e}")
+            return None
+        self.__forget_direct_output()
+
+        timings = _new_profile_timings(times_s)
+        start = time.monotonic()
+        sent = -np.inf
+        for index, msg in enumerate(msgs):
+            due = start + times_s[index]
+            send_at = _profile_send_at(times_s, index, start, sent)
+            if send_at is None:
+                continue
+            delay_s = send_at - time.monotonic()
+            if delay_s > 0:
+                time.sleep(delay_s)
+
+            sent = time.monotonic()
+            reply = self._send_receive_bin_msg(msg)
+            acknowledged = time.monotonic()
+            timings[index] = (times_s[index], True, _check_direct_output_bin_reply(msg, reply),
+                              sent - due, acknowledged - sent)
+
+        _log_skipped_profile_points(timings)
+        return timings
+
+    def get_last_start_timings(self) -> dict:
+        """
+        Returns how long each step of the last test start took, see `start_test_with_procedure`.
+
+        Returns
+        -------
+        timings : dict
+            The duration in seconds of each step that was run: `status_s` (reading the channel
+            status), `reset_s` (resetting the channel and setting the safety limits, only if the
+            last test had completed), `safety_limits_s` (only if the channel was not reset and the
+            cached limits do not match), `start_s` and `total_s`. None if no test was started yet.
+        """
+        return self.__start_timings
+
+    def __start_test(self, msg_outgoing_dict: dict) -> bool:
+        """
+        Reads the status of the channel, resets it if its last test completed, sets the safety
+        limits and then sends the start test message. The safety limits are only set once the
+        status shows the channel can start a test, so a running test keeps its limits. The reset
+        and the safety limits are pipelined, so a start takes three round trips, or two if the
+        cached safety limits match.
+
+        Parameters
+        ----------
+        msg_outgoing_dict : dict
+            The start test message to send.
 
         Returns
         -------
         success : bool
-            Returns True/False based on whether the safety limits were set correctly.
-        """
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_set_safety_limits_msg
-        )
-        msg_outgoing_dict['params']['Chan'] = self.__channel
-        msg_outgoing_dict['params']['VSafeMax'] = self.__config['v_max_safety_limit_v']
-        msg_outgoing_dict['params']['VSafeMin'] = self.__config['v_min_safety_limit_v']
-        msg_outgoing_dict['params']['ISafeChg'] = self.__config['i_max_safety_limit_a']
-        msg_outgoing_dict['params']['ISafeDis'] = self.__config['i_min_safety_limit_a']
-        msg_outgoing_dict['params']['PBatSafeChg'] = self.__config['power_safety_limit_chg_w']
-        msg_outgoing_dict['params']['PBatSafeDis'] = self.__config['power_safety_limit_dsg_w']
-
-        # Check to make sure all safety limits were set correctly
-        reply = self._send_receive_json_msg(msg_outgoing_dict)
-        if reply:
-            try:
-                assert ((reply['result']['Chan']) == self.__config['channel'])
-                assert (abs(reply['result']['VSafeMax'] -
-                        self.__config['v_max_safety_limit_v']) < 0.001)
-                assert (abs(reply['result']['VSafeMin'] -
-                        self.__config['v_min_safety_limit_v']) < 0.001)
-                assert (abs(reply['result']['ISafeChg'] -
-                        self.__config['i_max_safety_limit_a']) < 0.001)
-                assert (abs(reply['result']['ISafeDis'] -
-                        self.__config['i_min_safety_limit_a']) < 0.001)
-                assert (abs(reply['result']['PBatSafeChg'] -
-                        self.__config['power_safety_limit_chg_w']) < 0.001)
-                assert (abs(reply['result']['PBatSafeDis'] -
-                        self.__config['power_safety_limit_dsg_w']) < 0.001)
-            except Exception as e:
-                logger.error(
-                    "Set safety limits do not match sent safety limits! Message response: " + str(reply))
-                logger.error(e)
-                return False
-        else:
-            logger.error(
-                "Failed to receive reply message when trying to set safety limits!")
+            True of False based on whether the test was started or not.
+        """
+        timings = {}
+        self.__start_timings = timings
+        started = time.monotonic()
+
+        # Check the status of the channel before we try to start the test.
+        replies = self._send_receive_encoded_msgs(
+            [(pymacnet.messages.tx_read_status_encoder, {'Chan': self.__channel})])
+        timings['status_s'] = time.monotonic() - started
+        status = _startable_status(replies[0], self.__channel)
+        if status is None:
             return False
 
+        # Reset a completed channel, which also needs its safety limits set again.
+        reset = status == 'Completed'
+        if reset or not self.__safety_limits_cached():
+            step_started = time.monotonic()
+            replies = self._send_receive_encoded_msgs(
+                _reset_and_safety_limits_msgs(self.__channel, self.__config, reset))
+            timings['reset_s' if reset else 'safety_limits_s'] = time.monotonic() - step_started
+            safety_limits_set = self.__check_safety_limits_reply(replies[-1])
+            if reset and not _check_reset_reply(replies[0], self.__channel):
+                return False
+            if not safety_limits_set:
+                logger.error("Failed to set channel safety limits!")
+                return False
+
+        # Start the test.
+        step_started = time.monotonic()
+        response = self._send_receive_json_msg(msg_outgoing_dict)
+        timings['start_s'] = time.monotonic() - step_started
+        timings['total_s'] = time.monotonic() - started
+        return _check_start_reply(response, [self.__channel])
+
+    def __safety_limits_cached(self) -> bool:
+        """
+        Checks whether the safety limits last set on the channel match the config, so they need
+        not be set again. Always False unless `cache_safety_limits` is set in the config.
+        """
+        return (self.__cache_safety_limits and self.__safety_limits is not None and
+                self.__safety_limits.is_close(SafetyLimits.from_config(self.__config)))
+
+    def __check_safety_limits_reply(self, reply: dict) -> bool:
+        """
+        Checks the reply to setting the safety limits and caches the limits that were set.
+        """
+        self.__safety_limits = None
+        if not _check_safety_limits_reply(reply, self.__config):
+            return False
+        self.__safety_limits = SafetyLimits.from_dict(reply['result'])
         return True
 
     def __verify_config(self) -> bool:
@@ -400,34 +459,527 @@ class ChannelInterface(CyclerInterface):
         success : bool
             True or False based on whether the config passed at construction is valid.
         """
-        success = False
-
-        required_config_keys = ['channel',
-                                'test_name',
-                                'test_procedure',
-                                'v_max_safety_limit_v',
-                                'v_min_safety_limit_v',
-                                'i_max_safety_limit_a',
-                                'i_min_safety_limit_a',
-                                'power_safety_limit_chg_w',
-                                'power_safety_limit_dsg_w',
-                                'v_max_v',
-                                'v_min_v',
-                                'c_rate_ah',
-                                'data_record_time_s',
-                                'data_record_voltage_delta_vbys',
-                                'data_record_current_delta_abys',
-                                'server_ip',
-                                'json_msg_port',
-                                'bin_msg_port']
-
-        missing_keyes = False
-        for key in required_config_keys:
-            if key not in self.__config:
-                logger.error("Missing key from config! Missing : " + key)
-                missing_keyes = True
-
-        if not missing_keyes:
-            success = True
+        return _verify_config(self.__config)
 
-        return success
+
+class _DirectOutputFilter():
+    """
+    Book keeping of a channel's direct output setpoints, to skip unchanged setpoints and to
+    coalesce bursts of setpoints. Not thread safe by itself.
+    """
+
+    def __init__(self, config: dict):
+        tolerance_a = config.get('direct_output_tolerance_a')
+        tolerance_v = config.get('direct_output_tolerance_v')
+        self.enabled = tolerance_a is not None or tolerance_v is not None
+        self.tolerance_a = tolerance_a if tolerance_a is not None else 0
+        self.tolerance_v = tolerance_v if tolerance_v is not None else 0
+        self.refresh_s = config.get('direct_output_refresh_s', 10)
+        self.coalesce_s = config.get('direct_output_coalesce_s', 0)
+
+        self.pending = None
+        self.last_sent_at = -float('inf')
+        self.stats = {'sent': 0, 'suppressed': 0, 'coalesced': 0}
+        self.__last_acknowledged = None
+        self.__acknowledged_at = -float('inf')
+
+    def is_redundant(self, direct_output: tuple) -> bool:
+        """
+        Checks whether a setpoint matches the last acknowledged one, which is recent enough not
+        to need a refresh.
+        """
+        last = self.__last_acknowledged
+        if not self.enabled or last is None:
+            return False
+        if time.monotonic() - self.__acknowledged_at >= self.refresh_s:
+            return False
+        return (direct_output[2:] == last[2:] and
+                abs(direct_output[0] - last[0]) <= self.tolerance_a and
+                abs(direct_output[1] - last[1]) <= self.tolerance_v)
+
+    def coalesce_delay_s(self) -> float:
+        """
+        Returns how long a setpoint has to be held before it may be sent.
+        """
+        if not self.coalesce_s:
+            return 0
+        return max(0, self.last_sent_at + self.coalesce_s - time.monotonic())
+
+    def submit(self, direct_output: tuple) -> float:
+        """
+        Decides what to do with a new setpoint. A setpoint matching the last acknowledged one is
+        skipped, and a setpoint sent too soon after the last one is held as `pending`, replacing
+        any setpoint already held.
+
+        Returns
+        -------
+        delay_s : float
+            0 if the setpoint is to be sent now, how long to wait before sending `pending` if the
+            setpoint is held, or None if there is nothing to do, as the setpoint was skipped or
+            replaced a setpoint that is already waiting.
+        """
+        if self.pending is None and self.is_redundant(direct_output):
+            self.stats['suppressed'] += 1
+            return None
+
+        delay_s = self.coalesce_delay_s()
+        if delay_s > 0 or self.pending is not None:
+            held = self.pending is not None
+            if held:
+                self.stats['coalesced'] += 1
+            self.pending = direct_output
+            return None if held else delay_s
+        self.last_sent_at = time.monotonic()
+        return 0
+
+    def take_pending(self) -> tuple:
+        """
+        Returns the setpoint held for coalescing, which is about to be sent, and clears it.
+        None if no setpoint is held.
+        """
+        direct_output = self.pending
+        self.pending = None
+        self.last_sent_at = time.monotonic()
+        return direct_output
+
+    def sent(self, direct_output: tuple, success: bool):
+        """
+        Records that a setpoint was sent.
+        """
+        self.stats['sent'] += 1
+        if success:
+            self.__last_acknowledged = direct_output
+            self.__acknowledged_at = time.monotonic()
+        else:
+            self.__last_acknowledged = None
+
+    def reset(self):
+        """
+        Forgets the last acknowledged setpoint and drops any held setpoint, e.g. when a test is
+        started and the channel's output changes.
+        """
+        self.__last_acknowledged = None
+        self.pending = None
+
+
+def _direct_output_setpoint(current_a, voltage_v, v_min_v) -> tuple:
+    """
+    Works out the direct output setpoint to send for a requested current, with
+    `pymacnet.session._direct_output_setpoints`. The sign of the current sets the mode and its
+    magnitude sets the current range.
+
+    Parameters
+    ----------
+    current_a : float
+        Requested current. Positive charges, negative discharges and zero rests.
+    voltage_v : float
+        Voltage limit to charge to.
+    v_min_v : float
+        Voltage limit to discharge to.
+
+    Returns
+    -------
+    setpoint : tuple
+        The `(current_a, voltage_v, mode, current_range)` to send. None if the current is not a number.
+    """
+    try:
+        currents_a, voltages_v, modes, current_ranges = _direct_output_setpoints([current_a], voltage_v, v_min_v)
+    except (TypeError, ValueError):
+        return None
+    return float(currents_a[0]), float(voltages_v[0]), chr(modes[0]), int(current_ranges[0])
+
+
+def _pack_direct_output_profile(channel: int, profile, v_min_v: float) -> tuple:
+    """
+    Packs the binary set direct output message of every point of a direct output profile.
+
+    Parameters
+    ----------
+    channel : int
+        The channel to play the profile on.
+    profile : array-like
+        One `(time_s, current_a)` or `(time_s, current_a, voltage_v)` row per point.
+    v_min_v : float
+        Voltage limit to discharge to.
+
+    Returns
+    -------
+    packed_profile : tuple
+        The times of the points from the start of the profile, in seconds, and their packed
+        messages.
+
+    Raises
+    ------
+    ValueError
+        If the profile is not a table of numbers with times at least 100 ms apart.
+    """
+    profile = np.asarray(profile, dtype=np.float64)
+    if profile.ndim != 2 or profile.shape[1] not in (2, 3) or not len(profile):
+        raise ValueError("Expected one (time_s, current_a[, voltage_v]) row per point")
+    times_s = profile[:, 0] - profile[0, 0]
+    # Allows for rounding of times given as multiples of the interval.
+    if np.any(np.diff(times_s) < _min_direct_output_interval_s - 1e-9):
+        raise ValueError(f"Points must be at least {_min_direct_output_interval_s} s apart")
+
+    msgs = []
+    for point in profile:
+        voltage_v = point[2] if len(point) == 3 and not np.isnan(point[2]) else _default_direct_output_voltage_v
+        direct_output = _direct_output_setpoint(point[1], voltage_v, v_min_v)
+        if not direct_output:
+            raise ValueError(f"Undefined output at {point[0]} s")
+        set_current_a, set_voltage_v, mode, current_range = direct_output
+        msgs.append(_pack_direct_output_bin_msg(
+            channel, set_current_a, set_voltage_v, mode, current_range))
+
+    return times_s, msgs
+
+
+def _aux_from_reply(reply, binary_reply: bool) -> list:
+    """
+    Returns the readings of the reply to a (4,4) read aux message of one channel. Logs an error
+    and returns None if there are none.
+    """
+    try:
+        aux_readings = _aux_values_from_reply(reply, binary_reply)
+    except Exception as e:
+        logger.error("Failed to read channel aux values!", exc_info=True)
+        logger.error(e)
+        return None
+    if aux_readings is None:
+        logger.error("Failed to read channel aux values!")
+    return aux_readings
+
+
+def _check_set_variable_reply(reply: dict, channel: int) -> bool:
+    """
+    Checks the reply to a set variable message of `channel`.
+    """
+    if not reply:
+        logger.error(
+            "Failed to receive reply message when trying to set variable!")
+        return False
+    result = reply.get('result', {})
+    if result.get('Chan') != channel or result.get('Result') != 'OK':
+        logger.error(f"Variable not set! Message : {reply}")
+        return False
+    return True
+
+
+def _direct_output_params(channel: int, current_a: float, voltage_v: float, mode: str, current_range: int) -> dict:
+    """
+    Returns the params of a JSON (6,8) set direct output message.
+    """
+    return {'Chan': channel, 'Current': current_a, 'Voltage': voltage_v,
+            'ChMode': mode, 'CurrentRange': current_range}
+
+
+def _check_direct_output_reply(reply: dict) -> bool:
+    """
+    Checks that the reply to a JSON set direct output message indicates the values were accepted.
+    """
+    if not reply:
+        logger.error(
+            "Failed to get message response when trying to set output!")
+        return False
+    if reply.get('result', {}).get('Result') != "OK":
+        logger.error(
+            "Error Setting output! Message : " + str(reply))
+        return False
+    return True
+
+
+def _new_profile_timings(times_s: np.ndarray) -> np.ndarray:
+    """
+    Returns the timings of a direct output profile before playback, with every point not sent yet.
+    """
+    timings = np.zeros(len(times_s), dtype=profile_timing_dtype)
+    timings['Time'] = times_s
+    timings['Jitter'] = np.nan
+    timings['Latency'] = np.nan
+    return timings
+
+
+def _profile_send_at(times_s: np.ndarray, index: int, start: float, sent: float) -> float:
+    """
+    Works out when to send point `index` of a direct output profile whose playback started at
+    `start` and last sent a point at `sent`, on the monotonic clock. A point after a late one
+    still waits out MacNet's minimum spacing.
+
+    Returns
+    -------
+    send_at : float
+        When to send the point. None if the point is so late that the next point is due by then,
+        so it is skipped.
+    """
+    send_at = max(start + times_s[index], sent + _min_direct_output_interval_s, time.monotonic())
+    if index + 1 < len(times_s) and send_at >= start + times_s[index + 1]:
+        return None
+    return send_at
+
+
+def _log_skipped_profile_points(timings: np.ndarray):
+    """
+    Warns about the points of a direct output profile that were skipped as late.
+    """
+    skipped = np.count_nonzero(~timings['Sent'])
+    if skipped:
+        logger.warning(f"Skipped {skipped} late points of the direct output profile")
+
+
+def _verify_config(config: dict) -> bool:
+    """
+    Verifies that a channel config contains all of the required keys.
+
+    Parameters
+    ----------
+    config : dict
+        The channel config to check.
+
+    Returns
+    --------------------------
+    success : bool
+        True or False based on whether the config is valid.
+    """
+    success = False
+
+    required_config_keys = ['channel',
+                            'test_name',
+                            'test_procedure',
+                            'v_max_safety_limit_v',
+                            'v_min_safety_limit_v',
+                            'i_max_safety_limit_a',
+                            'i_min_safety_limit_a',
+                            'power_safety_limit_chg_w',
+                            'power_safety_limit_dsg_w',
+                            'v_max_v',
+                            'v_min_v',
+                            'c_rate_ah',
+                            'data_record_time_s',
+                            'data_record_voltage_delta_vbys',
+                            'data_record_current_delta_abys',
+                            'server_ip',
+                            'json_msg_port',
+                            'bin_msg_port']
+
+    missing_keyes = False
+    for key in required_config_keys:
+        if key not in config:
+            logger.error("Missing key from config! Missing : " + key)
+            missing_keyes = True
+
+    if not missing_keyes:
+        success = True
+
+    return success
+
+
+def _start_test_with_procedure_msg(channel: int, config: dict) -> dict:
+    """
+    Builds the message to start a test with the procedure specified in a channel config.
+
+    Parameters
+    ----------
+    channel : int
+        The channel to start the test on.
+    config : dict
+        The channel config.
+
+    Returns
+    -------
+    msg_outgoing_dict : dict
+        The start test message.
+    """
+    msg_outgoing_dict = copy.deepcopy(
+        pymacnet.messages.tx_start_test_with_procedure_msg)
+    msg_outgoing_dict['params']['Chan'] = channel
+    msg_outgoing_dict['params']['ProcName'] = config['test_procedure']
+    msg_outgoing_dict['params']['Crate'] = config['c_rate_ah']
+    msg_outgoing_dict['params']['Comment'] = "Started with pymacnet at " + \
+        str(datetime.timestamp(datetime.now()))
+
+    # If test name is not specified then start test with a random test
+    if not config['test_name']:
+        msg_outgoing_dict['params']['TestName'] = 'Random'
+    else:
+        msg_outgoing_dict['params']['TestName'] = config['test_name']
+
+    return msg_outgoing_dict
+
+
+def _start_test_with_direct_control_msg(channel: int, config: dict) -> dict:
+    """
+    Builds the message to start a direct control test with the settings in a channel config.
+
+    Parameters
+    ----------
+    channel : int
+        The channel to start the test on.
+    config : dict
+        The channel config.
+
+    Returns
+    -------
+    msg_outgoing_dict : dict
+        The start direct control message.
+    """
+    msg_outgoing_dict = copy.deepcopy(
+        pymacnet.messages.tx_start_test_with_direct_control_msg)
+    msg_outgoing_dict['params']['Chan'] = channel
+    msg_outgoing_dict['params']['DataTime'] = config['data_record_time_s']
+    msg_outgoing_dict['params']['DataV'] = config['data_record_voltage_delta_vbys']
+    msg_outgoing_dict['params']['DataI'] = config['data_record_current_delta_abys']
+    # Make sure the start current is always zero.
+    msg_outgoing_dict['params']['Current'] = 0
+    # Set to something within range so it's not disabled.
+    msg_outgoing_dict['params']['Voltage'] = config['v_max_v']
+    # TODO: FIX having a weird issue where I can't set the mode to rest.
+    msg_outgoing_dict['params']['ChMode'] = "C"
+
+    # If test name is not specified then start test with a random test
+    if not config['test_name']:
+        msg_outgoing_dict['params']['TestName'] = "Random"
+    else:
+        msg_outgoing_dict['params']['TestName'] = config['test_name']
+
+    return msg_outgoing_dict
+
+
+_startable_statuses = ('Available', 'Completed')
+"""
+The channel statuses a test can be started from. A completed channel is reset first.
+"""
+
+
+def _startable_status(reply: dict, channel: int) -> str:
+    """
+    Checks the reply to a channel status read before starting a test.
+
+    Parameters
+    ----------
+    reply : dict
+        The read status reply. None if no reply was received.
+    channel : int
+        The channel that was read, for logging.
+
+    Returns
+    -------
+    status : str
+        The status of the channel, see `pymacnet.messages.status_dictionary`, if a test can be
+        started on it. None if the status could not be read or the channel cannot start a test.
+    """
+    result = reply.get('result') if reply else None
+    if not result:
+        logger.error(f"Cannot read status of channel {channel}!")
+        return None
+    status = pymacnet.messages.status_dictionary.get(result.get('Stat'))
+    if status not in _startable_statuses:
+        logger.error(f"Channel {channel} is {status}! Not starting a test on it")
+        return None
+    return status
+
+
+def _reset_and_safety_limits_msgs(channel: int, config: dict, reset: bool) -> list:
+    """
+    Builds the messages that prepare a channel for a test start: a reset if `reset` is set,
+    followed by setting the safety limits of the channel config.
+    """
+    msgs = []
+    if reset:
+        msgs.append((pymacnet.messages.tx_reset_channel_encoder, {'Chan': channel}))
+    msgs.append((pymacnet.messages.tx_set_safety_limits_encoder, _safety_limits_params(channel, config)))
+    return msgs
+
+
+def _check_reset_reply(reply: dict, channel: int) -> bool:
+    """
+    Checks the reply to a reset channel message. A reply without a result is a failure.
+    """
+    if not (reply and reply.get('result', {}).get('Result') == 'OK'):
+        logger.error(f"Failed to reset channel {channel}!")
+        return False
+    return True
+
+
+def _check_start_reply(reply: dict, channels: list) -> bool:
+    """
+    Checks the reply to a start test message.
+
+    Parameters
+    ----------
+    reply : dict
+        The start test reply. None if no reply was received.
+    channels : list
+        The channels the message started, for logging.
+
+    Returns
+    -------
+    success : bool
+        True or False based on whether the test was started.
+    """
+    if not reply:
+        logger.error(f"Failed to get message response when trying to start test on channels {channels}!")
+        return False
+    result = reply.get('result', {}).get('Result')
+    if result != 'OK':
+        logger.error(f"Error starting test on channels {channels}! Comment from Maccor: {result}")
+        return False
+    return True
+
+
+def _safety_limits_params(channel: int, config: dict) -> dict:
+    """
+    Builds the parameters of the message to set the safety limits specified in a channel config,
+    for `pymacnet.messages.tx_set_safety_limits_encoder`.
+
+    Parameters
+    ----------
+    channel : int
+        The channel to set the safety limits on.
+    config : dict
+        The channel config.
+
+    Returns
+    -------
+    params : dict
+        The set safety limits message parameters.
+    """
+    return {'Chan': channel,
+            'VSafeMax': config['v_max_safety_limit_v'],
+            'VSafeMin': config['v_min_safety_limit_v'],
+            'ISafeChg': config['i_max_safety_limit_a'],
+            'ISafeDis': config['i_min_safety_limit_a'],
+            'PBatSafeChg': config['power_safety_limit_chg_w'],
+            'PBatSafeDis': config['power_safety_limit_dsg_w']}
+
+
+def _check_safety_limits_reply(reply: dict, config: dict) -> bool:
+    """
+    Checks that the reply to a set safety limits message matches the limits in a channel config.
+
+    Parameters
+    ----------
+    reply : dict
+        The set safety limits reply. None if no reply was received.
+    config : dict
+        The channel config.
+
+    Returns
+    -------
+    success : bool
+        Returns True/False based on whether the safety limits were set correctly.
+    """
+    if reply:
+        try:
+            assert (SafetyLimits.from_config(config).is_close(
+                SafetyLimits.from_dict(reply['result'])))
+        except Exception as e:
+            logger.error(
+                "Set safety limits do not match sent safety limits! Message response: " + str(reply))
+            logger.error(e)
+            return False
+    else:
+        logger.error(
+            "Failed to receive reply message when trying to set safety limits!")
+        return False
+
+    return True
@@ -0,0 +1,141 @@
+import json
+import logging
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+logger = logging.getLogger(__name__)
+
+# The `(loads, dumps)` functions of every installed JSON library, fastest first. The fastest
+# one is used unless another is chosen with `set_backend()`.
+_backends = {}
+
+
+def _default(obj):
+    """
+    Converts the numpy values callers pass in, e.g. setpoints from an array, to plain Python
+    values for libraries that cannot encode them.
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _to_builtin(obj):
+    """
+    Recursively replaces numpy values in a document with plain Python values.
+    """
+    if isinstance(obj, dict):
+        return {key: _to_builtin(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_builtin(value) for value in obj]
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _default(obj)
+    return obj
+
+
+def _ujson_dumps(obj) -> bytes:
+    # Not every ujson release supports `default`, so documents it rejects are converted first.
+    try:
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    except (TypeError, OverflowError):
+        return ujson.dumps(_to_builtin(obj), ensure_ascii=False).encode('utf-8')
+
+
+if orjson:
+    # orjson parses bytes, bytearray and memoryview directly and encodes straight to bytes.
+    _backends['orjson'] = (
+        orjson.loads,
+        lambda obj: orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY))
+
+if ujson:
+    _backends['ujson'] = (
+        lambda data: ujson.loads(data if isinstance(data, (bytes, str)) else bytes(data)),
+        _ujson_dumps)
+
+# The standard library detects the encoding of bytes itself, so no decode is needed here.
+_backends['json'] = (
+    lambda data: json.loads(data if isinstance(data, (bytes, bytearray, str)) else bytes(data)),
+    lambda obj: json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8'))
+
+backend = None
+"""
+The name of the backend in use.
+"""
+
+_loads = None
+_dumps = None
+
+
+def set_backend(name: str):
+    """
+    Selects the JSON library used to encode and decode messages.
+
+    Parameters
+    ----------
+    name : str
+        One of `'orjson'`, `'ujson'` or `'json'`. The library must be installed.
+    """
+    global backend, _loads, _dumps
+
+    if name not in _backends:
+        raise ValueError(
+            f"JSON backend '{name}' is not available! Installed backends: {list(_backends)}")
+    backend = name
+    _loads, _dumps = _backends[name]
+    logger.debug(f"Using {name} for JSON messages")
+
+
+def available_backends() -> list:
+    '''
+    Returns the names of the installed JSON backends, fastest first.
+    '''
+    return list(_backends)
+
+
+def loads(data):
+    """
+    Decodes a JSON document.
+
+    Parameters
+    ----------
+    data : bytes-like or str
+        The encoded document. May be a memoryview into a receive buffer.
+
+    Returns
+    -------
+    obj
+        The decoded document.
+    """
+    return _loads(data)
+
+
+def dumps(obj) -> bytes:
+    """
+    Encodes an object as compact, UTF-8 encoded JSON.
+
+    Parameters
+    ----------
+    obj
+        The object to encode.
+
+    Returns
+    -------
+    data : bytes
+        The encoded document.
+    """
+    return _dumps(obj)
+
+
+set_backend(next(iter(_backends)))
@@ -1,10 +1,15 @@
-import copy
-import json
-import struct
-import socket
+import time
 import logging
 
+import numpy as np
+
 import pymacnet.messages
+from .messages import binary
+from .records import ChannelStatus
+from .arrays import statuses_from_bin_msgs, statuses_from_dicts, aux_from_lists
+from .session import (MacNetSession, _pack_direct_output_bin_msg, _check_direct_output_bin_reply,
+                      _direct_output_setpoints, _pack_direct_output_bin_msgs,
+                      _default_direct_output_voltage_v)
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +19,7 @@ class CyclerInterface():
     Class for interfacing with Maccor Cycler using MacNet.
     """
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, session: MacNetSession = None):
         """
         Creates a CyclerInterface class instance.
 
@@ -27,14 +32,30 @@ class CyclerInterface():
             - `bin_msg_port` - The port to communicate through with binary messages. Default set to 57560.
             - `msg_buffer_size_bytes` - How big of a message buffer to use for sending/receiving messages.
                 A minimum of 1024 bytes is recommended.
-        """
-        self.__config = config
-        self.__msg_buffer_size_bytes = config['msg_buffer_size_bytes']
 
-        assert (self.__create_connection(
-            ip=config['server_ip'], json_msg_port=config['json_msg_port'], bin_msg_port=config['bin_msg_port']))
+            Optionally the following keys may be included:
+            - `max_outstanding_requests` - How many JSON requests may be in flight on the JSON socket at once.
+                Defaults to 1, i.e. every request waits for its reply before the next is sent. Larger values
+                pipeline requests and replies are matched back to their request by the JSON-RPC `id`.
+            - `use_binary_reads` - If True, channel statuses and aux readings are read with binary messages
+                on the binary message port instead of JSON messages. Binary replies are much smaller and
+                faster to decode, but readings are single precision. Defaults to False.
+            - `metrics_window` - How many of the most recent requests of each message type the latency
+                percentiles of the session metrics are computed over. Defaults to 1024.
+        session : MacNetSession
+            An existing session to communicate through. If not given a new session is created and
+            connected using `config`.
+        """
+        if session is None:
+            session = MacNetSession(config)
+            assert (session.connect())
+        self.__session = session
+        self.__use_binary_reads = config.get('use_binary_reads', False)
 
-        self.__num_channels = self.read_general_info()['TestChannels']
+        general_info = self.__session.get_general_info()
+        assert (general_info)
+        self.__num_channels = general_info['TestChannels']
+        self.__num_aux_channels = general_info.get('AuxChannels', 0)
 
     def get_num_channels(self) -> int:
         '''
@@ -51,14 +72,9 @@ class CyclerInterface():
         system_info : dict
             The system information for the cycler.
         """
-        msg_outgoing_dict = copy.deepcopy(pymacnet.messages.tx_system_info_msg)
-
-        rx_msg = self._send_receive_json_msg(msg_outgoing_dict)
-        if rx_msg:
-            return rx_msg['result']
-        else:
-            logger.error("Failed to read system info!")
-            return None
+        rx_msg = self._send_receive_encoded_msg(
+            pymacnet.messages.tx_system_info_encoder)
+        return _reply_result(rx_msg, 'system info')
 
     def read_general_info(self) -> dict:
         """
@@ -69,46 +85,30 @@ class CyclerInterface():
         general_info : dict
             The general information for the cycler.
         """
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_general_info_msg)
-
-        rx_msg = self._send_receive_json_msg(msg_outgoing_dict)
-        if rx_msg:
-            return rx_msg['result']
-        else:
-            logger.error("Failed to read system info!")
-            return None
+        rx_msg = self._send_receive_encoded_msg(
+            pymacnet.messages.tx_general_info_encoder)
+        return _reply_result(rx_msg, 'general info')
 
-    def read_channel_status(self, channel: int) -> dict:
+    def read_channel_status(self, channel: int) -> ChannelStatus:
         """
         Reads channel status for the specified `channel`.
 
         Returns
         -------
-        status : dict
-            A dictionary detailing the status of the channel. Returns None if there is an issue.
+        status : ChannelStatus
+            The status of the channel. Can also be used as a dictionary. Returns None if there is an issue.
         """
-        status = {}
-
-        if not (channel > 0) and not (channel < self.__num_channels):
-            logger.warning("Invalid channel number!")
+        if not _check_channels([channel], self.__num_channels):
             return None
 
-        try:
-            msg_outgoing_dict = copy.deepcopy(
-                pymacnet.messages.tx_read_status_msg)
-            msg_outgoing_dict['params']['Chan'] = channel
-            status = self._send_receive_json_msg(msg_outgoing_dict)
-        except Exception as e:
-            logger.error(
-                f'Error reading channel status for channel {channel}', exc_info=True)
-            logger.error(e)
+        if self.__use_binary_reads:
+            reply = self._send_receive_bin_msg(binary.pack_read_status(channel - 1))
+            return _status_from_bin_reply(reply, channel)
 
-        if status and 'result' in status:
-            return status['result']
-        else:
-            logger.error("Failed to read channel status")
-            return None
+        reply = self._send_receive_encoded_msg(
+            pymacnet.messages.tx_read_status_encoder, {'Chan': channel})
+        result = _reply_result(reply, 'channel status')
+        return ChannelStatus.from_dict(result) if result is not None else None
 
     def read_all_channel_statuses(self) -> list:
         """
@@ -119,18 +119,244 @@ class CyclerInterface():
         statuses : list
             A list of channel statues where the index corresponds to the channel number (zero indexed.)
         """
-        msg_outgoing_dict = copy.deepcopy(
-            pymacnet.messages.tx_channel_status_multiple_channels)
+        return self.read_multiple_channel_statuses(1, self.__num_channels)
+
+    def read_multiple_channel_statuses(self, first_channel: int, num_channels: int) -> list:
+        """
+        Reads the channel status (RF1, RF2 and Stat) of `num_channels` consecutive channels starting
+        from `first_channel`.  MacNet message (4,1)
+
+        MacNet limits a single message to 128 channels, so larger ranges are split into several
+        messages which are pipelined rather than sent one after another.
+
+        Parameters
+        ----------
+        first_channel : int
+            The first channel to read.
+        num_channels : int
+            The number of channels to read.
+
+        Returns
+        -------
+        statuses : list
+            A list of channel statuses where index `i` corresponds to channel `first_channel + i`.
+            Returns None if there is an issue.
+        """
+        if not (0 < first_channel and 0 <= num_channels and
+                first_channel + num_channels - 1 <= self.__num_channels):
+            logger.warning("Invalid channel range!")
+            return None
+
+        chunks = _status_msg_chunks(first_channel, num_channels)
+        if self.__use_binary_reads:
+            replies = self._send_receive_bin_msgs(
+                [binary.pack_read_statuses(chan - 1, length) for chan, length in chunks])
+        else:
+            replies = self._send_receive_encoded_msgs(
+                [(pymacnet.messages.tx_channel_status_multiple_channels_encoder, {'Chan': chan, 'Len': length})
+                 for chan, length in chunks])
+
+        return _merge_status_msg_chunks(chunks, replies, self.__use_binary_reads)
+
+    def read_channel_statuses(self, channels: list) -> np.ndarray:
+        """
+        Reads the full channel status (MacNet message (4,7)) of several channels at once. The
+        requests are pipelined and the replies are collected into columns rather than one
+        dictionary per channel.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to read.
 
-        msg_outgoing_dict['params']['Len'] = self.__num_channels
+        Returns
+        -------
+        statuses : np.ndarray
+            A structured array with one row per channel, in the order of `channels`, and one field
+            per status value, see `pymacnet.arrays.status_dtype`. E.g. `statuses['Voltage']` is
+            the voltage of every channel. The row of a channel that could not be read has NaN
+            values, see `pymacnet.arrays.status_dtype`. Returns None if there is an issue.
+        """
+        channels = list(channels)
+        if not _check_channels(channels, self.__num_channels):
+            return None
 
-        rx_msg = self._send_receive_json_msg(msg_outgoing_dict)
-        if rx_msg:
-            return rx_msg['result']['Status']
+        if self.__use_binary_reads:
+            replies = self._send_receive_bin_msgs(_read_status_bin_msgs(channels))
         else:
-            logger.error("Failed to read channel status")
+            replies = self._send_receive_encoded_msgs(_read_status_msgs(channels))
+        return _statuses_from_replies(replies, channels, self.__use_binary_reads)
+
+    def read_aux_all(self, channels: list = None) -> np.ndarray:
+        """
+        Reads the auxiliary readings (MacNet message (4,4)) of several channels at once. The
+        requests are pipelined and the readings are collected into one array.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to read. Defaults to every channel of the cycler.
+
+        Returns
+        -------
+        aux : np.ndarray
+            A channels × auxiliary channels array with one row per channel, in the order of
+            `channels`, and at least `AuxChannels` (see `read_general_info`) columns. Readings a
+            channel does not have, or of channels that could not be read, are NaN. Returns None if
+            there is an issue.
+        """
+        if channels is None:
+            channels = range(1, self.__num_channels + 1)
+        channels = list(channels)
+        if not _check_channels(channels, self.__num_channels):
             return None
 
+        if self.__use_binary_reads:
+            replies = self._send_receive_bin_msgs(_read_aux_bin_msgs(channels))
+        else:
+            replies = self._send_receive_encoded_msgs(_read_aux_msgs(channels))
+        return _aux_from_replies(replies, channels, self.__use_binary_reads, self.__num_aux_channels)
+
+    def stream_status(self, channels: list, interval_s: float, num_sweeps: int = None, on_overrun=None):
+        """
+        Streams the status of `channels`, reading every channel once per `interval_s`. Sweeps are
+        scheduled on the monotonic clock, so the time spent reading does not add up into drift.
+        A sweep that takes longer than `interval_s` is reported as an overrun and the sweeps it
+        ran into are skipped rather than run back to back to catch up.
+
+        Statuses are produced one channel at a time, in the order of `channels`. The next read is not sent until the consumer
+        asks for the next status, so a slow consumer slows the stream down instead of statuses
+        piling up in memory.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to read.
+        interval_s : float
+            The time between the starts of consecutive sweeps, in seconds.
+        num_sweeps : int
+            How many sweeps to run. If not given the stream runs until the consumer stops.
+        on_overrun : callable
+            Called with the sweep number and the duration of the sweep, in seconds, when a sweep
+            overruns `interval_s`. Overruns are logged either way.
+
+        Yields
+        ------
+        status : ChannelStatus
+            The status of a channel. Channels that fail to be read are skipped.
+
+        Raises
+        ------
+        ValueError
+            If `interval_s` is not positive.
+        """
+        channels = list(channels)
+        schedule = _SweepSchedule(interval_s, on_overrun)
+        while num_sweeps is None or schedule.sweep < num_sweeps:
+            for channel in channels:
+                # Not self.read_channel_status, which a ChannelInterface overrides without a channel.
+                status = CyclerInterface.read_channel_status(self, channel)
+                if status is not None:
+                    yield status
+            delay_s = schedule.finish_sweep()
+            if num_sweeps is None or schedule.sweep < num_sweeps:
+                time.sleep(delay_s)
+
+    def set_direct_mode_outputs(self, channels: list, currents_a, voltages_v=_default_direct_output_voltage_v, *,
+                                v_min_v) -> tuple:
+        """
+        Sets the current/voltage output of several channels at once, e.g. for synchronized step
+        changes across parallel strings. The tests must have been started with direct control.
+        Modes and current ranges are worked out as for `ChannelInterface.set_direct_mode_output`
+        and every setpoint is sent as a binary message in one pipelined batch, so the channels
+        change output within a few milliseconds of each other.
+
+        Parameters
+        ----------
+        channels : list
+            The channels to set.
+        currents_a : array-like
+            The current of each channel. Positive charges, negative discharges and zero rests.
+        voltages_v : array-like or float
+            The voltage limit to charge to, per channel or for all channels. Defaults to the
+            `ChannelInterface.set_direct_mode_output` default.
+        v_min_v : array-like or float
+            The voltage limit to discharge to, per channel or for all channels. Keyword only.
+
+        Returns
+        -------
+        acknowledged : np.ndarray
+            Whether each channel accepted its setpoint. Returns None if the setpoints are invalid.
+        skew_s : float
+            The time between the first and last acknowledgement, in seconds. NaN if fewer than
+            two were received.
+        """
+        channels = np.asarray(channels, dtype=np.intp)
+        if not _check_channels(channels, self.__num_channels):
+            return None, np.nan
+        try:
+            setpoints = _direct_output_setpoints(currents_a, voltages_v, v_min_v)
+            msgs = _pack_direct_output_bin_msgs(channels, *setpoints)
+        except ValueError as e:
+            logger.error(f"Undefined state in set direct control outputs! {e}")
+            return None, np.nan
+
+        receive_times = []
+        replies = self._send_receive_bin_msgs(msgs, receive_times)
+        return _check_direct_output_bin_replies(msgs, replies, receive_times)
+
+    def channel(self, channel: int, config: dict = None):
+        """
+        Creates a `ChannelInterface` for one of the cycler's channels that shares this instance's
+        connection and cycler metadata. No sockets are opened and no messages are sent, so
+        creating handles for every channel on a rack takes constant time.
+
+        Parameters
+        ----------
+        channel : int
+            The channel to be targeted by the handle.
+        config : dict
+            The channel specific keys of the `ChannelInterface` configuration (test name, safety
+            limits etc.) The connection keys are taken from this instance's configuration.
+
+        Returns
+        -------
+        channel_interface : ChannelInterface
+            A channel handle bound to this instance's session.
+        """
+        from .channel_interface import ChannelInterface
+
+        channel_config = dict(self.__session.get_config())
+        channel_config.update(config or {})
+        channel_config['channel'] = channel
+
+        return ChannelInterface(channel_config, session=self.__session)
+
+    def get_session(self):
+        '''
+        Returns the MacNetSession the instance communicates through.
+        '''
+        return self.__session
+
+    def add_request_hooks(self, hooks):
+        '''
+        Registers `RequestHooks` to be called on the lifecycle of every request sent through the
+        MacNetSession, e.g. for profiling or tracing. This affects every interface sharing the session.
+        '''
+        self.__session.add_request_hooks(hooks)
+
+    def remove_request_hooks(self, hooks):
+        '''
+        Unregisters hooks added with `add_request_hooks`.
+        '''
+        self.__session.remove_request_hooks(hooks)
+
+    def close(self):
+        """
+        Closes the connection with the Maccor server. This affects every interface sharing the session.
+        """
+        self.__session.close()
+
     def _send_receive_json_msg(self, outgoing_msg_dict) -> dict:
         """
         Sends and receives a JSON message to/from the Maccor server.
@@ -145,176 +371,386 @@ class CyclerInterface():
         msg_incoming_dict : dict
             A dictionary containing the message response. Returns None if there is an issue.
         """
+        return self.__session.send_receive_json_msg(outgoing_msg_dict)
 
-        if self.__json_msg_socket:
-            pass
-        else:
-            logger.error(
-                "__json_msg_socket connection does not exist!", exc_info=True)
-            return None
+    def _send_receive_json_msgs(self, outgoing_msg_dicts: list) -> list:
+        """
+        Sends several JSON messages to the Maccor server and collects their replies. Up to
+        `max_outstanding_requests` messages are kept in flight at once and each reply is
+        routed back to its request using the JSON-RPC `id`. Safe to call from several threads.
 
-        # Take care of channel zero indexing on outgoing messages
-        if 'params' in outgoing_msg_dict and 'Chan' in outgoing_msg_dict['params']:
-            outgoing_msg_dict['params']['Chan'] -= 1
+        Parameters
+        ----------
+        outgoing_msg_dicts : list
+            A list of dictionaries containing the messages to be sent.
 
-        try:
-            msg_outgoing_packed = json.dumps(outgoing_msg_dict, indent=4)
-            msg_outgoing_packed = msg_outgoing_packed.encode()
-        except Exception as e:
-            logger.error("Error packing outgoing message!", exc_info=True)
-            logger.error(e)
-            return None
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msg_dicts`. An entry is None
+            if there was an issue with that message.
+        """
+        return self.__session.send_receive_json_msgs(outgoing_msg_dicts)
 
-        try:
-            self.__json_msg_socket.send(msg_outgoing_packed)
-        except Exception as e:
-            logger.error("Error sending message!", exc_info=True)
-            logger.error(e)
-            self.__reconnect()
-            return None
+    def _send_receive_encoded_msg(self, encoder, params: dict = None) -> dict:
+        """
+        Sends a message using a compiled encoder from `pymacnet.messages` and receives the reply.
 
-        try:
-            msg_incoming_packed = b''
-            while msg_incoming_packed[-2:] != b'\r\n':
-                msg_incoming_packed += self.__json_msg_socket.recv(
-                    self.__msg_buffer_size_bytes)
-        except socket.timeout:
-            logger.error(
-                "Timeout on receiving message from Maccor server!", exc_info=True)
-            self.__reconnect()
-            return False
-        except Exception as e:
-            logger.error("Error receiving message!", exc_info=True)
-            self.__reconnect()
-            logger.error(e)
-            return None
+        Parameters
+        ----------
+        encoder : pymacnet.messages.MessageEncoder
+            The compiled message to send.
+        params : dict
+            Values for the variable fields of the message, e.g. `{'Chan': 1}`.
 
-        try:
-            msg_incoming_dict = json.loads(msg_incoming_packed.decode('utf-8'))
-        except Exception as e:
-            logger.error("Error unpacking incoming message!", exc_info=True)
-            logger.error("Message: " + str(msg_incoming_packed))
-            logger.error(e)
-            return None
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return self.__session.send_receive_encoded_msg(encoder, params)
 
-        # Take care of channel zero indexing on incoming messages
-        if 'result' in msg_incoming_dict and 'Chan' in msg_incoming_dict['result']:
-            msg_incoming_dict['result']['Chan'] += 1
+    def _send_receive_encoded_msgs(self, outgoing_msgs: list) -> list:
+        """
+        Sends several messages using compiled encoders and collects their replies.
 
-        return msg_incoming_dict
+        Parameters
+        ----------
+        outgoing_msgs : list
+            A list of `(encoder, params)` pairs.
 
-    def _send_direct_output_rest_bin_msg(self, direct_out_msg_dict: dict) -> bool:
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msgs`. An entry is None if
+            there was an issue with that message.
+        """
+        return self.__session.send_receive_encoded_msgs(outgoing_msgs)
+
+    def _send_receive_bin_msg(self, msg_outgoing_bytes: bytes) -> bytes:
         """
-        Sends a direct output binary message to set the channel to rest.
-        Note this is necessary because there is a bug where direct output
-        JSON messages cannot set rest.
+        Sends a binary message to the Maccor server and receives the response.
 
         Parameters
         ----------
-        direct_out_msg_dict : dict
-            A direct output message dictionary
+        msg_outgoing_bytes : bytes
+            The packed binary message, see `pymacnet.messages.binary`.
 
         Returns
         -------
-        success : bool
-            True of False based on whether or not rest was set.
-        """
-
-        # Take care of channel zero indexing
-        direct_out_msg_dict["params"]['Chan'] += 1
-
-        msg_outgoing_bytes = struct.pack('<HHHHffffBB',
-                                         direct_out_msg_dict["params"]['FClass'],
-                                         direct_out_msg_dict["params"]['FNum'],
-                                         direct_out_msg_dict["params"]['Chan'],
-                                         18,
-                                         direct_out_msg_dict["params"]['Current'],
-                                         direct_out_msg_dict["params"]['Voltage'],
-                                         direct_out_msg_dict["params"]['Power'],
-                                         direct_out_msg_dict["params"]['Resistance'],
-                                         direct_out_msg_dict["params"]['CurrentRange'],
-                                         ord('R'))
-        try:
-            self.__bin_msg_socket.send(msg_outgoing_bytes)
-        except Exception as e:
-            logger.error("Error sending binary rest message!", exc_info=True)
-            logger.error(e)
-            return False
-        try:
-            response = self.__bin_msg_socket.recv(self.__msg_buffer_size_bytes)
-        except socket.timeout:
-            logger.error(
-                "Timeout on receiving message from Maccor server!", exc_info=True)
-            return False
-        except Exception as e:
-            logger.error(
-                "Error receiving rest message response!", exc_info=True)
-            logger.error(e)
-            return False
-        if response:
-            # TODO: Should check something related to the response.
-            return True
-        else:
-            logger.error("No response for setting rest!")
-            return False
+        response : bytes
+            The complete response message. Returns None if there is an issue.
+        """
+        return self.__session.send_receive_bin_msg(msg_outgoing_bytes)
 
-    def __create_connection(self, ip: str, json_msg_port: int, bin_msg_port: int) -> bool:
+    def _send_receive_bin_msgs(self, msgs_outgoing_bytes: list, receive_times: list = None) -> list:
         """
-        Creates a connection with Maccor server to send/receive JSON and binary messages.
+        Sends several binary messages to the Maccor server back to back and receives their responses.
 
         Parameters
         ----------
-        ip : str
-            The IP address of the Maccor server.
-        json_msg_port : int
-            The TCP port use for JSON message communication.
-        bin_msg_port :
-            The TCP port used for binary message communication
+        msgs_outgoing_bytes : list
+            The packed binary messages, see `pymacnet.messages.binary`.
+        receive_times : list
+            If given, the `time.monotonic()` at which each response was received is appended.
 
         Returns
+        -------
+        responses : list
+            The complete response messages in the same order as `msgs_outgoing_bytes`. An entry
+            is None if there was an issue with that message.
+        """
+        return self.__session.send_receive_bin_msgs(msgs_outgoing_bytes, receive_times)
+
+    def _send_direct_output_bin_msg(self, channel: int, current_a: float, voltage_v: float,
+                                    mode: str, current_range: int) -> bool:
+        """
+        Sets the direct mode output of a channel with a binary (6,8) message and checks that the
+        reply echoes the message and reports success.
+
+        Parameters
         ----------
+        channel : int
+            The channel to set the output of.
+        current_a : float
+            The current magnitude.
+        voltage_v : float
+            The voltage limit.
+        mode : str
+            'C' for charge, 'D' for discharge or 'R' for rest.
+        current_range : int
+            The current range, 1 to 4.
+
+        Returns
+        -------
         success : bool
-            True or False based on whether the connection was created successfully
+            True of False based on whether or not the output was set.
         """
+        msg_outgoing_bytes = _pack_direct_output_bin_msg(
+            channel, current_a, voltage_v, mode, current_range)
+        response = self._send_receive_bin_msg(msg_outgoing_bytes)
+        return _check_direct_output_bin_reply(msg_outgoing_bytes, response)
+
+
+def _status_msg_chunks(first_channel: int, num_channels: int) -> list:
+    """
+    Splits a range of channels into ranges that fit in one (4,1) channel status message.
+
+    Parameters
+    ----------
+    first_channel : int
+        The first channel of the range.
+    num_channels : int
+        The number of channels in the range.
+
+    Returns
+    -------
+    chunks : list
+        The `(first_channel, num_channels)` of each message.
+    """
+    max_channels = binary.max_channels_per_status_msg
+    return [(chan, min(max_channels, first_channel + num_channels - chan))
+            for chan in range(first_channel, first_channel + num_channels, max_channels)]
+
+
+def _merge_status_msg_chunks(chunks: list, replies: list, binary_replies: bool) -> list:
+    """
+    Merges the replies to (4,1) channel status messages into one list of statuses.
+
+    Parameters
+    ----------
+    chunks : list
+        The `(first_channel, num_channels)` of each message, see `_status_msg_chunks`.
+    replies : list
+        The reply to each message. None if there was an issue with the message.
+    binary_replies : bool
+        True if the replies are binary messages rather than JSON message dictionaries.
+
+    Returns
+    -------
+    statuses : list
+        The statuses of all channels in the chunks. None if any reply is missing or incomplete.
+    """
+    statuses = []
+    for (chan, length), reply in zip(chunks, replies):
         try:
-            logger.info(f'Creating connection to {ip}:{json_msg_port}')
-            self.__json_msg_socket = socket.socket(
-                socket.AF_INET, socket.SOCK_STREAM)
-            self.__json_msg_socket.setsockopt(
-                socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.__json_msg_socket.settimeout(2)
-            self.__json_msg_socket.connect(
-                (ip, json_msg_port)
-            )
-        except Exception as e:
-            logger.error(
-                "Failed to create JSON message socket!", exc_info=True)
-            logger.error(e)
-            return False
-        try:
-            logger.info(f'Creating connection to {ip}:{bin_msg_port}')
-            self.__bin_msg_socket = socket.socket(
-                socket.AF_INET, socket.SOCK_STREAM)
-            self.__bin_msg_socket.setsockopt(
-                socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.__bin_msg_socket.settimeout(2)
-            self.__bin_msg_socket.connect(
-                (ip, bin_msg_port)
-            )
+            if binary_replies:
+                chunk_statuses = binary.unpack_read_statuses(reply)
+            else:
+                chunk_statuses = reply['result']['Status']
+            assert (len(chunk_statuses) == length)
         except Exception as e:
             logger.error(
-                "Failed to create binary message socket!", exc_info=True)
+                f"Failed to read channel status of channels {chan} to {chan + length - 1}", exc_info=True)
             logger.error(e)
-            return False
+            return None
+        statuses.extend(chunk_statuses)
 
-        return True
+    return statuses
+
+
+class _SweepSchedule():
+    """
+    Drift free schedule of periodic sweeps on the monotonic clock. Sweep `n` is due at
+    `start + n * interval_s`, however long the previous sweeps took.
+    """
 
-    def __reconnect(self):
+    def __init__(self, interval_s: float, on_overrun=None):
+        if not interval_s > 0:
+            raise ValueError(f"Sweep interval must be positive, got {interval_s} s")
+        self.interval_s = interval_s
+        self.sweep = 0
+        self.__on_overrun = on_overrun
+        self.__start = time.monotonic()
+        self.__sweep_start = self.__start
+        self.__tick = 0
+
+    def finish_sweep(self) -> float:
         """
-        Reconnects to the Maccor server.
+        Marks the current sweep as finished and returns how long to wait, in seconds, before
+        starting the next one. Reports an overrun if the sweep took longer than the interval.
         """
-        logger.warning("Reconnecting to Maccor server...")
-        self.__json_msg_socket.close()
-        self.__bin_msg_socket.close()
-        self.__create_connection(
-            ip=self.__config['server_ip'], json_msg_port=self.__config['json_msg_port'], bin_msg_port=self.__config['bin_msg_port'])
+        now = time.monotonic()
+        self.sweep += 1
+        self.__tick += 1
+        due = self.__start + self.__tick * self.interval_s
+        if now > due:
+            duration_s = now - self.__sweep_start
+            missed = int((now - due) // self.interval_s) + 1
+            logger.warning(
+                f"Sweep {self.sweep} took {duration_s:.3f} s, overrunning the {self.interval_s} s interval. "
+                f"Skipping {missed} sweep(s)")
+            if self.__on_overrun:
+                self.__on_overrun(self.sweep, duration_s)
+            self.__tick += missed
+            due = self.__start + self.__tick * self.interval_s
+        self.__sweep_start = due
+        return due - now
+
+
+def _check_channels(channels, num_channels: int) -> bool:
+    """
+    Checks that every channel of `channels` is one of the cycler's `num_channels` channels,
+    which are numbered from 1. Logs a warning if not.
+    """
+    if not all(0 < channel <= num_channels for channel in channels):
+        logger.warning("Invalid channel number!")
+        return False
+    return True
+
+
+def _reply_result(reply: dict, name: str) -> dict:
+    """
+    Returns the result of a reply to a read message. Logs an error and returns None if no reply
+    with a result was received. `name` is what was read, for logging.
+    """
+    if reply and 'result' in reply:
+        return reply['result']
+    logger.error(f"Failed to read {name}!")
+    return None
+
+
+def _status_from_bin_reply(reply: bytes, channel: int) -> ChannelStatus:
+    """
+    Unpacks the reply to a binary (4,7) read status message of `channel`. Returns None if there
+    is an issue.
+    """
+    try:
+        status = binary.unpack_read_status(reply)
+    except Exception as e:
+        logger.error(
+            f'Error reading channel status for channel {channel}', exc_info=True)
+        logger.error(e)
+        return None
+
+    # Take care of channel zero indexing
+    status.Chan += 1
+    return status
+
+
+def _read_status_bin_msgs(channels: list) -> list:
+    """
+    Packs a binary (4,7) read status message for each channel of `channels`.
+    """
+    return [binary.pack_read_status(channel - 1) for channel in channels]
+
+
+def _read_status_msgs(channels: list) -> list:
+    """
+    Returns the `(encoder, params)` of a JSON (4,7) read status message for each channel of `channels`.
+    """
+    return [(pymacnet.messages.tx_read_status_encoder, {'Chan': channel}) for channel in channels]
+
+
+def _statuses_from_replies(replies: list, channels: list, binary_replies: bool) -> np.ndarray:
+    """
+    Collects the replies to (4,7) read status messages into a structured array, see
+    `CyclerInterface.read_channel_statuses`.
+
+    Parameters
+    ----------
+    replies : list
+        The reply to the message of each channel. None if there was an issue with the message.
+    channels : list
+        The channel each message read.
+    binary_replies : bool
+        True if the replies are binary messages rather than JSON message dictionaries.
+
+    Returns
+    -------
+    statuses : np.ndarray
+        One row per channel. Returns None if there is an issue.
+    """
+    try:
+        if binary_replies:
+            statuses = statuses_from_bin_msgs(replies, channels)
+        else:
+            statuses = statuses_from_dicts(
+                [reply.get('result') if reply else None for reply in replies], channels)
+    except Exception as e:
+        logger.error("Failed to read channel statuses", exc_info=True)
+        logger.error(e)
+        return None
+
+    missing = [channel for channel, voltage in zip(channels, statuses['Voltage']) if np.isnan(voltage)]
+    if missing:
+        logger.warning(f"Failed to read channel status of channels {missing}")
+    return statuses
+
+
+def _read_aux_bin_msgs(channels: list) -> list:
+    """
+    Packs a binary (4,4) read aux message for each channel of `channels`.
+    """
+    return [binary.pack_read_aux(channel - 1) for channel in channels]
+
+
+def _read_aux_msgs(channels: list) -> list:
+    """
+    Returns the `(encoder, params)` of a JSON (4,4) read aux message for each channel of `channels`.
+    """
+    return [(pymacnet.messages.tx_read_aux_encoder, {'Chan': channel}) for channel in channels]
+
+
+def _aux_values_from_reply(reply, binary_reply: bool) -> list:
+    """
+    Returns the readings of a reply to a (4,4) read aux message. None if there was no reply or
+    it holds no readings.
+    """
+    if not reply:
+        return None
+    if binary_reply:
+        return binary.unpack_readings(reply)
+    return reply.get('result', {}).get('AuxValues')
+
+
+def _aux_from_replies(replies: list, channels: list, binary_replies: bool, num_aux_channels: int) -> np.ndarray:
+    """
+    Collects the replies to (4,4) read aux messages into one array, see `CyclerInterface.read_aux_all`.
+
+    Parameters
+    ----------
+    replies : list
+        The reply to the message of each channel. None if there was an issue with the message.
+    channels : list
+        The channel each message read.
+    binary_replies : bool
+        True if the replies are binary messages rather than JSON message dictionaries.
+    num_aux_channels : int
+        The number of auxiliary channels of the cycler.
+
+    Returns
+    -------
+    aux : np.ndarray
+        One row per channel. Returns None if there is an issue.
+    """
+    try:
+        readings = [_aux_values_from_reply(reply, binary_replies) for reply in replies]
+    except Exception as e:
+        logger.error("Failed to read channel aux values", exc_info=True)
+        logger.error(e)
+        return None
+
+    missing = [channel for channel, values in zip(channels, readings) if values is None]
+    if missing:
+        logger.warning(f"Failed to read aux values of channels {missing}")
+    return aux_from_lists(readings, num_aux_channels)
+
+
+def _check_direct_output_bin_replies(msgs: list, replies: list, receive_times: list) -> tuple:
+    """
+    Checks the replies to a batch of binary (6,8) set direct output messages, see
+    `CyclerInterface.set_direct_mode_outputs`.
+
+    Returns
+    -------
+    acknowledged : np.ndarray
+        Whether each channel accepted its setpoint.
+    skew_s : float
+        The time between the first and last acknowledgement, in seconds. NaN if fewer than two
+        were received.
+    """
+    acknowledged = np.array([_check_direct_output_bin_reply(msg, reply)
+                             for msg, reply in zip(msgs, replies)], dtype=bool)
+    skew_s = receive_times[-1] - receive_times[0] if len(receive_times) > 1 else np.nan
+    return acknowledged, skew_s
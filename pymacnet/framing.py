@@ -0,0 +1,129 @@
+import socket
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FrameDecoder():
+    """
+    Splits a stream of bytes received from a socket into terminator delimited frames. Data is
+    received straight into a preallocated buffer, the terminator is searched for only in newly
+    received bytes, and any bytes following a frame are kept for the next one.
+    """
+
+    def __init__(self, buffer_size_bytes: int, terminator: bytes = b'\r\n'):
+        """
+        Creates a FrameDecoder class instance.
+
+        Parameters
+        ----------
+        buffer_size_bytes : int
+            The initial size of the receive buffer. The buffer grows if a single frame does not fit.
+        terminator : bytes
+            The byte sequence marking the end of each frame.
+        """
+        self.__terminator = terminator
+        self.__buffer = bytearray(max(buffer_size_bytes, 2 * len(terminator)))
+        self.__view = memoryview(self.__buffer)
+        self.reset()
+
+    def reset(self):
+        """
+        Discards any buffered bytes, e.g. after reconnecting.
+        """
+        # Unconsumed data lives in __buffer[__start:__end].
+        self.__start = 0
+        self.__end = 0
+        # Where to resume looking for the terminator.
+        self.__search_from = 0
+
+    def recv_frame(self, sock: socket.socket) -> memoryview:
+        """
+        Receives the next frame from `sock`, reading from the socket only if no complete frame is
+        already buffered.
+
+        Parameters
+        ----------
+        sock : socket.socket
+            The socket to receive from.
+
+        Returns
+        -------
+        frame : memoryview
+            The frame without its terminator. It is a view into the receive buffer and is only
+            valid until the next call, so it must be decoded or copied before then.
+
+        Raises
+        ------
+        ConnectionError
+            If the connection is closed before a complete frame is received.
+        """
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+
+            if self.__end == len(self.__buffer):
+                self.__make_room()
+            num_bytes = sock.recv_into(self.__view[self.__end:])
+            if not num_bytes:
+                raise ConnectionError("Connection closed by Maccor server!")
+            self.__end += num_bytes
+
+    def feed(self, data: bytes):
+        """
+        Adds received bytes to the buffer. Complete frames can then be taken with `next_frame()`.
+
+        Parameters
+        ----------
+        data : bytes
+            The received bytes.
+        """
+        while len(self.__buffer) - self.__end < len(data):
+            self.__make_room()
+        self.__view[self.__end:self.__end + len(data)] = data
+        self.__end += len(data)
+
+    def next_frame(self) -> memoryview:
+        """
+        Takes the next complete frame out of the buffer without receiving anything.
+
+        Returns
+        -------
+        frame : memoryview
+            The frame without its terminator, valid until the buffer is next modified. None if
+            no complete frame is buffered.
+        """
+        idx = self.__buffer.find(
+            self.__terminator, self.__search_from, self.__end)
+        if idx < 0:
+            # The terminator may straddle the end of what has been received so far.
+            self.__search_from = max(
+                self.__start, self.__end - len(self.__terminator) + 1)
+            return None
+
+        frame = self.__view[self.__start:idx]
+        self.__start = idx + len(self.__terminator)
+        self.__search_from = self.__start
+        if self.__start == self.__end:
+            self.reset()
+        return frame
+
+    def __make_room(self):
+        """
+        Makes room at the end of the buffer by moving unconsumed bytes to the front, or by
+        doubling the buffer if it is already full of unconsumed bytes.
+        """
+        num_unconsumed = self.__end - self.__start
+        if self.__start > 0:
+            self.__view[0:num_unconsumed] = self.__view[self.__start:self.__end]
+        else:
+            logger.debug(
+                f"Growing receive buffer to {2 * len(self.__buffer)} bytes")
+            buffer = bytearray(2 * len(self.__buffer))
+            buffer[0:num_unconsumed] = self.__view[0:num_unconsumed]
+            self.__buffer = buffer
+            self.__view = memoryview(self.__buffer)
+        self.__search_from -= self.__start
+        self.__start = 0
+        self.__end = num_unconsumed
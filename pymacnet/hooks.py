@@ -0,0 +1,129 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RequestInfo():
+    """
+    A MacNet request as seen by `RequestHooks`. The times are `time.monotonic()` values and are
+    None until the request reached that step, so e.g. `received_at - sent_at` is the time spent
+    waiting on the Maccor server and `decoded_at - received_at` the time spent decoding the reply.
+    """
+    __slots__ = ('transport', 'fclass', 'fnum', 'msg_id', 'encode_at', 'sent_at', 'received_at',
+                 'decoded_at', 'error', 'context')
+
+    def __init__(self, transport: str, msg_type: tuple, msg_id: int = None):
+        """
+        Creates a RequestInfo class instance.
+
+        Parameters
+        ----------
+        transport : str
+            `json` or `binary`.
+        msg_type : tuple
+            The `(FClass, FNum)` of the request.
+        msg_id : int
+            The JSON-RPC id of the request. None for binary requests.
+        """
+        self.transport = transport
+        self.fclass, self.fnum = msg_type
+        self.msg_id = msg_id
+        self.encode_at = None
+        self.sent_at = None
+        self.received_at = None
+        self.decoded_at = None
+        self.error = None
+        # Free for hooks to keep their own per request state in, e.g. a tracing span.
+        self.context = {}
+
+    def __repr__(self):
+        return (f"RequestInfo(transport={self.transport!r}, fclass={self.fclass}, fnum={self.fnum}, "
+                f"msg_id={self.msg_id}, error={self.error!r})")
+
+
+class RequestHooks():
+    """
+    Callbacks on the lifecycle of MacNet requests, for profilers, tracers or custom latency
+    accounting. Subclass it, override the methods of interest and register an instance with
+    `CyclerInterface.add_request_hooks()`. A request gets `before_encode` and, once sent,
+    `after_send`, and ends with either `first_byte_received` and `after_decode`, or `on_error`.
+
+    The hooks of a reply are called as soon as it is received, not when the whole batch of
+    pipelined requests is done. They are called while the connection is held, on the thread or
+    event loop handling it, which with `CyclerInterface` may be another thread waiting on the same
+    session, so they should be quick. JSON replies are matched to their request by the id inside
+    them, so `first_byte_received` is only called once the reply is decoded, with `received_at`
+    set to when the reply arrived. Binary messages are packed and unpacked by the caller, so for
+    them `before_encode` is called just before sending and `after_decode` gets the raw reply.
+    Exceptions raised by hooks are logged and otherwise ignored.
+    """
+
+    def before_encode(self, request: RequestInfo):
+        """
+        Called before the request is encoded.
+        """
+
+    def after_send(self, request: RequestInfo):
+        """
+        Called after the request was written to the connection.
+        """
+
+    def first_byte_received(self, request: RequestInfo):
+        """
+        Called when the reply to the request was received.
+        """
+
+    def after_decode(self, request: RequestInfo, reply):
+        """
+        Called after the reply to the request was decoded.
+
+        Parameters
+        ----------
+        request : RequestInfo
+            The request.
+        reply : dict or bytes
+            The decoded JSON reply, or the complete binary reply.
+        """
+
+    def on_error(self, request: RequestInfo):
+        """
+        Called when the request failed, i.e. was not sent or got no valid reply. The reason is in
+        `request.error`.
+        """
+
+
+def _call_hooks(hooks: list, name: str, *args):
+    """
+    Calls the method `name` of every hook, logging any exception.
+    """
+    for hook in hooks:
+        try:
+            getattr(hook, name)(*args)
+        except Exception:
+            logger.error(f"Request hook {name} failed!", exc_info=True)
+
+
+def _finish_request(hooks: list, request: RequestInfo, reply):
+    """
+    Calls the hooks for the end of a request, depending on whether it got a reply. Does nothing
+    if `request` is None, i.e. no hooks were registered when it was sent.
+    """
+    if request is None:
+        return
+    if reply:
+        _call_hooks(hooks, 'first_byte_received', request)
+        _call_hooks(hooks, 'after_decode', request, reply)
+    else:
+        if request.error is None:
+            request.error = "No reply received"
+        _call_hooks(hooks, 'on_error', request)
+
+
+def _fail_request(hooks: list, request: RequestInfo, error: str):
+    """
+    Records why a request failed and calls `on_error`. Does nothing if `request` is None.
+    """
+    if request is None:
+        return
+    request.error = error
+    _call_hooks(hooks, 'on_error', request)
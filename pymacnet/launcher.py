@@ -0,0 +1,325 @@
+import time
+import logging
+import functools
+from datetime import datetime
+
+import pymacnet.messages
+from .channel_interface import (_start_test_with_procedure_msg, _startable_status, _reset_and_safety_limits_msgs,
+                                _check_reset_reply, _check_safety_limits_reply, _check_start_reply)
+from .cycler_interface import _status_msg_chunks, _merge_status_msg_chunks
+
+logger = logging.getLogger(__name__)
+
+_required_config_keys = ('channel',
+                         'test_name',
+                         'test_procedure',
+                         'c_rate_ah',
+                         'v_max_safety_limit_v',
+                         'v_min_safety_limit_v',
+                         'i_max_safety_limit_a',
+                         'i_min_safety_limit_a',
+                         'power_safety_limit_chg_w',
+                         'power_safety_limit_dsg_w')
+
+
+class TestLauncher():
+    """
+    Starts tests with procedures on many channels of a cycler at once. Every step is pipelined
+    over the cycler's connection: the status of every channel is read, the safety limits of the
+    channels that can start a test are set, together with a reset of the completed ones, and then
+    channels that run the same test are selected and started with one "all selected" start
+    message. Channels with their own test are started individually.
+
+    Selecting a channel that is already selected deselects it, and an "all selected" start also
+    starts channels selected by someone else, so channels are only started together when no
+    channel of the cycler is selected. Otherwise, and after any failed select or start, channels
+    are started individually.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        """
+        Creates a TestLauncher class instance.
+
+        Parameters
+        ----------
+        cycler_interface : CyclerInterface
+            The interface to send through.
+        config : dict
+            An optional configuration dictionary with the following optional fields.
+            - `max_in_flight` - The most messages sent back to back before waiting for their
+                replies. Defaults to 32.
+        """
+        config = config if config else {}
+        self.__cycler_interface = cycler_interface
+        self.__max_in_flight = config.get('max_in_flight', 32)
+
+    def start_tests(self, channel_configs: list) -> dict:
+        """
+        Starts a test with a procedure on each of several channels. Note that, as with
+        `ChannelInterface.start_test_with_procedure`, a channel that is running a test will not
+        start a new one.
+
+        Parameters
+        ----------
+        channel_configs : list
+            One config per channel with the `ChannelInterface` keys `channel`, `test_name`,
+            `test_procedure`, `c_rate_ah` and the safety limits. Channels with the same test name,
+            procedure and C-rate are started together.
+
+        Returns
+        -------
+        results : dict
+            For each channel, a dict with `started`, True or False based on whether the test was
+            started, and the duration in seconds of each step the channel went through:
+            `status_s`, `reset_s` (resetting the channel and setting its safety limits, only if
+            its last test had completed) or `safety_limits_s`, `start_s` and `total_s`.
+        """
+        launch = _Launch(channel_configs, self.__cycler_interface.get_num_channels())
+        for step in launch.steps():
+            step_started = time.monotonic()
+            replies = self.__send_receive_encoded_msgs(step.msgs)
+            step.check(replies, time.monotonic() - step_started)
+        return launch.results
+
+    def __send_receive_encoded_msgs(self, outgoing_msgs: list) -> list:
+        """
+        Sends messages in pipelined batches of at most `max_in_flight`.
+        """
+        replies = []
+        for i in range(0, len(outgoing_msgs), self.__max_in_flight):
+            replies.extend(self.__cycler_interface._send_receive_encoded_msgs(
+                outgoing_msgs[i:i + self.__max_in_flight]))
+        return replies
+
+
+class AsyncTestLauncher():
+    """
+    `TestLauncher` for an `AsyncCyclerInterface`.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        """
+        Creates an AsyncTestLauncher class instance.
+
+        Parameters
+        ----------
+        cycler_interface : AsyncCyclerInterface
+            The interface to send through.
+        config : dict
+            An optional configuration dictionary. Same keys as the `TestLauncher` configuration.
+        """
+        config = config if config else {}
+        self.__cycler_interface = cycler_interface
+        self.__max_in_flight = config.get('max_in_flight', 32)
+
+    async def start_tests(self, channel_configs: list) -> dict:
+        """
+        Starts a test with a procedure on each of several channels. Same as
+        `TestLauncher.start_tests`.
+        """
+        launch = _Launch(channel_configs, self.__cycler_interface.get_num_channels())
+        for step in launch.steps():
+            step_started = time.monotonic()
+            replies = await self.__send_receive_encoded_msgs(step.msgs)
+            step.check(replies, time.monotonic() - step_started)
+        return launch.results
+
+    async def __send_receive_encoded_msgs(self, outgoing_msgs: list) -> list:
+        """
+        Sends messages in pipelined batches of at most `max_in_flight`.
+        """
+        replies = []
+        for i in range(0, len(outgoing_msgs), self.__max_in_flight):
+            replies.extend(await self.__cycler_interface._send_receive_encoded_msgs(
+                outgoing_msgs[i:i + self.__max_in_flight]))
+        return replies
+
+
+class _Step():
+    """
+    One pipelined batch of messages of a launch and the check of its replies.
+    """
+
+    def __init__(self, msgs: list, check):
+        self.msgs = msgs
+        self.check = check
+
+
+class _Launch():
+    """
+    The state of one `start_tests` call. `steps()` yields the batches of messages to send, each
+    planned from the replies to the previous ones.
+    """
+
+    def __init__(self, channel_configs: list, num_channels: int):
+        self.num_channels = num_channels
+        self.started_at = time.monotonic()
+        self.results = {}
+        self.configs = {}
+        for config in channel_configs:
+            missing_keys = [key for key in _required_config_keys if key not in config]
+            if missing_keys:
+                logger.error(f"Missing keys from launch config! Missing : {missing_keys}")
+                continue
+            channel = config['channel']
+            if not (isinstance(channel, int) and 0 < channel <= num_channels):
+                logger.error(f"Invalid channel number {channel}! Channels are numbered 1 to {num_channels}")
+                continue
+            if channel in self.configs:
+                logger.error(f"Channel {channel} is listed more than once! Only the first config is used")
+                continue
+            self.configs[channel] = config
+            self.results[channel] = {'started': False}
+        self.ready = list(self.configs)
+        self.startable = []
+        self.completed = []
+        self.individual = []
+        # Only start channels together if no channel of the cycler is already selected.
+        self.grouping = len(self.ready) > 1
+
+        # One comment for the whole launch so channels running the same test can be started together.
+        self.comment = "Started with pymacnet at " + str(datetime.timestamp(datetime.now()))
+
+    def steps(self):
+        """
+        Yields the steps of the launch.
+        """
+        if self.ready:
+            yield _Step(self.__status_msgs(), self.__check_statuses)
+        if self.startable:
+            yield _Step(self.__reset_and_safety_limits_msgs(), self.__check_reset_and_safety_limits)
+
+        # Each group is only started once its select is confirmed, and selected before the next
+        # group is, so groups never run into each other's selection.
+        for params, channels in self.__start_groups():
+            if not self.grouping:
+                self.individual.extend(channels)
+                continue
+            yield _Step([(pymacnet.messages.tx_select_channels_encoder, {'Chans': channels})],
+                        functools.partial(self.__check_select, channels))
+            if not self.grouping:
+                continue
+            yield _Step([(pymacnet.messages.tx_start_test_with_procedure_encoder,
+                          dict(params, Chan=pymacnet.messages.all_selected_chan))],
+                        functools.partial(self.__check_group_start, channels))
+        if self.individual:
+            yield _Step(self.__start_msgs(), self.__check_starts)
+
+    def __status_msgs(self) -> list:
+        msgs = [(pymacnet.messages.tx_read_status_encoder, {'Chan': channel}) for channel in self.ready]
+        if self.grouping:
+            # The status of the whole cycler, to find channels selected by someone else.
+            self.cycler_chunks = _status_msg_chunks(1, self.num_channels)
+            msgs.extend((pymacnet.messages.tx_channel_status_multiple_channels_encoder,
+                         {'Chan': chan, 'Len': length}) for chan, length in self.cycler_chunks)
+        return msgs
+
+    def __check_statuses(self, replies: list, elapsed_s: float):
+        # Only channels that can start a test get their safety limits set, so running tests keep theirs.
+        for channel, status in zip(self.ready, replies):
+            self.results[channel]['status_s'] = elapsed_s
+            status = _startable_status(status, channel)
+            if status is not None:
+                self.startable.append(channel)
+                if status == 'Completed':
+                    self.completed.append(channel)
+
+        if self.grouping:
+            statuses = _merge_status_msg_chunks(
+                self.cycler_chunks, replies[len(self.ready):], False)
+            if statuses is None:
+                logger.warning("Cannot read the status of the cycler! Starting channels individually")
+                self.grouping = False
+            else:
+                selected = [i + 1 for i, status in enumerate(statuses)
+                            if pymacnet.messages.status_dictionary.get(status['Stat']) == 'Selected']
+                if selected:
+                    logger.warning(f"Channels {selected} are already selected! Starting channels individually")
+                    self.grouping = False
+        self.ready = []
+
+    def __reset_and_safety_limits_msgs(self) -> list:
+        # A reset channel needs its safety limits set again, so they are sent after the reset.
+        msgs = []
+        for channel in self.startable:
+            msgs.extend(_reset_and_safety_limits_msgs(
+                channel, self.configs[channel], channel in self.completed))
+        return msgs
+
+    def __check_reset_and_safety_limits(self, replies: list, elapsed_s: float):
+        i = 0
+        for channel in self.startable:
+            # A completed channel has a reset reply ahead of its safety limits reply.
+            if channel in self.completed:
+                self.results[channel]['reset_s'] = elapsed_s
+                reset_ok = _check_reset_reply(replies[i], channel)
+                i += 1
+            else:
+                self.results[channel]['safety_limits_s'] = elapsed_s
+                reset_ok = True
+            safety_limits = replies[i]
+            i += 1
+            if not reset_ok:
+                continue
+            if _check_safety_limits_reply(safety_limits, self.configs[channel]):
+                self.ready.append(channel)
+            else:
+                logger.error(f"Failed to set safety limits of channel {channel}!")
+
+    def __start_params(self, channel: int) -> dict:
+        params = _start_test_with_procedure_msg(channel, self.configs[channel])['params']
+        params['Comment'] = self.comment
+        del params['FClass'], params['FNum']
+        return params
+
+    def __start_groups(self) -> list:
+        """
+        Groups the ready channels by their start message. Channels with a start message of their
+        own are started individually.
+        """
+        groups = {}
+        for channel in self.ready:
+            params = self.__start_params(channel)
+            key = tuple(sorted((name, value) for name, value in params.items() if name != 'Chan'))
+            groups.setdefault(key, (params, []))[1].append(channel)
+
+        shared = []
+        for params, channels in groups.values():
+            if len(channels) > 1:
+                shared.append((params, channels))
+            else:
+                self.individual.extend(channels)
+        return shared
+
+    def __check_select(self, channels: list, replies: list, elapsed_s: float):
+        select = replies[0]
+        for channel in channels:
+            self.results[channel]['start_s'] = elapsed_s
+        if not (select and select.get('result', {}).get('Result') == 'OK'):
+            # No start was sent to them yet. Some channels may be left selected, so stop selecting.
+            logger.warning(f"Failed to select channels {channels}! Starting channels individually")
+            self.individual.extend(channels)
+            self.grouping = False
+
+    def __check_group_start(self, channels: list, replies: list, elapsed_s: float):
+        started = _check_start_reply(replies[0], channels)
+        if not started:
+            # The channels may still be selected, so later groups can't be selected safely.
+            self.grouping = False
+        for channel in channels:
+            # Includes the time spent selecting the channels.
+            self.results[channel]['start_s'] += elapsed_s
+            self.__finish(channel, started)
+
+    def __start_msgs(self) -> list:
+        return [(pymacnet.messages.tx_start_test_with_procedure_encoder, self.__start_params(channel))
+                for channel in self.individual]
+
+    def __check_starts(self, replies: list, elapsed_s: float):
+        for channel, start in zip(self.individual, replies):
+            self.results[channel]['start_s'] = elapsed_s
+            self.__finish(channel, _check_start_reply(start, [channel]))
+
+    def __finish(self, channel: int, started: bool):
+        self.results[channel]['started'] = started
+        self.results[channel]['total_s'] = time.monotonic() - self.started_at
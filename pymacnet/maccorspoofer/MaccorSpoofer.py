@@ -3,17 +3,17 @@ import json
 import socket
 import logging
 import threading
+from datetime import datetime
 
 import pymacnet.messages
+from pymacnet import codec
+from pymacnet.messages import binary
 
 logger = logging.getLogger(__name__)
 
 
 class ChannelData:
 
-    __chan_status_list = []
-    __chan_status_lock = threading.Lock()
-
     def __init__(self, num_channels):
         """
         Container class that will hold all of the specific channel data for MaccorSpoofer.
@@ -24,6 +24,8 @@ class ChannelData:
                 Number of channels in our hypothetical Maccor cycler.
         """
         self.num_channels = num_channels
+        self.__chan_status_list = []
+        self.__chan_status_lock = threading.Lock()
 
         # Create status entries for all of the channels.
         for i in range(0, self.num_channels):
@@ -325,11 +327,15 @@ class _JsonWorker(_SocketWorker):
 
         # These must be created before calling ().__init__(s). Otherwise access can be attempted before they exist.
         self.__channel_data = channel_data
+        self.__rx_buffer = ''
+        self.__json_decoder = json.JSONDecoder()
         super().__init__(s)
 
     def _process_client_msg(self, rx_msg):
         """
-        Takes the incoming JSON client message and generates a response.
+        Takes the incoming JSON client message(s) and generates a response. Clients may pipeline
+        several requests, so the received bytes can hold several messages or only part of one.
+        Partial messages are kept until the rest arrives.
 
         Parameters
         ----------
@@ -339,10 +345,50 @@ class _JsonWorker(_SocketWorker):
         Returns
         -------
         tx_msg : PyBytesObject
-            The client response.
+            The client response. Contains one reply per complete message received.
         """
 
-        rx_msg = json.loads(rx_msg)
+        # Usually a receive holds exactly one message, which can be decoded without copying.
+        if not self.__rx_buffer:
+            try:
+                rx_msg_dict = codec.loads(rx_msg)
+            except ValueError:
+                rx_msg_dict = None
+            if isinstance(rx_msg_dict, dict):
+                return self.__build_reply(rx_msg_dict)
+
+        self.__rx_buffer += rx_msg.decode('utf-8')
+
+        tx_msg = b''
+        while True:
+            self.__rx_buffer = self.__rx_buffer.lstrip()
+            if not self.__rx_buffer:
+                break
+            try:
+                rx_msg_dict, end = self.__json_decoder.raw_decode(
+                    self.__rx_buffer)
+            except json.JSONDecodeError:
+                # Wait for the rest of the message.
+                break
+            self.__rx_buffer = self.__rx_buffer[end:]
+            tx_msg += self.__build_reply(rx_msg_dict)
+
+        return tx_msg
+
+    def __build_reply(self, rx_msg):
+        """
+        Generates the response to a single JSON client message.
+
+        Parameters
+        ----------
+        rx_msg : dict
+            The client message received.
+
+        Returns
+        -------
+        tx_msg : PyBytesObject
+            The client response.
+        """
 
         if (pymacnet.messages.tx_read_status_msg['params']['FClass'] == rx_msg['params']['FClass'] and
                 pymacnet.messages.tx_read_status_msg['params']['FNum'] == rx_msg['params']['FNum']):
@@ -358,6 +404,10 @@ class _JsonWorker(_SocketWorker):
                 pymacnet.messages.tx_start_test_with_procedure_msg['params']['FNum'] == rx_msg['params']['FNum']):
             tx_msg = pymacnet.messages.rx_start_test_with_procedure_msg
             tx_msg['result']['Chan'] = rx_msg['params']['Chan']
+        elif (pymacnet.messages.tx_select_channels_msg['params']['FClass'] == rx_msg['params']['FClass'] and
+                pymacnet.messages.tx_select_channels_msg['params']['FNum'] == rx_msg['params']['FNum']):
+            tx_msg = copy.deepcopy(pymacnet.messages.rx_select_channels_msg)
+            tx_msg['result']['Chans'] = rx_msg['params']['Chans']
         elif (pymacnet.messages.tx_set_variable_msg['params']['FClass'] == rx_msg['params']['FClass'] and
                 pymacnet.messages.tx_set_variable_msg['params']['FNum'] == rx_msg['params']['FNum']):
             tx_msg = pymacnet.messages.rx_set_variable_msg
@@ -393,14 +443,28 @@ class _JsonWorker(_SocketWorker):
             tx_msg['result']['TestChannels'] = self.__channel_data.num_channels
         elif (pymacnet.messages.tx_channel_status_multiple_channels['params']['FClass'] == rx_msg['params']['FClass'] and
                 pymacnet.messages.tx_channel_status_multiple_channels['params']['FNum'] == rx_msg['params']['FNum']):
-            tx_msg = pymacnet.messages.rx_channel_status_multiple_channels
+            tx_msg = copy.deepcopy(
+                pymacnet.messages.rx_channel_status_multiple_channels)
+            chan = rx_msg['params']['Chan']
+            length = max(
+                0, min(rx_msg['params']['Len'], self.__channel_data.num_channels - chan))
+            tx_msg['result']['Chan'] = chan
+            tx_msg['result']['Len'] = length
+            tx_msg['result']['Status'] = []
+            for channel in range(chan, chan + length):
+                status = self.__channel_data.fetch_channel_status(channel)[
+                    'result']
+                tx_msg['result']['Status'].append(
+                    {'RF1': status['RF1'], 'RF2': status['RF2'], 'Stat': status['Stat']})
         else:
             tx_msg = {'err': 1}
 
-        tx_msg = json.dumps(tx_msg, indent=4)
+        # Replies carry the id of the request they answer.
+        tx_msg = dict(tx_msg, id=rx_msg.get('id'))
+
+        tx_msg = codec.dumps(tx_msg)
         # Needs to be included as it's included in messages from Maccor server as indicator of message termination
-        tx_msg += '\r\n'
-        tx_msg = tx_msg.encode('utf-8')
+        tx_msg += b'\r\n'
 
         return tx_msg
 
@@ -409,8 +473,8 @@ class _TcpWorker(_SocketWorker):
 
     def __init__(self, s: socket.socket, channel_data: ChannelData):
         """
-        Class to handle requests from MacNet TCP socket clients. Currently just echos back client
-        message. Should be expanded in future.
+        Class to handle requests from MacNet TCP socket clients. Answers the binary status,
+        aux and direct output messages and echos back any other client message.
 
         Parameters
         ----------
@@ -421,4 +485,81 @@ class _TcpWorker(_SocketWorker):
         """
 
         self.__channel_data = channel_data
+        self.__rx_buffer = b''
         super().__init__(s)
+
+    def _process_client_msg(self, rx_msg):
+        """
+        Takes the incoming binary client message(s) and generates a response. Messages may
+        arrive several to a receive or split across receives. Partial messages are kept until
+        the rest arrives.
+
+        Parameters
+        ----------
+        rx_msg : PyBytesObject
+            The client message received.
+
+        Returns
+        -------
+        tx_msg : PyBytesObject
+            The client response. Contains one reply per complete message received.
+        """
+        self.__rx_buffer += rx_msg
+
+        tx_msg = b''
+        header_size = binary.header_struct.size
+        while len(self.__rx_buffer) >= header_size:
+            fclass, fnum, chan, length = binary.unpack_header(self.__rx_buffer)
+            msg_size = header_size + \
+                binary.request_data_size(fclass, fnum, length)
+            if len(self.__rx_buffer) < msg_size:
+                # Wait for the rest of the message.
+                break
+            msg = self.__rx_buffer[:msg_size]
+            self.__rx_buffer = self.__rx_buffer[msg_size:]
+            tx_msg += self.__build_reply(msg, fclass, fnum, chan, length)
+
+        return tx_msg
+
+    def __build_reply(self, rx_msg, fclass, fnum, chan, length):
+        """
+        Generates the response to a single binary client message.
+
+        Parameters
+        ----------
+        rx_msg : PyBytesObject
+            The complete client message received.
+        fclass, fnum, chan, length : int
+            The fields of the message header.
+
+        Returns
+        -------
+        tx_msg : PyBytesObject
+            The client response.
+        """
+        if (fclass, fnum) == (4, 7):
+            status = self.__channel_data.fetch_channel_status(chan)['result']
+            tester_time_ms = int(datetime.strptime(
+                status['TesterTime'], '%Y-%m-%dT%H:%M:%S').timestamp() * 1000)
+            return binary.header_struct.pack(fclass, fnum, chan, binary.read_status_struct.size) + \
+                binary.read_status_struct.pack(
+                    status['RF1'], status['RF2'], status['Stat'], status['LastRecNum'], status['Cycle'],
+                    status['Step'], status['TestTime'], status['StepTime'], status['Capacity'],
+                    status['Energy'], status['Current'], status['Voltage'], tester_time_ms)
+        elif (fclass, fnum) == (4, 1):
+            length = max(0, min(length, self.__channel_data.num_channels - chan))
+            tx_msg = binary.header_struct.pack(fclass, fnum, chan, length)
+            for channel in range(chan, chan + length):
+                status = self.__channel_data.fetch_channel_status(channel)['result']
+                tx_msg += binary.channel_status_struct.pack(
+                    status['RF1'], status['RF2'], status['Stat'])
+            return tx_msg
+        elif (fclass, fnum) == (4, 4):
+            aux_values = pymacnet.messages.rx_read_aux_msg['result']['AuxValues']
+            return binary.header_struct.pack(fclass, fnum, chan, len(aux_values)) + \
+                b''.join(binary.reading_struct.pack(value) for value in aux_values)
+        elif (fclass, fnum) == (6, 8):
+            return binary.header_struct.pack(fclass, fnum, chan, binary.result_struct.size) + \
+                binary.result_struct.pack(0)
+        else:
+            return rx_msg
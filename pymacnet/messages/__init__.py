@@ -1,2 +1,4 @@
 from .messages import *
 from .status_dictionary import *
+from .encoder import *
+from . import binary
@@ -0,0 +1,328 @@
+import struct
+from datetime import datetime
+
+from ..records import ChannelStatus
+
+# Binary MacNet messages are little endian. Every message starts with a header of four words
+# (FClass, FNum, Chan, Len) followed by the data. Unlike the JSON messages, `Chan` is used as is,
+# i.e. it is the 0-based channel number of the MacNet documentation.
+
+header_struct = struct.Struct('<HHHH')
+"""
+Message header: FClass, FNum, Chan, Len.
+"""
+
+read_status_struct = struct.Struct('<BBHIIHffffffQ')
+"""
+Data of the reply to (4, 7) All status and readings of one channel: RF1, RF2, Stat, LastRecNum,
+Cycle, Step, TestTime, StepTime, Capacity, Energy, Current, Voltage, TesterTime. TesterTime is in
+milliseconds since the Unix epoch.
+"""
+
+channel_status_struct = struct.Struct('<BBH')
+"""
+Per channel data of the reply to (4, 1) Channel status of multiple channels: RF1, RF2, Stat.
+"""
+
+reading_struct = struct.Struct('<f')
+"""
+Per item data of the replies to (4, 2), (4, 3) and (4, 4), readings of multiple channels and
+auxiliary readings.
+"""
+
+direct_output_struct = struct.Struct('<ffffBB')
+"""
+Data of (6, 8) Set direct mode output: Current, Voltage, Power, Resistance, CurrentRange, ChMode.
+"""
+
+result_struct = struct.Struct('<H')
+"""
+Data of replies that only carry a result word, e.g. (6, 8) Set direct mode output.
+"""
+
+max_channels_per_status_msg = 128
+"""
+Most channels that can be requested with one (4, 1) message.
+"""
+
+result_dictionary = {
+    0: 'OK',
+    1: 'Illegal system type',
+    2: 'The channel is not active',
+    3: 'Command sent too fast',
+    4: 'Direct mode is not active',
+    5: 'Direct mode is not ready yet',
+}
+"""
+Result word codes of (6, 8) Set direct mode output.
+"""
+
+# Messages whose `Len` counts items rather than bytes, with the size of each item.
+_item_sizes = {
+    (4, 1): channel_status_struct.size,
+    (4, 2): reading_struct.size,
+    (4, 3): reading_struct.size,
+    (4, 4): reading_struct.size,
+}
+
+# Replies with a fixed amount of data, regardless of `Len`.
+_fixed_reply_sizes = {
+    (4, 7): read_status_struct.size,
+    (6, 8): result_struct.size,
+}
+
+
+def request_data_size(fclass: int, fnum: int, length: int) -> int:
+    """
+    Returns the number of data bytes following the header of a request.
+
+    Parameters
+    ----------
+    fclass : int
+        The function class of the request.
+    fnum : int
+        The function number of the request.
+    length : int
+        The `Len` field of the request header.
+
+    Returns
+    -------
+    size : int
+        The number of data bytes.
+    """
+    # Reads carry no data, their `Len` is the number of channels or items requested.
+    if fclass == 4:
+        return 0
+    return length
+
+
+def reply_data_size(fclass: int, fnum: int, length: int) -> int:
+    """
+    Returns the number of data bytes following the header of a reply.
+
+    Parameters
+    ----------
+    fclass : int
+        The function class of the reply.
+    fnum : int
+        The function number of the reply.
+    length : int
+        The `Len` field of the reply header.
+
+    Returns
+    -------
+    size : int
+        The number of data bytes.
+    """
+    if (fclass, fnum) in _fixed_reply_sizes:
+        return _fixed_reply_sizes[(fclass, fnum)]
+    if (fclass, fnum) in _item_sizes:
+        return _item_sizes[(fclass, fnum)] * length
+    return length
+
+
+def pack_read_status(chan: int) -> bytes:
+    """
+    Packs a (4, 7) All status and readings of one channel request.
+
+    Parameters
+    ----------
+    chan : int
+        The 0-based channel number.
+
+    Returns
+    -------
+    msg_outgoing_bytes : bytes
+        The packed message.
+    """
+    return header_struct.pack(4, 7, chan, 0)
+
+
+def pack_read_statuses(chan: int, length: int) -> bytes:
+    """
+    Packs a (4, 1) Channel status of multiple channels request.
+
+    Parameters
+    ----------
+    chan : int
+        The 0-based number of the first channel.
+    length : int
+        The number of channels, at most `max_channels_per_status_msg`.
+
+    Returns
+    -------
+    msg_outgoing_bytes : bytes
+        The packed message.
+    """
+    return header_struct.pack(4, 1, chan, length)
+
+
+def pack_read_aux(chan: int) -> bytes:
+    """
+    Packs a (4, 4) Auxiliary input readings request.
+
+    Parameters
+    ----------
+    chan : int
+        The 0-based channel number.
+
+    Returns
+    -------
+    msg_outgoing_bytes : bytes
+        The packed message.
+    """
+    return header_struct.pack(4, 4, chan, 0)
+
+
+def pack_set_direct_output(chan: int, current: float, voltage: float, power: float,
+                           resistance: float, current_range: int, mode: str) -> bytes:
+    """
+    Packs a (6, 8) Set direct mode output request.
+
+    Parameters
+    ----------
+    chan : int
+        The 0-based channel number.
+    current : float
+        The current in amps.
+    voltage : float
+        The voltage in volts.
+    power : float
+        The power in watts.
+    resistance : float
+        The resistance in ohms. 0 to ignore.
+    current_range : int
+        The current range, 1 to 4.
+    mode : str
+        'C' for charge, 'D' for discharge or 'R' for rest.
+
+    Returns
+    -------
+    msg_outgoing_bytes : bytes
+        The packed message.
+    """
+    return header_struct.pack(6, 8, chan, direct_output_struct.size) + direct_output_struct.pack(
+        current, voltage, power, resistance, current_range, ord(mode))
+
+
+def unpack_header(frame) -> tuple:
+    """
+    Unpacks the header of a message.
+
+    Parameters
+    ----------
+    frame : bytes-like
+        The message, starting with its header.
+
+    Returns
+    -------
+    header : tuple
+        FClass, FNum, Chan and Len.
+    """
+    return header_struct.unpack_from(frame)
+
+
+def unpack_read_status(frame) -> ChannelStatus:
+    """
+    Unpacks the reply to a (4, 7) All status and readings of one channel request.
+
+    Parameters
+    ----------
+    frame : bytes-like
+        The complete reply.
+
+    Returns
+    -------
+    status : ChannelStatus
+        The status of the channel. `Chan` is 0-based and `TesterTime` is formatted in the same way
+        as in the JSON reply.
+    """
+    fclass, fnum, chan, _ = _unpack_reply_header(frame, 4, 7)
+    fields = read_status_struct.unpack_from(frame, header_struct.size)
+    tester_time = datetime.fromtimestamp(
+        fields[-1] / 1000).strftime('%Y-%m-%dT%H:%M:%S')
+    return ChannelStatus(fclass, fnum, chan, *fields[:-1], tester_time)
+
+
+def unpack_read_statuses(frame) -> list:
+    """
+    Unpacks the reply to a (4, 1) Channel status of multiple channels request.
+
+    Parameters
+    ----------
+    frame : bytes-like
+        The complete reply.
+
+    Returns
+    -------
+    statuses : list
+        One dictionary with the `RF1`, `RF2` and `Stat` fields per channel, like the `Status`
+        list of the JSON reply.
+    """
+    _unpack_reply_header(frame, 4, 1)
+    return [{'RF1': rf1, 'RF2': rf2, 'Stat': stat} for rf1, rf2, stat in
+            channel_status_struct.iter_unpack(bytes(frame[header_struct.size:]))]
+
+
+def unpack_readings(frame) -> list:
+    """
+    Unpacks the reply to a (4, 2), (4, 3) or (4, 4) request, e.g. the auxiliary readings of a channel.
+
+    Parameters
+    ----------
+    frame : bytes-like
+        The complete reply.
+
+    Returns
+    -------
+    readings : list
+        The readings.
+    """
+    return [reading for reading, in reading_struct.iter_unpack(bytes(frame[header_struct.size:]))]
+
+
+def unpack_result(frame, request=None) -> int:
+    """
+    Unpacks the result word of a reply, e.g. to (6, 8) Set direct mode output.
+
+    Parameters
+    ----------
+    frame : bytes-like
+        The complete reply.
+    request : bytes-like
+        The request `frame` replies to. If given, the reply is checked to echo the `FClass`,
+        `FNum` and `Chan` of the request.
+
+    Returns
+    -------
+    result : int
+        The result word. 0 is OK, see `result_dictionary`.
+
+    Raises
+    ------
+    ValueError
+        If the reply does not match `request`.
+    """
+    header = header_struct.unpack_from(frame)
+    if request is not None:
+        request_header = header_struct.unpack_from(request)
+        if header[:3] != request_header[:3]:
+            raise ValueError(
+                f"Reply {header[:3]} does not match request {request_header[:3]}!")
+    return result_struct.unpack_from(frame, header_struct.size)[0]
+
+
+def _unpack_reply_header(frame, fclass: int, fnum: int) -> tuple:
+    """
+    Unpacks the header of a reply and checks that it answers the expected message.
+
+    Raises
+    ------
+    ValueError
+        If the reply is to a different message.
+    """
+    header = header_struct.unpack_from(frame)
+    if header[:2] != (fclass, fnum):
+        raise ValueError(
+            f"Expected reply to ({fclass}, {fnum}), received reply to ({header[0]}, {header[1]})!")
+    return header
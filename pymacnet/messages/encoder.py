@@ -0,0 +1,201 @@
+import math
+
+import numpy as np
+
+from . import messages
+from .. import codec
+
+__all__ = ['MessageEncoder',
+           'tx_read_status_encoder',
+           'tx_start_test_with_procedure_encoder',
+           'tx_select_channels_encoder',
+           'tx_start_test_with_direct_control_encoder',
+           'tx_set_direct_output_encoder',
+           'tx_reset_channel_encoder',
+           'tx_read_aux_encoder',
+           'tx_set_safety_limits_encoder',
+           'tx_set_variable_encoder',
+           'tx_system_info_encoder',
+           'tx_general_info_encoder',
+           'tx_channel_status_multiple_channels_encoder']
+
+# Marks where the JSON-RPC id goes in a compiled message.
+_ID = object()
+
+
+class MessageEncoder():
+    """
+    Compiled form of a MacNet JSON transmit message template. The template is serialized once,
+    in compact form, into static byte chunks with gaps for the variable fields and the JSON-RPC
+    id, so encoding a message only has to serialize the values that change.
+    """
+
+    def __init__(self, template: dict, fields: tuple = None):
+        """
+        Creates a MessageEncoder class instance.
+
+        Parameters
+        ----------
+        template : dict
+            A transmit message template from `pymacnet.messages`.
+        fields : tuple
+            The `params` that can be filled in when encoding. Defaults to every parameter except
+            `FClass` and `FNum`. Fields not given when encoding take their template value.
+        """
+        params = template['params']
+        self.fclass = params['FClass']
+        self.fnum = params['FNum']
+
+        if fields is None:
+            fields = tuple(name for name in params if name not in (
+                'FClass', 'FNum'))
+        self.__fields = frozenset(fields)
+
+        self.__slots = []
+        self.__defaults = []
+        self.__chunks = []
+        chunk = b'{'
+        for i, (key, value) in enumerate(template.items()):
+            chunk += (b',' if i else b'') + _encode_key(key)
+            if key == 'params':
+                chunk += b'{'
+                for j, (name, param) in enumerate(params.items()):
+                    chunk += (b',' if j else b'') + _encode_key(name)
+                    if name in self.__fields:
+                        self.__chunks.append(chunk)
+                        self.__slots.append(name)
+                        self.__defaults.append(_encode_value(param))
+                        chunk = b''
+                    else:
+                        chunk += _encode_value(param)
+                chunk += b'}'
+            elif key == 'id':
+                self.__chunks.append(chunk)
+                self.__slots.append(_ID)
+                self.__defaults.append(None)
+                chunk = b''
+            else:
+                chunk += _encode_value(value)
+        self.__chunks.append(chunk + b'}')
+
+    def encode(self, msg_id: int, params: dict = None) -> bytes:
+        """
+        Encodes a message.
+
+        Parameters
+        ----------
+        msg_id : int
+            The JSON-RPC id to send the message with.
+        params : dict
+            Values for the variable fields of the message.
+
+        Returns
+        -------
+        msg_packed : bytes
+            The encoded message.
+        """
+        params = params or {}
+        if not self.__fields.issuperset(params):
+            raise ValueError(
+                f"Cannot set fields {set(params) - self.__fields} of message ({self.fclass}, {self.fnum})")
+
+        parts = [self.__chunks[0]]
+        for slot, default, chunk in zip(self.__slots, self.__defaults, self.__chunks[1:]):
+            if slot is _ID:
+                parts.append(_encode_value(msg_id))
+            elif slot in params:
+                parts.append(_encode_value(params[slot]))
+            else:
+                parts.append(default)
+            parts.append(chunk)
+
+        return b''.join(parts)
+
+
+def _encode_key(key: str) -> bytes:
+    """
+    Encodes an object key, including the trailing colon.
+    """
+    return codec.dumps(key) + b':'
+
+
+def _encode_value(value) -> bytes:
+    """
+    Encodes a single value in compact JSON form. Raises a ValueError for NaN and infinite
+    numbers, which JSON cannot represent.
+    """
+    value_type = type(value)
+    if value_type is int:
+        return repr(value).encode()
+    if value_type is float or isinstance(value, np.floating):
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot encode {value} as JSON")
+        if value_type is float:
+            return repr(value).encode()
+    return codec.dumps(value)
+
+
+tx_read_status_encoder = MessageEncoder(messages.tx_read_status_msg)
+"""
+Compiled `tx_read_status_msg`.
+"""
+
+tx_start_test_with_procedure_encoder = MessageEncoder(
+    messages.tx_start_test_with_procedure_msg)
+"""
+Compiled `tx_start_test_with_procedure_msg`.
+"""
+
+tx_select_channels_encoder = MessageEncoder(messages.tx_select_channels_msg)
+"""
+Compiled `tx_select_channels_msg`.
+"""
+
+tx_start_test_with_direct_control_encoder = MessageEncoder(
+    messages.tx_start_test_with_direct_control_msg)
+"""
+Compiled `tx_start_test_with_direct_control_msg`.
+"""
+
+tx_set_direct_output_encoder = MessageEncoder(
+    messages.tx_set_direct_output_msg)
+"""
+Compiled `tx_set_direct_output_msg`.
+"""
+
+tx_reset_channel_encoder = MessageEncoder(messages.tx_reset_channel_msg)
+"""
+Compiled `tx_reset_channel_msg`.
+"""
+
+tx_read_aux_encoder = MessageEncoder(messages.tx_read_aux_msg)
+"""
+Compiled `tx_read_aux_msg`.
+"""
+
+tx_set_safety_limits_encoder = MessageEncoder(
+    messages.tx_set_safety_limits_msg)
+"""
+Compiled `tx_set_safety_limits_msg`.
+"""
+
+tx_set_variable_encoder = MessageEncoder(messages.tx_set_variable_msg)
+"""
+Compiled `tx_set_variable_msg`.
+"""
+
+tx_system_info_encoder = MessageEncoder(messages.tx_system_info_msg)
+"""
+Compiled `tx_system_info_msg`.
+"""
+
+tx_general_info_encoder = MessageEncoder(messages.tx_general_info_msg)
+"""
+Compiled `tx_general_info_msg`.
+"""
+
+tx_channel_status_multiple_channels_encoder = MessageEncoder(
+    messages.tx_channel_status_multiple_channels)
+"""
+Compiled `tx_channel_status_multiple_channels`.
+"""
@@ -124,6 +124,42 @@ rx_start_test_with_procedure_msg = {
 Response for starting test with procedure.
 """
 
+tx_select_channels_msg = {
+    "jsonrpc": "2.0",
+    "method": "MacNet",
+    "params":
+    {
+        "FClass": 6,
+        "FNum": 1,
+        "Chans": []
+    },
+    "id": 1987
+}
+"""
+Selects the test channels listed in `Chans`, so that one start test message with `Chan` set to
+`all_selected_chan` starts the same test on all of them.
+"""
+
+rx_select_channels_msg = {
+    'jsonrpc': '2.0',
+    'result':
+    {
+        'FClass': 6,
+        'FNum': 1,
+        'Chans': [],
+        'Result': 'OK'
+    },
+    'id': 1987
+}
+"""
+Response for selecting channels.
+"""
+
+all_selected_chan = 65535
+"""
+`Chan` of a start test message that starts every selected channel, see `tx_select_channels_msg`.
+"""
+
 tx_start_test_with_direct_control_msg = {
     "jsonrpc": "2.0",
     "method": "MacNet",
@@ -0,0 +1,223 @@
+import threading
+
+import numpy as np
+
+_quantiles = (0.5, 0.95, 0.99)
+
+
+class _MessageMetrics():
+    """
+    Counters and recent latencies of one message type.
+    """
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum_s = 0.0
+        self.latencies_s = np.zeros(window)
+        self.num_latencies = 0
+
+    def add_latency(self, latency_s: float):
+        self.latencies_s[self.num_latencies % len(self.latencies_s)] = latency_s
+        self.num_latencies += 1
+        self.latency_sum_s += latency_s
+
+    def get_quantiles_s(self) -> tuple:
+        latencies_s = self.latencies_s[:min(self.num_latencies, len(self.latencies_s))]
+        if not len(latencies_s):
+            return tuple(float('nan') for _ in _quantiles)
+        return tuple(float(latency_s) for latency_s in np.quantile(latencies_s, _quantiles))
+
+
+class SessionMetrics():
+    """
+    Request metrics of a `MacNetSession` or `AsyncMacNetSession`, kept per transport (`json` or
+    `binary`) and message type `(FClass, FNum)`: request and error counts, bytes sent and
+    received and latency percentiles. Latency is measured from sending a request to receiving its
+    complete reply, so it includes waiting behind earlier pipelined requests. Percentiles are over
+    the most recent `window` requests of each type, while counts and sums are since the metrics
+    were created or reset. Safe to read from other threads while requests are running.
+    """
+
+    def __init__(self, window: int = 1024):
+        """
+        Creates a SessionMetrics class instance.
+
+        Parameters
+        ----------
+        window : int
+            How many of the most recent latencies of each message type the percentiles are
+            computed over.
+        """
+        self.__window = window
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all metrics.
+        """
+        with self.__lock:
+            self.__messages = {}
+            self.__timeouts = 0
+            self.__reconnects = 0
+
+    def record_request(self, transport: str, msg_type: tuple, latency_s: float, bytes_sent: int,
+                       bytes_received: int):
+        """
+        Records a request that was answered.
+
+        Parameters
+        ----------
+        transport : str
+            `json` or `binary`.
+        msg_type : tuple
+            The `(FClass, FNum)` of the request.
+        latency_s : float
+            The time from sending the request to receiving its reply.
+        bytes_sent : int
+            The size of the request.
+        bytes_received : int
+            The size of the reply.
+        """
+        with self.__lock:
+            metrics = self.__get_message_metrics(transport, msg_type)
+            metrics.count += 1
+            metrics.bytes_sent += bytes_sent
+            metrics.bytes_received += bytes_received
+            metrics.add_latency(latency_s)
+
+    def record_error(self, transport: str, msg_type: tuple, bytes_sent: int = 0):
+        """
+        Records a request that failed, i.e. was not sent or got no valid reply.
+
+        Parameters
+        ----------
+        transport : str
+            `json` or `binary`.
+        msg_type : tuple
+            The `(FClass, FNum)` of the request.
+        bytes_sent : int
+            The size of the request if it was sent.
+        """
+        with self.__lock:
+            metrics = self.__get_message_metrics(transport, msg_type)
+            metrics.errors += 1
+            metrics.bytes_sent += bytes_sent
+
+    def record_timeout(self):
+        """
+        Records a timeout while waiting for a reply.
+        """
+        with self.__lock:
+            self.__timeouts += 1
+
+    def record_reconnect(self):
+        """
+        Records a reconnection to the Maccor server.
+        """
+        with self.__lock:
+            self.__reconnects += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current metrics.
+
+        Returns
+        -------
+        metrics : dict
+            - `json` and `binary` - For each transport, a dict keyed by `(FClass, FNum)` with the
+                `count` of answered requests, `errors`, `bytes_sent`, `bytes_received`,
+                `latency_sum_s` and the `latency_p50_s`, `latency_p95_s` and `latency_p99_s`
+                percentiles. Percentiles are NaN if no request of the type was answered.
+            - `timeouts` - The number of timeouts while waiting for a reply.
+            - `reconnects` - The number of reconnections to the Maccor server.
+        """
+        with self.__lock:
+            snapshot = {'json': {}, 'binary': {},
+                        'timeouts': self.__timeouts, 'reconnects': self.__reconnects}
+            for (transport, msg_type), metrics in self.__messages.items():
+                p50_s, p95_s, p99_s = metrics.get_quantiles_s()
+                snapshot[transport][msg_type] = {
+                    'count': metrics.count,
+                    'errors': metrics.errors,
+                    'bytes_sent': metrics.bytes_sent,
+                    'bytes_received': metrics.bytes_received,
+                    'latency_sum_s': metrics.latency_sum_s,
+                    'latency_p50_s': p50_s,
+                    'latency_p95_s': p95_s,
+                    'latency_p99_s': p99_s,
+                }
+            return snapshot
+
+    def to_prometheus(self, prefix: str = 'pymacnet') -> str:
+        """
+        Returns the current metrics in the Prometheus text exposition format, e.g. to serve from
+        a `/metrics` endpoint. Latencies are exposed as a summary with 0.5, 0.95 and 0.99
+        quantiles.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the metric names.
+
+        Returns
+        -------
+        text : str
+            The metrics.
+        """
+        snapshot = self.snapshot()
+        series = []
+        for transport in ('json', 'binary'):
+            for (fclass, fnum), metrics in sorted(snapshot[transport].items(), key=str):
+                labels = f'transport="{transport}",fclass="{fclass}",fnum="{fnum}"'
+                series.append((labels, metrics))
+
+        lines = []
+        for name, key, kind, description in (
+                ('requests_total', 'count', 'counter', 'MacNet requests answered.'),
+                ('request_errors_total', 'errors', 'counter', 'MacNet requests that failed.'),
+                ('sent_bytes_total', 'bytes_sent', 'counter', 'Bytes of MacNet requests sent.'),
+                ('received_bytes_total', 'bytes_received', 'counter', 'Bytes of MacNet replies received.')):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for labels, metrics in series:
+                lines.append(f'{prefix}_{name}{{{labels}}} {metrics[key]}')
+
+        name = f'{prefix}_request_latency_seconds'
+        lines.append(f'# HELP {name} Time from sending a MacNet request to receiving its reply.')
+        lines.append(f'# TYPE {name} summary')
+        for labels, metrics in series:
+            for quantile, key in zip(_quantiles, ('latency_p50_s', 'latency_p95_s', 'latency_p99_s')):
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} {_format_value(metrics[key])}')
+            lines.append(f'{name}_sum{{{labels}}} {_format_value(metrics["latency_sum_s"])}')
+            lines.append(f'{name}_count{{{labels}}} {metrics["count"]}')
+
+        for name, key, description in (
+                ('timeouts_total', 'timeouts', 'Timeouts while waiting for a MacNet reply.'),
+                ('reconnects_total', 'reconnects', 'Reconnections to the Maccor server.')):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            lines.append(f'{prefix}_{name} {snapshot[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def __get_message_metrics(self, transport: str, msg_type: tuple) -> _MessageMetrics:
+        """
+        Returns the metrics of a message type, creating them the first time. Must be called while
+        holding `__lock`.
+        """
+        key = (transport, msg_type)
+        metrics = self.__messages.get(key)
+        if metrics is None:
+            metrics = self.__messages[key] = _MessageMetrics(self.__window)
+        return metrics
+
+
+def _format_value(value: float) -> str:
+    """
+    Formats a sample value, spelling NaN the way Prometheus expects.
+    """
+    return 'NaN' if value != value else repr(value)
@@ -0,0 +1,185 @@
+import time
+import logging
+
+import numpy as np
+
+from .arrays import status_dtype, unread_mask
+
+logger = logging.getLogger(__name__)
+
+
+class _StatusPollerBase():
+    """
+    Scheduling shared by `StatusPoller` and `AsyncStatusPoller`. Each cycle a cheap (4,1) scan of
+    every channel decides which channels get one of the cycle's (4,7) full status reads.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        config = config if config else {}
+        self._cycler_interface = cycler_interface
+        self._requests_per_cycle = config.get('requests_per_cycle', 16)
+        self._active_interval_s = config.get('active_interval_s', 0)
+        self._idle_interval_s = config.get('idle_interval_s', 60)
+        self._active_states = np.array(
+            sorted(config.get('active_states', (2, 8, 12))))
+
+        num_channels = cycler_interface.get_num_channels()
+        self._latest = np.zeros(num_channels, dtype=status_dtype)
+        self._latest['Chan'] = np.arange(1, num_channels + 1)
+        self._fetched_at = np.full(num_channels, -np.inf)
+        # RF1, RF2 and Stat from the scan at the time of the last full read of each channel.
+        self._fetched_flags = np.full((num_channels, 3), -1)
+        self._scan_flags = None
+
+    def get_latest_statuses(self) -> np.ndarray:
+        """
+        Returns the last full status read of every channel.
+
+        Returns
+        -------
+        statuses : np.ndarray
+            A structured array with one row per channel, see `pymacnet.arrays.status_dtype`.
+            Rows of channels that have not been read yet are zero apart from `Chan`.
+        """
+        return self._latest.copy()
+
+    def get_ages_s(self) -> np.ndarray:
+        """
+        Returns how long ago each channel's full status was read.
+
+        Returns
+        -------
+        ages_s : np.ndarray
+            The age in seconds of each channel's last full read, inf if it has not been read.
+        """
+        return time.monotonic() - self._fetched_at
+
+    def _plan(self, scan: list) -> list:
+        """
+        Picks the channels to read in full this cycle from the (4,1) scan.
+
+        Channels whose flags changed since their last full read come first, then active channels
+        and finally idle channels, each once their read is older than the respective interval.
+        Within a group the stalest channels come first.
+        """
+        self._scan_flags = np.array(
+            [(status['RF1'], status['RF2'], status['Stat']) for status in scan])
+        ages_s = self.get_ages_s()
+        changed = np.any(self._scan_flags != self._fetched_flags, axis=1)
+        active = np.isin(self._scan_flags[:, 2], self._active_states)
+        due = changed | np.where(active, ages_s >= self._active_interval_s,
+                                 ages_s >= self._idle_interval_s)
+
+        group = np.where(changed, 0, np.where(active, 1, 2))
+        order = np.lexsort((-ages_s, group))
+        return [int(index) + 1 for index in order[due[order]][:self._requests_per_cycle]]
+
+    def _record(self, channels: list, statuses: np.ndarray):
+        """
+        Stores the full status reads of a cycle. Channels that could not be read keep their last
+        status and stay due, so they are read again next cycle.
+        """
+        read = ~unread_mask(statuses)
+        indices = np.array(channels, dtype=np.intp)[read] - 1
+        self._latest[indices] = statuses[read]
+        self._fetched_at[indices] = time.monotonic()
+        self._fetched_flags[indices] = self._scan_flags[indices]
+
+
+class StatusPoller(_StatusPollerBase):
+    """
+    Keeps the statuses of a rack of channels fresh on a fixed request budget. Every cycle reads
+    the status flags of all channels with one (4,1) scan, then spends the budget on (4,7) full
+    status reads of the channels that changed or are running, and only occasionally reads idle
+    or completed channels.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        """
+        Creates a StatusPoller class instance.
+
+        Parameters
+        ----------
+        cycler_interface : CyclerInterface
+            The interface to poll through.
+        config : dict
+            An optional configuration dictionary, which may contain the following keys:
+            - `requests_per_cycle` - Most full status reads per cycle. Defaults to 16.
+            - `active_interval_s` - How often active channels are read, in seconds. Defaults to 0,
+                i.e. every cycle the budget allows.
+            - `idle_interval_s` - How often other channels are read, in seconds. Defaults to 60.
+            - `active_states` - `Stat` codes counted as active, see
+                `pymacnet.messages.status_dictionary`. Defaults to Active, Start and Starting.
+        """
+        super().__init__(cycler_interface, config)
+
+    def poll(self) -> np.ndarray:
+        """
+        Runs one polling cycle.
+
+        Returns
+        -------
+        statuses : np.ndarray
+            The full statuses read this cycle, see `pymacnet.arrays.status_dtype`. Returns None
+            if there is an issue.
+        """
+        scan = self._cycler_interface.read_all_channel_statuses()
+        if scan is None:
+            logger.error("Failed to scan channel statuses")
+            return None
+
+        channels = self._plan(scan)
+        if not channels:
+            return np.zeros(0, dtype=status_dtype)
+
+        statuses = self._cycler_interface.read_channel_statuses(channels)
+        if statuses is None:
+            logger.error("Failed to read channel statuses")
+            return None
+        self._record(channels, statuses)
+        return statuses
+
+
+class AsyncStatusPoller(_StatusPollerBase):
+    """
+    `StatusPoller` for an `AsyncCyclerInterface`.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        """
+        Creates an AsyncStatusPoller class instance. The interface must be connected.
+
+        Parameters
+        ----------
+        cycler_interface : AsyncCyclerInterface
+            The interface to poll through.
+        config : dict
+            An optional configuration dictionary. Same keys as the `StatusPoller` configuration.
+        """
+        super().__init__(cycler_interface, config)
+
+    async def poll(self) -> np.ndarray:
+        """
+        Runs one polling cycle.
+
+        Returns
+        -------
+        statuses : np.ndarray
+            The full statuses read this cycle, see `pymacnet.arrays.status_dtype`. Returns None
+            if there is an issue.
+        """
+        scan = await self._cycler_interface.read_all_channel_statuses()
+        if scan is None:
+            logger.error("Failed to scan channel statuses")
+            return None
+
+        channels = self._plan(scan)
+        if not channels:
+            return np.zeros(0, dtype=status_dtype)
+
+        statuses = await self._cycler_interface.read_channel_statuses(channels)
+        if statuses is None:
+            logger.error("Failed to read channel statuses")
+            return None
+        self._record(channels, statuses)
+        return statuses
@@ -0,0 +1,143 @@
+import logging
+
+import numpy as np
+
+from .arrays import status_dtype, unread_mask
+
+logger = logging.getLogger(__name__)
+
+
+class _RecordFollowerBase():
+    """
+    Bookkeeping shared by `RecordFollower` and `AsyncRecordFollower`.
+    """
+
+    def __init__(self, cycler_interface, channels: list, last_rec_nums: dict = None):
+        self._cycler_interface = cycler_interface
+        self._channels = list(channels)
+        self._last_rec_nums = {channel: None for channel in self._channels}
+        self._last_rec_nums.update(last_rec_nums if last_rec_nums else {})
+        self._missed_records = {channel: 0 for channel in self._channels}
+
+    def get_last_rec_nums(self) -> dict:
+        """
+        Returns the last record number returned for each channel, None if no record has been
+        returned yet. Can be passed to a new follower to resume where this one stopped.
+        """
+        return dict(self._last_rec_nums)
+
+    def get_missed_records(self) -> dict:
+        """
+        Returns, for each channel, how many records the cycler logged between polls that were
+        not returned because only the most recent record can be read.
+        """
+        return dict(self._missed_records)
+
+    def _new_records(self, statuses: np.ndarray) -> np.ndarray:
+        """
+        Returns the statuses whose `LastRecNum` advanced and remembers their record numbers.
+        Channels that could not be read are left as they were and checked again next poll.
+        """
+        statuses = statuses[~unread_mask(statuses)]
+        last = np.array([-1 if self._last_rec_nums[channel] is None else self._last_rec_nums[channel]
+                         for channel in statuses['Chan']], dtype=np.int64)
+        rec_nums = statuses['LastRecNum'].astype(np.int64)
+        # A record number lower than the last one means a new test was started on the channel, so
+        # any change is a new record.
+        new = rec_nums != last
+
+        for channel, rec_num, previous in zip(statuses['Chan'][new], rec_nums[new], last[new]):
+            channel = int(channel)
+            if 0 <= previous < rec_num:
+                self._missed_records[channel] += int(rec_num - previous - 1)
+            self._last_rec_nums[channel] = int(rec_num)
+        return statuses[new]
+
+
+class RecordFollower(_RecordFollowerBase):
+    """
+    Follows the data records a cycler logs for a set of channels. Every (4,7) status reply carries
+    the readings and number (`LastRecNum`) of the most recent record in the channel's data file.
+    Each poll reads the status of every channel in one pipelined batch and returns only the
+    channels that logged a new record since the last one returned.
+
+    MacNet has no message to read back older records of the data file, so if a channel logs
+    several records between polls only the most recent one is returned and the others are
+    counted in `get_missed_records()`. Poll at least as often as the channels log records.
+    """
+
+    def __init__(self, cycler_interface, channels: list, last_rec_nums: dict = None):
+        """
+        Creates a RecordFollower class instance.
+
+        Parameters
+        ----------
+        cycler_interface : CyclerInterface
+            The interface to read through.
+        channels : list
+            The channels to follow.
+        last_rec_nums : dict
+            The last record number already retrieved per channel, e.g. from
+            `get_last_rec_nums()` of an earlier follower. Channels not included start from
+            their current record.
+        """
+        super().__init__(cycler_interface, channels, last_rec_nums)
+
+    def poll(self) -> np.ndarray:
+        """
+        Reads the channels and returns their new records.
+
+        Returns
+        -------
+        records : np.ndarray
+            The status of each channel that logged a new record, see
+            `pymacnet.arrays.status_dtype`. Empty if there are no new records. Returns None if
+            there is an issue.
+        """
+        if not self._channels:
+            return np.zeros(0, dtype=status_dtype)
+        statuses = self._cycler_interface.read_channel_statuses(self._channels)
+        if statuses is None:
+            logger.error("Failed to read channel records")
+            return None
+        return self._new_records(statuses)
+
+
+class AsyncRecordFollower(_RecordFollowerBase):
+    """
+    `RecordFollower` for an `AsyncCyclerInterface`.
+    """
+
+    def __init__(self, cycler_interface, channels: list, last_rec_nums: dict = None):
+        """
+        Creates an AsyncRecordFollower class instance.
+
+        Parameters
+        ----------
+        cycler_interface : AsyncCyclerInterface
+            The interface to read through.
+        channels : list
+            The channels to follow.
+        last_rec_nums : dict
+            The last record number already retrieved per channel. Same as for `RecordFollower`.
+        """
+        super().__init__(cycler_interface, channels, last_rec_nums)
+
+    async def poll(self) -> np.ndarray:
+        """
+        Reads the channels and returns their new records.
+
+        Returns
+        -------
+        records : np.ndarray
+            The status of each channel that logged a new record, see
+            `pymacnet.arrays.status_dtype`. Empty if there are no new records. Returns None if
+            there is an issue.
+        """
+        if not self._channels:
+            return np.zeros(0, dtype=status_dtype)
+        statuses = await self._cycler_interface.read_channel_statuses(self._channels)
+        if statuses is None:
+            logger.error("Failed to read channel records")
+            return None
+        return self._new_records(statuses)
@@ -0,0 +1,316 @@
+import os
+import re
+import time
+import queue
+import logging
+import threading
+
+import numpy as np
+
+from .arrays import status_dtype, statuses_from_dicts
+
+logger = logging.getLogger(__name__)
+
+# Shortest time the background writer waits for work, so a tiny flush interval doesn't spin.
+_min_flush_poll_s = 0.05
+
+aux_dtype = np.dtype([
+    ('Time', 'datetime64[ms]'),
+    ('Chan', np.uint16),
+    ('AuxIndex', np.uint16),
+    ('Value', np.float64),
+])
+"""
+Structured array dtype of recorded auxiliary readings, one row per reading. `Time` is the UTC time
+the reading was recorded and `AuxIndex` the position of the reading in the channel's aux values.
+"""
+
+table_dtypes = {
+    'status': status_dtype,
+    'aux': aux_dtype,
+}
+"""
+The dtype of each table of a recording.
+"""
+
+
+class StatusRecorder():
+    """
+    Records channel statuses and auxiliary readings to append-only columnar storage. Rows are
+    batched in memory and every full (or stale) batch is written as a new segment file of a
+    directory by a background thread, so recording does not block on compression or disk.
+    Segments are NumPy structured arrays, see `read_recording()`.
+    """
+
+    def __init__(self, directory: str, config: dict = None):
+        """
+        Creates a StatusRecorder class instance.
+
+        Parameters
+        ----------
+        directory : str
+            The directory to write the recording to. Created if it does not exist. Segments
+            already in the directory are kept and new segments are numbered after them.
+        config : dict
+            An optional configuration dictionary, which may contain the following keys:
+            - `batch_rows` - How many rows of a table are collected before they are written.
+                Defaults to 4096.
+            - `flush_interval_s` - Most time rows are held in memory before they are written,
+                in seconds. Batches are checked at least every 0.05 s however short the
+                interval. Defaults to 10.
+            - `compress` - If True, segments are written compressed (`.npz`). Otherwise they
+                are written as `.npy` files, which `read_recording()` memory maps instead of
+                reading. Defaults to True.
+        """
+        config = config if config else {}
+        self.__directory = directory
+        self.__batch_rows = config.get('batch_rows', 4096)
+        self.__flush_interval_s = config.get('flush_interval_s', 10)
+        self.__flush_poll_s = max(_min_flush_poll_s, self.__flush_interval_s / 4)
+        self.__compress = config.get('compress', True)
+        os.makedirs(directory, exist_ok=True)
+
+        self.__lock = threading.Lock()
+        self.__batches = {table: np.empty(self.__batch_rows, dtype=dtype)
+                          for table, dtype in table_dtypes.items()}
+        self.__batch_sizes = {table: 0 for table in table_dtypes}
+        self.__batch_started = {table: None for table in table_dtypes}
+        self.__segment_numbers = {table: _last_segment_number(directory, table)
+                                  for table in table_dtypes}
+
+        self.__write_queue = queue.Queue()
+        self.__closed = threading.Event()
+        self.__writer = threading.Thread(target=self.__write_segments, daemon=True)
+        self.__writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def record_statuses(self, statuses, channels: list = None) -> bool:
+        """
+        Records channel statuses.
+
+        Parameters
+        ----------
+        statuses : np.ndarray or list
+            A structured array of statuses, e.g. from `CyclerInterface.read_channel_statuses()`,
+            or a list of statuses, e.g. from `CyclerInterface.read_channel_status()`. None
+            entries of a list, for channels that could not be read, are recorded as unread rows.
+        channels : list
+            The channel of each entry of a list, used for the unread rows. If not given, unread
+            rows are recorded with channel 0.
+
+        Returns
+        -------
+        success : bool
+            True if the statuses were recorded, False if the recorder is closed.
+        """
+        if not isinstance(statuses, np.ndarray):
+            statuses = list(statuses)
+            if channels is None:
+                channels = [0 if status is None else status['Chan'] for status in statuses]
+            statuses = statuses_from_dicts(statuses, channels)
+        return self.__append('status', statuses)
+
+    def record_aux(self, channel: int, aux_values: list) -> bool:
+        """
+        Records the auxiliary readings of a channel, e.g. from `ChannelInterface.read_aux()`.
+
+        Parameters
+        ----------
+        channel : int
+            The channel the readings belong to.
+        aux_values : list
+            The readings.
+
+        Returns
+        -------
+        success : bool
+            True if the readings were recorded, False if the recorder is closed.
+        """
+        rows = np.empty(len(aux_values), dtype=aux_dtype)
+        rows['Time'] = np.datetime64(int(time.time() * 1000), 'ms')
+        rows['Chan'] = channel
+        rows['AuxIndex'] = np.arange(len(aux_values))
+        rows['Value'] = aux_values
+        return self.__append('aux', rows)
+
+    def record(self, cycler_interface, channels: list) -> bool:
+        """
+        Reads the status of `channels` and records it.
+
+        Parameters
+        ----------
+        cycler_interface : CyclerInterface
+            The interface to read through.
+        channels : list
+            The channels to read.
+
+        Returns
+        -------
+        success : bool
+            True if the statuses were read and recorded.
+        """
+        statuses = cycler_interface.read_channel_statuses(channels)
+        if statuses is None:
+            return False
+        return self.record_statuses(statuses)
+
+    def flush(self):
+        """
+        Hands every batched row to the background writer.
+        """
+        with self.__lock:
+            for table in table_dtypes:
+                self.__flush_batch(table)
+
+    def close(self):
+        """
+        Writes every batched row and waits for the background writer to finish.
+        """
+        with self.__lock:
+            if self.__closed.is_set():
+                return
+            for table in table_dtypes:
+                self.__flush_batch(table)
+            self.__closed.set()
+        self.__write_queue.put(None)
+        self.__writer.join()
+
+    def __append(self, table: str, rows: np.ndarray) -> bool:
+        """
+        Copies `rows` into the batch of `table`, handing full batches to the background writer.
+        Returns False, and drops the rows, if the recorder is closed.
+        """
+        with self.__lock:
+            if self.__closed.is_set():
+                logger.error(f"Recorder is closed! Dropping {len(rows)} {table} rows")
+                return False
+            while len(rows):
+                batch = self.__batches[table]
+                size = self.__batch_sizes[table]
+                count = min(len(rows), len(batch) - size)
+                batch[size:size + count] = rows[:count]
+                self.__batch_sizes[table] = size + count
+                rows = rows[count:]
+                if self.__batch_sizes[table] == len(batch):
+                    self.__flush_batch(table)
+            # The flush interval runs from the first row of the batch.
+            if self.__batch_sizes[table] and self.__batch_started[table] is None:
+                self.__batch_started[table] = time.monotonic()
+        return True
+
+    def __flush_batch(self, table: str):
+        """
+        Queues the batch of `table` for writing and starts a new one. The lock must be held.
+        """
+        size = self.__batch_sizes[table]
+        if size == 0:
+            return
+        self.__segment_numbers[table] += 1
+        self.__write_queue.put((table, self.__segment_numbers[table], self.__batches[table][:size]))
+        self.__batches[table] = np.empty(self.__batch_rows, dtype=table_dtypes[table])
+        self.__batch_sizes[table] = 0
+        self.__batch_started[table] = None
+
+    def __write_segments(self):
+        """
+        Background thread writing queued batches, and flushing batches older than the flush
+        interval.
+        """
+        while True:
+            try:
+                item = self.__write_queue.get(timeout=self.__flush_poll_s)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                return
+            if item:
+                table, number, rows = item
+                self.__write_segment(_segment_name(table, number, self.__compress), rows)
+
+            if not self.__closed.is_set():
+                now = time.monotonic()
+                with self.__lock:
+                    for table, started in self.__batch_started.items():
+                        if started is not None and now - started >= self.__flush_interval_s:
+                            self.__flush_batch(table)
+
+    def __write_segment(self, name: str, rows: np.ndarray):
+        """
+        Writes a segment under a temporary name and then renames it, so readers never see a
+        partly written segment.
+        """
+        path = os.path.join(self.__directory, name)
+        temp_path = os.path.join(self.__directory, '.' + name + '.tmp')
+        try:
+            with open(temp_path, 'wb') as segment_file:
+                if self.__compress:
+                    np.savez_compressed(segment_file, rows=rows)
+                else:
+                    np.save(segment_file, rows)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to write {path}", exc_info=True)
+            logger.error(e)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def read_recording(directory: str, table: str = 'status') -> np.ndarray:
+    """
+    Reads a table of a recording written by `StatusRecorder`.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the recording.
+    table : str
+        `'status'` or `'aux'`.
+
+    Returns
+    -------
+    rows : np.ndarray
+        Every recorded row of the table, oldest first, see `table_dtypes`. If the recording
+        consists of one uncompressed segment it is memory mapped rather than read.
+    """
+    segments = []
+    for name in sorted(os.listdir(directory)):
+        match = _segment_pattern.fullmatch(name)
+        if not match or match.group(1) != table:
+            continue
+        path = os.path.join(directory, name)
+        if name.endswith('.npz'):
+            with np.load(path) as segment:
+                segments.append(segment['rows'])
+        else:
+            segments.append(np.load(path, mmap_mode='r'))
+
+    if not segments:
+        return np.zeros(0, dtype=table_dtypes[table])
+    if len(segments) == 1:
+        return segments[0]
+    return np.concatenate(segments)
+
+
+_segment_pattern = re.compile(r'(\w+)-(\d{8})\.(npz|npy)')
+
+
+def _segment_name(table: str, number: int, compress: bool) -> str:
+    """
+    Returns the file name of a segment. Names sort in the order the segments were written.
+    """
+    return f"{table}-{number:08d}.{'npz' if compress else 'npy'}"
+
+
+def _last_segment_number(directory: str, table: str) -> int:
+    """
+    Returns the number of the last segment of `table` in `directory`, 0 if there is none.
+    """
+    numbers = [int(match.group(2)) for match in map(_segment_pattern.fullmatch, os.listdir(directory))
+               if match and match.group(1) == table]
+    return max(numbers, default=0)
@@ -0,0 +1,144 @@
+from collections.abc import Mapping
+
+
+class _Record(Mapping):
+    """
+    Base class for fixed shape records decoded from MacNet replies. Fields are stored in
+    `__slots__` rather than a per instance dict, so records are small and attribute access is
+    fast. Records are also mappings keyed by the MacNet field names, so they can be read by key,
+    and compare equal to, the reply dictionaries they replace. They are not dicts though: fields
+    are set as attributes rather than items, and `to_dict()` is needed where a plain dictionary
+    is, e.g. for `json.dumps`.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, *args, **kwargs):
+        if len(args) > len(self._fields):
+            raise TypeError(
+                f"{type(self).__name__} takes at most {len(self._fields)} fields")
+        for name, value in zip(self._fields, args):
+            setattr(self, name, value)
+        for name in self._fields[len(args):]:
+            setattr(self, name, kwargs.pop(name, None))
+        if kwargs:
+            raise TypeError(
+                f"{type(self).__name__} has no fields {list(kwargs)}")
+
+    @classmethod
+    def from_dict(cls, fields: dict):
+        """
+        Creates a record from a reply dictionary, e.g. the `result` of a MacNet reply. Keys that
+        are not fields of the record are ignored and missing fields are set to None.
+
+        Parameters
+        ----------
+        fields : dict
+            The dictionary to take the field values from.
+
+        Returns
+        -------
+        record
+            The new record.
+        """
+        record = cls.__new__(cls)
+        for name in cls._fields:
+            setattr(record, name, fields.get(name))
+        return record
+
+    def to_dict(self) -> dict:
+        """
+        Returns the record as a plain dictionary.
+        """
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({fields})'
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self._fields))
+
+
+class ChannelStatus(_Record):
+    """
+    Status and readings of a channel. Result of MacNet message (4,7), see
+    `pymacnet.messages.rx_read_status_msg`.
+    """
+    __slots__ = ('FClass', 'FNum', 'Chan', 'RF1', 'RF2', 'Stat', 'LastRecNum', 'Cycle', 'Step',
+                 'TestTime', 'StepTime', 'Capacity', 'Energy', 'Current', 'Voltage', 'TesterTime')
+    _fields = __slots__
+    _field_set = frozenset(_fields)
+
+
+class AuxReading(_Record):
+    """
+    Auxiliary readings of a channel. Result of MacNet message (4,4), see
+    `pymacnet.messages.rx_read_aux_msg`.
+    """
+    __slots__ = ('FClass', 'FNum', 'Chan', 'Len', 'AuxValues')
+    _fields = __slots__
+    _field_set = frozenset(_fields)
+
+
+class SafetyLimits(_Record):
+    """
+    Safety limits of a channel. Result of MacNet message (6,10), see
+    `pymacnet.messages.rx_set_safety_limits_msg`.
+    """
+    __slots__ = ('Chan', 'VSafeMax', 'VSafeMin', 'ISafeChg',
+                 'ISafeDis', 'PBatSafeChg', 'PBatSafeDis')
+    _fields = __slots__
+    _field_set = frozenset(_fields)
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Creates the safety limits requested by a `ChannelInterface` configuration.
+
+        Parameters
+        ----------
+        config : dict
+            The channel config.
+
+        Returns
+        -------
+        safety_limits : SafetyLimits
+            The requested safety limits.
+        """
+        return cls(config['channel'], config['v_max_safety_limit_v'], config['v_min_safety_limit_v'],
+                   config['i_max_safety_limit_a'], config['i_min_safety_limit_a'],
+                   config['power_safety_limit_chg_w'], config['power_safety_limit_dsg_w'])
+
+    def is_close(self, other, tolerance: float = 0.001) -> bool:
+        """
+        Checks whether two sets of safety limits are for the same channel and agree to within
+        `tolerance`.
+
+        Parameters
+        ----------
+        other : SafetyLimits
+            The safety limits to compare against.
+        tolerance : float
+            The largest allowed difference between limits.
+
+        Returns
+        -------
+        close : bool
+            True if the limits match.
+        """
+        if self.Chan != other['Chan']:
+            return False
+        return all(abs(getattr(self, name) - other[name]) < tolerance
+                   for name in self._fields[1:])
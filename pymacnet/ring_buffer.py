@@ -0,0 +1,129 @@
+import numpy as np
+
+from .arrays import status_dtype, status_fields, statuses_from_dicts
+
+sample_dtype = np.dtype([(name, status_dtype[name])
+                        for name in status_fields if name != 'Chan'])
+"""
+Structured array dtype of one sample of a channel in a `StatusRingBuffer`, the numeric fields of
+a channel status.
+"""
+
+
+class StatusRingBuffer():
+    """
+    Fixed memory store of the most recent status samples of every channel. Memory is allocated
+    once, appends are O(1) and windows of recent samples are views into the store rather than
+    copies.
+
+    Each sample is written twice, `capacity` samples apart, so the most recent `n` samples of a
+    channel are always contiguous in memory.
+    """
+
+    def __init__(self, num_channels: int, capacity: int):
+        """
+        Creates a StatusRingBuffer class instance.
+
+        Parameters
+        ----------
+        num_channels : int
+            The number of channels, e.g. `CyclerInterface.get_num_channels()`.
+        capacity : int
+            How many samples are kept per channel. Older samples are overwritten.
+        """
+        self.__capacity = capacity
+        self.__samples = np.zeros((num_channels, 2 * capacity), dtype=sample_dtype)
+        self.__positions = np.zeros(num_channels, dtype=np.intp)
+        self.__counts = np.zeros(num_channels, dtype=np.intp)
+
+    def get_capacity(self) -> int:
+        '''
+        Returns how many samples are kept per channel.
+        '''
+        return self.__capacity
+
+    def get_count(self, channel: int) -> int:
+        """
+        Returns how many samples of `channel` are stored, at most the capacity.
+        """
+        return int(self.__counts[channel - 1])
+
+    def append(self, channel: int, status):
+        """
+        Appends a status sample of one channel.
+
+        Parameters
+        ----------
+        channel : int
+            The channel of the sample.
+        status : ChannelStatus or dict
+            The status, e.g. from `CyclerInterface.read_channel_status()`.
+        """
+        self.append_statuses(statuses_from_dicts([dict(status, Chan=channel)]))
+
+    def append_statuses(self, statuses: np.ndarray):
+        """
+        Appends one status sample of each of several channels.
+
+        Parameters
+        ----------
+        statuses : np.ndarray
+            A structured array of statuses with distinct channels, e.g. from
+            `CyclerInterface.read_channel_statuses()`.
+        """
+        indices = statuses['Chan'].astype(np.intp) - 1
+        samples = np.empty(len(statuses), dtype=sample_dtype)
+        for name in sample_dtype.names:
+            samples[name] = statuses[name]
+        self.__write(indices, samples)
+
+    def window(self, channel: int, num_samples: int = None, duration_s: float = None) -> np.ndarray:
+        """
+        Returns the most recent samples of a channel, oldest first. The result is a view into the
+        buffer, which later appends overwrite once the buffer wraps around. Copy it to keep it.
+
+        Parameters
+        ----------
+        channel : int
+            The channel.
+        num_samples : int
+            Only return this many of the most recent samples.
+        duration_s : float
+            Only return samples whose `TesterTime` is within `duration_s` seconds of the most
+            recent sample.
+
+        Returns
+        -------
+        samples : np.ndarray
+            The samples, see `sample_dtype`.
+        """
+        index = channel - 1
+        count = self.__counts[index]
+        if num_samples is not None:
+            count = min(count, num_samples)
+        end = self.__positions[index] + self.__capacity
+        samples = self.__samples[index, end - count:end]
+
+        if duration_s is not None and len(samples):
+            since = samples['TesterTime'][-1] - np.timedelta64(int(duration_s * 1000), 'ms')
+            samples = samples[np.searchsorted(samples['TesterTime'], since, side='left'):]
+        return samples
+
+    def latest(self, channel: int):
+        """
+        Returns the most recent sample of a channel, None if there is none.
+        """
+        if self.__counts[channel - 1] == 0:
+            return None
+        return self.__samples[channel - 1, self.__positions[channel - 1] + self.__capacity - 1]
+
+    def __write(self, indices: np.ndarray, samples: np.ndarray):
+        """
+        Writes one sample per channel index at the channel's position, and again `capacity`
+        samples later.
+        """
+        positions = self.__positions[indices]
+        self.__samples[indices, positions] = samples
+        self.__samples[indices, positions + self.__capacity] = samples
+        self.__positions[indices] = (positions + 1) % self.__capacity
+        self.__counts[indices] = np.minimum(self.__counts[indices] + 1, self.__capacity)
@@ -0,0 +1,1500 @@
+import time
+import socket
+import asyncio
+import logging
+import functools
+import itertools
+import threading
+
+import numpy as np
+
+import pymacnet.messages
+from . import codec
+from .messages import binary, all_selected_chan
+from .framing import FrameDecoder
+from .metrics import SessionMetrics
+from .hooks import RequestInfo, _call_hooks, _finish_request, _fail_request
+
+logger = logging.getLogger(__name__)
+
+# Placeholder for requests that have been sent but not yet answered.
+_AWAITING_REPLY = object()
+
+
+class MacNetSession():
+    """
+    Owns the connection to a Maccor server and the cycler metadata read over it. Any number of
+    `CyclerInterface` and `ChannelInterface` instances can share one session, so a full rack of
+    channels needs only one JSON socket, one binary socket and one `read_general_info` request.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Creates a MacNetSession class instance. No connection is made until `connect()` is called.
+
+        Parameters
+        ----------
+        config : dict
+            A configuration dictionary. Same keys as the `CyclerInterface` configuration.
+        """
+        self.__config = config
+        self.__msg_buffer_size_bytes = config['msg_buffer_size_bytes']
+
+        # Book keeping for matching pipelined JSON replies back to their requests.
+        self.__max_outstanding_requests = max(
+            1, config.get('max_outstanding_requests', 1))
+        self.__msg_ids = itertools.count(1)
+        self.__json_msg_cond = threading.Condition()
+        self.__pending_replies = {}
+        self.__num_in_flight = 0
+        self.__reply_reader_active = False
+        self.__json_frame_decoder = FrameDecoder(self.__msg_buffer_size_bytes)
+        # Message type, size and send time of each request awaiting its reply.
+        self.__sent_msgs = {}
+        self.__metrics = SessionMetrics(config.get('metrics_window', 1024))
+        # Replaced rather than modified, so a request keeps the hooks it started with.
+        self.__hooks = []
+
+        self.__bin_msg_lock = threading.Lock()
+        self.__json_msg_socket = None
+        self.__bin_msg_socket = None
+
+        self.__general_info = None
+        self.__general_info_lock = threading.Lock()
+
+    def connect(self) -> bool:
+        """
+        Creates the connection with the Maccor server.
+
+        Returns
+        -------
+        success : bool
+            True or False based on whether the connection was created successfully.
+        """
+        return self.__create_connection(
+            ip=self.__config['server_ip'], json_msg_port=self.__config['json_msg_port'],
+            bin_msg_port=self.__config['bin_msg_port'])
+
+    def close(self):
+        """
+        Closes the connection with the Maccor server.
+        """
+        with self.__json_msg_cond:
+            self.__fail_pending_replies()
+            for sock in (self.__json_msg_socket, self.__bin_msg_socket):
+                if sock:
+                    sock.close()
+            self.__json_msg_socket = None
+            self.__bin_msg_socket = None
+
+    def get_config(self) -> dict:
+        '''
+        Returns the configuration the session was created with.
+        '''
+        return self.__config
+
+    def get_metrics(self) -> SessionMetrics:
+        """
+        Returns the request metrics of the session, e.g. `get_metrics().snapshot()` or
+        `get_metrics().to_prometheus()`.
+        """
+        return self.__metrics
+
+    def add_request_hooks(self, hooks):
+        """
+        Registers hooks to be called on the lifecycle of every request sent through the session.
+
+        Parameters
+        ----------
+        hooks : RequestHooks
+            The hooks.
+        """
+        self.__hooks = self.__hooks + [hooks]
+
+    def remove_request_hooks(self, hooks):
+        """
+        Unregisters hooks added with `add_request_hooks`.
+
+        Parameters
+        ----------
+        hooks : RequestHooks
+            The hooks.
+        """
+        self.__hooks = [registered for registered in self.__hooks if registered is not hooks]
+
+    def get_general_info(self) -> dict:
+        """
+        Returns the general system info of the cycler, MacNet message (1,2). It is only requested
+        from the cycler the first time it is needed.
+
+        Returns
+        -------
+        general_info : dict
+            The general information for the cycler. Returns None if there is an issue.
+        """
+        with self.__general_info_lock:
+            if not self.__general_info:
+                rx_msg = self.send_receive_encoded_msg(
+                    pymacnet.messages.tx_general_info_encoder)
+                if rx_msg:
+                    self.__general_info = rx_msg['result']
+                else:
+                    logger.error("Failed to read system info!")
+            return self.__general_info
+
+    def send_receive_json_msg(self, outgoing_msg_dict) -> dict:
+        """
+        Sends and receives a JSON message to/from the Maccor server.
+
+        Parameters
+        ----------
+        msg_outgoing_dict : dict
+            A dictionary containing the message to be sent.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return self.send_receive_json_msgs([outgoing_msg_dict])[0]
+
+    def send_receive_json_msgs(self, outgoing_msg_dicts: list) -> list:
+        """
+        Sends several JSON messages to the Maccor server and collects their replies. Up to
+        `max_outstanding_requests` messages are kept in flight at once and each reply is
+        routed back to its request using the JSON-RPC `id`. Safe to call from several threads.
+
+        Parameters
+        ----------
+        outgoing_msg_dicts : list
+            A list of dictionaries containing the messages to be sent.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msg_dicts`. An entry is None
+            if there was an issue with that message.
+        """
+        return self.__send_receive_packed_msgs(
+            [functools.partial(_pack_json_msg, msg) for msg in outgoing_msg_dicts],
+            [_json_msg_type(msg) for msg in outgoing_msg_dicts])
+
+    def send_receive_encoded_msg(self, encoder, params: dict = None) -> dict:
+        """
+        Sends a message using a compiled encoder from `pymacnet.messages` and receives the reply.
+        Avoids copying and serializing the full message template on every request.
+
+        Parameters
+        ----------
+        encoder : pymacnet.messages.MessageEncoder
+            The compiled message to send.
+        params : dict
+            Values for the variable fields of the message, e.g. `{'Chan': 1}`.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return self.send_receive_encoded_msgs([(encoder, params)])[0]
+
+    def send_receive_encoded_msgs(self, outgoing_msgs: list) -> list:
+        """
+        Sends several messages using compiled encoders and collects their replies. Pipelined in
+        the same way as `send_receive_json_msgs`.
+
+        Parameters
+        ----------
+        outgoing_msgs : list
+            A list of `(encoder, params)` pairs.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msgs`. An entry is None if
+            there was an issue with that message.
+        """
+        return self.__send_receive_packed_msgs(
+            [functools.partial(_pack_encoded_msg, encoder, params) for encoder, params in outgoing_msgs],
+            [(encoder.fclass, encoder.fnum) for encoder, _ in outgoing_msgs])
+
+    def __send_receive_packed_msgs(self, packers: list, msg_types: list) -> list:
+        """
+        Sends JSON messages to the Maccor server and collects their replies.
+
+        Parameters
+        ----------
+        packers : list
+            For each message, a callable that takes the JSON-RPC id and returns the packed message.
+        msg_types : list
+            The `(FClass, FNum)` of each message, for the metrics.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `packers`. An entry is None if there was
+            an issue with that message.
+        """
+
+        hooks = self.__hooks
+        if self.__json_msg_socket:
+            pass
+        else:
+            logger.error(
+                "__json_msg_socket connection does not exist!", exc_info=True)
+            for msg_type in msg_types:
+                self.__metrics.record_error('json', msg_type)
+                if hooks:
+                    _fail_request(hooks, RequestInfo('json', msg_type), "Connection does not exist")
+            return [None] * len(packers)
+
+        msg_ids = []
+        with self.__json_msg_cond:
+            for pack, msg_type in zip(packers, msg_types):
+                msg_id = next(self.__msg_ids)
+                msg_ids.append(msg_id)
+                request = RequestInfo('json', msg_type, msg_id) if hooks else None
+                if request:
+                    request.encode_at = time.monotonic()
+                    _call_hooks(hooks, 'before_encode', request)
+
+                try:
+                    msg_outgoing_packed = pack(msg_id)
+                except Exception as e:
+                    logger.error("Error packing outgoing message!", exc_info=True)
+                    logger.error(e)
+                    self.__pending_replies[msg_id] = None
+                    self.__metrics.record_error('json', msg_type)
+                    _fail_request(hooks, request, "Error packing outgoing message")
+                    continue
+
+                # Wait for a free slot in the pipeline before sending.
+                if not self.__wait_for_replies(
+                        lambda: self.__num_in_flight < self.__max_outstanding_requests):
+                    self.__pending_replies[msg_id] = None
+                    self.__metrics.record_error('json', msg_type)
+                    _fail_request(hooks, request, "Connection failed while waiting to send")
+                    continue
+
+                try:
+                    sent_at = time.monotonic()
+                    self.__json_msg_socket.sendall(msg_outgoing_packed)
+                except Exception as e:
+                    logger.error("Error sending message!", exc_info=True)
+                    logger.error(e)
+                    self.__pending_replies[msg_id] = None
+                    self.__metrics.record_error('json', msg_type)
+                    _fail_request(hooks, request, "Error sending message")
+                    self.__fail_pending_replies()
+                    self.__reconnect()
+                    continue
+
+                self.__pending_replies[msg_id] = _AWAITING_REPLY
+                self.__sent_msgs[msg_id] = (msg_type, len(msg_outgoing_packed), sent_at, request, hooks)
+                self.__num_in_flight += 1
+                if request:
+                    request.sent_at = time.monotonic()
+                    _call_hooks(hooks, 'after_send', request)
+
+            self.__wait_for_replies(lambda: all(
+                self.__pending_replies[msg_id] is not _AWAITING_REPLY for msg_id in msg_ids))
+
+            return [self.__pending_replies.pop(msg_id) for msg_id in msg_ids]
+
+    def send_receive_bin_msg(self, msg_outgoing_bytes: bytes) -> bytes:
+        """
+        Sends a binary message to the Maccor server and receives the response.
+
+        Parameters
+        ----------
+        msg_outgoing_bytes : bytes
+            The packed binary message.
+
+        Returns
+        -------
+        response : bytes
+            The complete response message, header included. Returns None if there is an issue.
+        """
+        return self.send_receive_bin_msgs([msg_outgoing_bytes])[0]
+
+    def send_receive_bin_msgs(self, msgs_outgoing_bytes: list, receive_times: list = None) -> list:
+        """
+        Sends several binary messages to the Maccor server back to back and receives their
+        responses, which arrive in the order the messages were sent. Safe to call from several threads.
+
+        Parameters
+        ----------
+        msgs_outgoing_bytes : list
+            The packed binary messages.
+        receive_times : list
+            If given, the `time.monotonic()` at which each response was received is appended.
+
+        Returns
+        -------
+        responses : list
+            The complete response messages in the same order as `msgs_outgoing_bytes`. An entry
+            is None if there was an issue with that message.
+        """
+        responses = []
+        hooks = self.__hooks
+        requests = _bin_requests(hooks, msgs_outgoing_bytes)
+        with self.__bin_msg_lock:
+            if not self.__bin_msg_socket:
+                logger.error(
+                    "__bin_msg_socket connection does not exist!", exc_info=True)
+                _record_bin_errors(self.__metrics, msgs_outgoing_bytes, sent=False)
+                _fail_requests(hooks, requests, "Connection does not exist")
+            else:
+                try:
+                    sent_at = time.monotonic()
+                    self.__bin_msg_socket.sendall(b''.join(msgs_outgoing_bytes))
+                    _sent_requests(hooks, requests)
+                    for i, msg_outgoing_bytes in enumerate(msgs_outgoing_bytes):
+                        response = self.__receive_bin_msg()
+                        received_at = time.monotonic()
+                        responses.append(response)
+                        self.__metrics.record_request(
+                            'binary', _bin_msg_type(msg_outgoing_bytes), received_at - sent_at,
+                            len(msg_outgoing_bytes), len(response))
+                        if requests:
+                            requests[i].received_at = requests[i].decoded_at = received_at
+                            _finish_request(hooks, requests[i], response)
+                        if receive_times is not None:
+                            receive_times.append(received_at)
+                except socket.timeout:
+                    logger.error(
+                        "Timeout on receiving message from Maccor server!", exc_info=True)
+                    self.__metrics.record_timeout()
+                    _record_bin_errors(self.__metrics, msgs_outgoing_bytes[len(responses):])
+                    _fail_requests(hooks, requests[len(responses):], "Timeout on receiving reply")
+                    self.__reconnect_bin()
+                except Exception as e:
+                    logger.error(
+                        "Error sending or receiving binary message!", exc_info=True)
+                    logger.error(e)
+                    _record_bin_errors(self.__metrics, msgs_outgoing_bytes[len(responses):])
+                    _fail_requests(hooks, requests[len(responses):], "Error sending or receiving message")
+                    self.__reconnect_bin()
+
+        return responses + [None] * (len(msgs_outgoing_bytes) - len(responses))
+
+    def __receive_bin_msg(self) -> bytes:
+        """
+        Receives a single binary message. The header is read first to find out how much data follows.
+
+        Returns
+        -------
+        msg_incoming_bytes : bytes
+            The complete message, header included.
+        """
+        header = self.__recv_bin_exactly(binary.header_struct.size)
+        fclass, fnum, _, length = binary.unpack_header(header)
+        return header + self.__recv_bin_exactly(binary.reply_data_size(fclass, fnum, length))
+
+    def __recv_bin_exactly(self, num_bytes: int) -> bytes:
+        """
+        Receives exactly `num_bytes` bytes from the binary socket.
+        """
+        buffer = bytearray(num_bytes)
+        view = memoryview(buffer)
+        received = 0
+        while received < num_bytes:
+            num_received = self.__bin_msg_socket.recv_into(view[received:])
+            if not num_received:
+                raise ConnectionError("Connection closed by Maccor server!")
+            received += num_received
+        return bytes(buffer)
+
+    def __wait_for_replies(self, predicate) -> bool:
+        """
+        Reads replies off the JSON socket until `predicate` is satisfied. Only one thread reads
+        from the socket at a time, the others wait to be handed their replies. Must be called
+        while holding `__json_msg_cond`.
+
+        Parameters
+        ----------
+        predicate : callable
+            Returns True once the caller can stop waiting.
+
+        Returns
+        ----------
+        success : bool
+            False if the connection failed while waiting.
+        """
+        while not predicate():
+            if self.__reply_reader_active:
+                self.__json_msg_cond.wait()
+                continue
+            if self.__num_in_flight == 0:
+                # Nothing in flight that could ever satisfy the predicate.
+                return predicate()
+
+            self.__reply_reader_active = True
+            self.__json_msg_cond.release()
+            try:
+                msg_incoming_dict, num_bytes, received_at, decoded_at = self.__receive_json_msg()
+            finally:
+                self.__json_msg_cond.acquire()
+                self.__reply_reader_active = False
+                self.__json_msg_cond.notify_all()
+
+            if msg_incoming_dict is None:
+                self.__fail_pending_replies()
+                self.__reconnect()
+                return predicate()
+
+            self.__route_reply(msg_incoming_dict, num_bytes, received_at, decoded_at)
+
+        return True
+
+    def __receive_json_msg(self) -> dict:
+        """
+        Receives a single CRLF terminated JSON message from the Maccor server. Any bytes
+        following the terminator are kept by the frame decoder for the next message.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message. None if there is an issue.
+        num_bytes : int
+            The size of the message, terminator included.
+        received_at : float
+            The `time.monotonic()` at which the message was received.
+        decoded_at : float
+            The `time.monotonic()` at which the message was decoded.
+        """
+        try:
+            msg_incoming_packed = self.__json_frame_decoder.recv_frame(
+                self.__json_msg_socket)
+        except socket.timeout:
+            logger.error(
+                "Timeout on receiving message from Maccor server!", exc_info=True)
+            self.__metrics.record_timeout()
+            return None, 0, None, None
+        except Exception as e:
+            logger.error("Error receiving message!", exc_info=True)
+            logger.error(e)
+            return None, 0, None, None
+
+        received_at = time.monotonic()
+        num_bytes = len(msg_incoming_packed) + 2
+        try:
+            msg_incoming_dict = _unpack_json_msg(msg_incoming_packed)
+        except Exception as e:
+            logger.error("Error unpacking incoming message!", exc_info=True)
+            logger.error("Message: " + str(bytes(msg_incoming_packed)))
+            logger.error(e)
+            return {}, num_bytes, received_at, None
+
+        return msg_incoming_dict, num_bytes, received_at, time.monotonic()
+
+    def __route_reply(self, msg_incoming_dict: dict, num_bytes: int, received_at: float,
+                      decoded_at: float):
+        """
+        Hands a received reply to the request with the matching id. Must be called while
+        holding `__json_msg_cond`.
+
+        Parameters
+        ----------
+        msg_incoming_dict : dict
+            The received reply.
+        num_bytes : int
+            The size of the received reply.
+        received_at : float
+            When the reply was received.
+        decoded_at : float
+            When the reply was decoded. None if it could not be decoded.
+        """
+        awaiting_ids = [msg_id for msg_id, reply in self.__pending_replies.items()
+                        if reply is _AWAITING_REPLY]
+
+        msg_id = msg_incoming_dict.get('id') if isinstance(
+            msg_incoming_dict, dict) else None
+        if msg_id not in awaiting_ids:
+            if len(awaiting_ids) == 1:
+                # Replies that can't be matched by id must belong to the only request in flight.
+                msg_id = awaiting_ids[0]
+            else:
+                logger.error(
+                    f"Received reply with unknown id {msg_id}! Discarding it.")
+                return
+
+        # Unpacking errors are stored as empty replies so the caller sees a failure.
+        self.__pending_replies[msg_id] = msg_incoming_dict if msg_incoming_dict else None
+        self.__num_in_flight -= 1
+
+        msg_type, bytes_sent, sent_at, request, hooks = self.__sent_msgs.pop(msg_id)
+        if msg_incoming_dict:
+            self.__metrics.record_request(
+                'json', msg_type, received_at - sent_at, bytes_sent, num_bytes)
+        else:
+            self.__metrics.record_error('json', msg_type, bytes_sent)
+        if request:
+            request.received_at = received_at
+            request.decoded_at = decoded_at
+            if not msg_incoming_dict:
+                request.error = "Error unpacking reply"
+            _finish_request(hooks, request, msg_incoming_dict)
+
+    def __fail_pending_replies(self):
+        """
+        Marks every request still waiting for a reply as failed. Must be called while
+        holding `__json_msg_cond`.
+        """
+        for msg_id, reply in self.__pending_replies.items():
+            if reply is _AWAITING_REPLY:
+                self.__pending_replies[msg_id] = None
+                msg_type, bytes_sent, _, request, hooks = self.__sent_msgs.pop(msg_id)
+                self.__metrics.record_error('json', msg_type, bytes_sent)
+                _fail_request(hooks, request, "Connection failed before the reply was received")
+        self.__num_in_flight = 0
+        self.__json_frame_decoder.reset()
+
+    def __create_connection(self, ip: str, json_msg_port: int, bin_msg_port: int) -> bool:
+        """
+        Creates a connection with Maccor server to send/receive JSON and binary messages.
+
+        Parameters
+        ----------
+        ip : str
+            The IP address of the Maccor server.
+        json_msg_port : int
+            The TCP port use for JSON message communication.
+        bin_msg_port :
+            The TCP port used for binary message communication
+
+        Returns
+        ----------
+        success : bool
+            True or False based on whether the connection was created successfully
+        """
+        try:
+            self.__json_msg_socket = _create_socket(ip, json_msg_port)
+        except Exception as e:
+            logger.error(
+                "Failed to create JSON message socket!", exc_info=True)
+            logger.error(e)
+            return False
+        try:
+            self.__bin_msg_socket = _create_socket(ip, bin_msg_port)
+        except Exception as e:
+            logger.error(
+                "Failed to create binary message socket!", exc_info=True)
+            logger.error(e)
+            return False
+
+        return True
+
+    def __reconnect(self):
+        """
+        Reconnects to the Maccor server. Must be called while holding `__json_msg_cond`.
+        """
+        logger.warning("Reconnecting to Maccor server...")
+        self.__metrics.record_reconnect()
+        # Don't pull the binary socket from under a binary request in progress.
+        with self.__bin_msg_lock:
+            for sock in (self.__json_msg_socket, self.__bin_msg_socket):
+                if sock:
+                    sock.close()
+            self.__create_connection(
+                ip=self.__config['server_ip'], json_msg_port=self.__config['json_msg_port'],
+                bin_msg_port=self.__config['bin_msg_port'])
+
+    def __reconnect_bin(self):
+        """
+        Reconnects the binary message socket, e.g. after a partially received message. Must be
+        called while holding `__bin_msg_lock`.
+        """
+        logger.warning("Reconnecting binary message socket to Maccor server...")
+        self.__metrics.record_reconnect()
+        if self.__bin_msg_socket:
+            self.__bin_msg_socket.close()
+        try:
+            self.__bin_msg_socket = _create_socket(
+                self.__config['server_ip'], self.__config['bin_msg_port'])
+        except Exception as e:
+            logger.error(
+                "Failed to create binary message socket!", exc_info=True)
+            logger.error(e)
+            self.__bin_msg_socket = None
+
+
+class AsyncMacNetSession():
+    """
+    Asyncio version of `MacNetSession`. Owns the connection to a Maccor server and the cycler
+    metadata read over it, and can be shared by any number of `AsyncCyclerInterface` and
+    `AsyncChannelInterface` instances.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Creates an AsyncMacNetSession class instance. No connection is made until `connect()` is awaited.
+
+        Parameters
+        ----------
+        config : dict
+            A configuration dictionary. Same keys as the `CyclerInterface` configuration.
+        """
+        self.__config = config
+        self.__max_outstanding_requests = max(
+            1, config.get('max_outstanding_requests', 1))
+        self.__msg_timeout_s = 2
+
+        self.__msg_ids = itertools.count(1)
+        self.__pending_replies = {}
+        self.__general_info = None
+        self.__metrics = SessionMetrics(config.get('metrics_window', 1024))
+        self.__hooks = []
+
+        self.__json_msg_reader = None
+        self.__json_msg_writer = None
+        self.__bin_msg_reader = None
+        self.__bin_msg_writer = None
+        self.__reply_reader_task = None
+        self.__request_slots = None
+        self.__bin_msg_lock = None
+        self.__reconnect_lock = None
+        self.__general_info_lock = None
+
+    async def connect(self) -> bool:
+        """
+        Creates the connection with the Maccor server.
+
+        Returns
+        -------
+        success : bool
+            True or False based on whether the connection was created successfully.
+        """
+        self.__request_slots = asyncio.Semaphore(
+            self.__max_outstanding_requests)
+        self.__bin_msg_lock = asyncio.Lock()
+        self.__reconnect_lock = asyncio.Lock()
+        self.__general_info_lock = asyncio.Lock()
+
+        return await self.__create_connection(
+            ip=self.__config['server_ip'], json_msg_port=self.__config['json_msg_port'],
+            bin_msg_port=self.__config['bin_msg_port'])
+
+    async def close(self):
+        """
+        Closes the connection with the Maccor server.
+        """
+        if self.__reply_reader_task:
+            self.__reply_reader_task.cancel()
+            self.__reply_reader_task = None
+        self.__fail_pending_replies()
+        for writer in (self.__json_msg_writer, self.__bin_msg_writer):
+            if writer:
+                writer.close()
+        self.__json_msg_writer = None
+        self.__bin_msg_writer = None
+
+    def get_config(self) -> dict:
+        '''
+        Returns the configuration the session was created with.
+        '''
+        return self.__config
+
+    def get_metrics(self) -> SessionMetrics:
+        """
+        Returns the request metrics of the session. Same as for `MacNetSession`.
+        """
+        return self.__metrics
+
+    def add_request_hooks(self, hooks):
+        """
+        Registers hooks to be called on the lifecycle of every request. Same as for `MacNetSession`.
+        """
+        self.__hooks = self.__hooks + [hooks]
+
+    def remove_request_hooks(self, hooks):
+        """
+        Unregisters hooks added with `add_request_hooks`.
+        """
+        self.__hooks = [registered for registered in self.__hooks if registered is not hooks]
+
+    async def get_general_info(self) -> dict:
+        """
+        Returns the general system info of the cycler, MacNet message (1,2). It is only requested
+        from the cycler the first time it is needed.
+
+        Returns
+        -------
+        general_info : dict
+            The general information for the cycler. Returns None if there is an issue.
+        """
+        async with self.__general_info_lock:
+            if not self.__general_info:
+                rx_msg = await self.send_receive_encoded_msg(
+                    pymacnet.messages.tx_general_info_encoder)
+                if rx_msg:
+                    self.__general_info = rx_msg['result']
+                else:
+                    logger.error("Failed to read system info!")
+            return self.__general_info
+
+    async def send_receive_json_msg(self, outgoing_msg_dict) -> dict:
+        """
+        Sends and receives a JSON message to/from the Maccor server. Many coroutines may call
+        this at once; up to `max_outstanding_requests` messages are kept in flight and each
+        reply is routed back to its request using the JSON-RPC `id`.
+
+        Parameters
+        ----------
+        msg_outgoing_dict : dict
+            A dictionary containing the message to be sent.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return await self.__send_receive_packed_msg(
+            functools.partial(_pack_json_msg, outgoing_msg_dict), _json_msg_type(outgoing_msg_dict))
+
+    async def send_receive_json_msgs(self, outgoing_msg_dicts: list) -> list:
+        """
+        Sends several JSON messages to the Maccor server concurrently and collects their replies.
+
+        Parameters
+        ----------
+        outgoing_msg_dicts : list
+            A list of dictionaries containing the messages to be sent.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msg_dicts`. An entry is None
+            if there was an issue with that message.
+        """
+        return list(await asyncio.gather(
+            *[self.send_receive_json_msg(msg) for msg in outgoing_msg_dicts]))
+
+    async def send_receive_encoded_msg(self, encoder, params: dict = None) -> dict:
+        """
+        Sends a message using a compiled encoder from `pymacnet.messages` and receives the reply.
+
+        Parameters
+        ----------
+        encoder : pymacnet.messages.MessageEncoder
+            The compiled message to send.
+        params : dict
+            Values for the variable fields of the message, e.g. `{'Chan': 1}`.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        return await self.__send_receive_packed_msg(
+            functools.partial(_pack_encoded_msg, encoder, params), (encoder.fclass, encoder.fnum))
+
+    async def send_receive_encoded_msgs(self, outgoing_msgs: list) -> list:
+        """
+        Sends several messages using compiled encoders concurrently and collects their replies.
+
+        Parameters
+        ----------
+        outgoing_msgs : list
+            A list of `(encoder, params)` pairs.
+
+        Returns
+        ----------
+        msg_incoming_dicts : list
+            The message responses in the same order as `outgoing_msgs`. An entry is None if
+            there was an issue with that message.
+        """
+        return list(await asyncio.gather(
+            *[self.send_receive_encoded_msg(encoder, params) for encoder, params in outgoing_msgs]))
+
+    async def __send_receive_packed_msg(self, pack, msg_type: tuple) -> dict:
+        """
+        Sends a JSON message to the Maccor server and waits for the reply with the matching id.
+
+        Parameters
+        ----------
+        pack : callable
+            Takes the JSON-RPC id and returns the packed message.
+        msg_type : tuple
+            The `(FClass, FNum)` of the message, for the metrics.
+
+        Returns
+        ----------
+        msg_incoming_dict : dict
+            A dictionary containing the message response. Returns None if there is an issue.
+        """
+        hooks = self.__hooks
+        msg_id = next(self.__msg_ids)
+        request = RequestInfo('json', msg_type, msg_id) if hooks else None
+        msg_incoming_dict = await self.__send_receive_packed_msg_with_request(
+            pack, msg_type, msg_id, request)
+        if request:
+            _finish_request(hooks, request, msg_incoming_dict)
+        return msg_incoming_dict
+
+    async def __send_receive_packed_msg_with_request(self, pack, msg_type: tuple, msg_id: int,
+                                                     request: RequestInfo) -> dict:
+        """
+        Does the work of `__send_receive_packed_msg`, recording the progress of the message in
+        `request` if hooks are registered.
+        """
+        hooks = self.__hooks
+        if not self.__json_msg_writer:
+            logger.error("JSON message connection does not exist!")
+            self.__metrics.record_error('json', msg_type)
+            if request:
+                request.error = "Connection does not exist"
+            return None
+
+        if request:
+            request.encode_at = time.monotonic()
+            _call_hooks(hooks, 'before_encode', request)
+        try:
+            msg_outgoing_packed = pack(msg_id)
+        except Exception as e:
+            logger.error("Error packing outgoing message!", exc_info=True)
+            logger.error(e)
+            self.__metrics.record_error('json', msg_type)
+            if request:
+                request.error = "Error packing outgoing message"
+            return None
+
+        async with self.__request_slots:
+            reply = asyncio.get_event_loop().create_future()
+            self.__pending_replies[msg_id] = reply
+            writer = self.__json_msg_writer
+            try:
+                sent_at = time.monotonic()
+                writer.write(msg_outgoing_packed)
+                await writer.drain()
+            except Exception as e:
+                logger.error("Error sending message!", exc_info=True)
+                logger.error(e)
+                self.__pending_replies.pop(msg_id, None)
+                self.__metrics.record_error('json', msg_type)
+                if request:
+                    request.error = "Error sending message"
+                await self.__reconnect(writer)
+                return None
+            if request:
+                request.sent_at = time.monotonic()
+                _call_hooks(hooks, 'after_send', request)
+
+            try:
+                msg_incoming_dict, num_bytes, received_at, decoded_at = await asyncio.wait_for(
+                    reply, self.__msg_timeout_s)
+            except asyncio.TimeoutError:
+                logger.error(
+                    "Timeout on receiving message from Maccor server!")
+                self.__metrics.record_timeout()
+                self.__metrics.record_error('json', msg_type, len(msg_outgoing_packed))
+                if request:
+                    request.error = "Timeout on receiving reply"
+                await self.__reconnect(writer)
+                return None
+            finally:
+                self.__pending_replies.pop(msg_id, None)
+
+        if request:
+            request.received_at = received_at
+            request.decoded_at = decoded_at
+        if msg_incoming_dict:
+            self.__metrics.record_request(
+                'json', msg_type, received_at - sent_at, len(msg_outgoing_packed), num_bytes)
+        else:
+            self.__metrics.record_error('json', msg_type, len(msg_outgoing_packed))
+            if request and received_at is not None:
+                request.error = "Error unpacking reply"
+        return msg_incoming_dict
+
+    async def send_receive_bin_msg(self, msg_outgoing_bytes: bytes) -> bytes:
+        """
+        Sends a binary message to the Maccor server and receives the response.
+
+        Parameters
+        ----------
+        msg_outgoing_bytes : bytes
+            The packed binary message.
+
+        Returns
+        -------
+        response : bytes
+            The complete response message, header included. Returns None if there is an issue.
+        """
+        return (await self.send_receive_bin_msgs([msg_outgoing_bytes]))[0]
+
+    async def send_receive_bin_msgs(self, msgs_outgoing_bytes: list, receive_times: list = None) -> list:
+        """
+        Sends several binary messages to the Maccor server back to back and receives their
+        responses, which arrive in the order the messages were sent.
+
+        Parameters
+        ----------
+        msgs_outgoing_bytes : list
+            The packed binary messages.
+        receive_times : list
+            If given, the `time.monotonic()` at which each response was received is appended.
+
+        Returns
+        -------
+        responses : list
+            The complete response messages in the same order as `msgs_outgoing_bytes`. An entry
+            is None if there was an issue with that message.
+        """
+        responses = []
+        hooks = self.__hooks
+        requests = _bin_requests(hooks, msgs_outgoing_bytes)
+        async with self.__bin_msg_lock:
+            if not self.__bin_msg_writer:
+                logger.error("Binary message connection does not exist!")
+                _record_bin_errors(self.__metrics, msgs_outgoing_bytes, sent=False)
+                _fail_requests(hooks, requests, "Connection does not exist")
+            else:
+                try:
+                    sent_at = time.monotonic()
+                    self.__bin_msg_writer.write(b''.join(msgs_outgoing_bytes))
+                    await self.__bin_msg_writer.drain()
+                    _sent_requests(hooks, requests)
+                    for i, msg_outgoing_bytes in enumerate(msgs_outgoing_bytes):
+                        response = await asyncio.wait_for(
+                            self.__receive_bin_msg(), self.__msg_timeout_s)
+                        received_at = time.monotonic()
+                        responses.append(response)
+                        self.__metrics.record_request(
+                            'binary', _bin_msg_type(msg_outgoing_bytes), received_at - sent_at,
+                            len(msg_outgoing_bytes), len(response))
+                        if requests:
+                            requests[i].received_at = requests[i].decoded_at = received_at
+                            _finish_request(hooks, requests[i], response)
+                        if receive_times is not None:
+                            receive_times.append(received_at)
+                except asyncio.TimeoutError:
+                    logger.error(
+                        "Timeout on receiving message from Maccor server!")
+                    self.__metrics.record_timeout()
+                    _record_bin_errors(self.__metrics, msgs_outgoing_bytes[len(responses):])
+                    _fail_requests(hooks, requests[len(responses):], "Timeout on receiving reply")
+                    await self.__reconnect_bin()
+                except Exception as e:
+                    logger.error(
+                        "Error sending or receiving binary message!", exc_info=True)
+                    logger.error(e)
+                    _record_bin_errors(self.__metrics, msgs_outgoing_bytes[len(responses):])
+                    _fail_requests(hooks, requests[len(responses):], "Error sending or receiving message")
+                    await self.__reconnect_bin()
+
+        return responses + [None] * (len(msgs_outgoing_bytes) - len(responses))
+
+    async def __receive_bin_msg(self) -> bytes:
+        """
+        Receives a single binary message. The header is read first to find out how much data follows.
+
+        Returns
+        -------
+        msg_incoming_bytes : bytes
+            The complete message, header included.
+        """
+        header = await self.__bin_msg_reader.readexactly(binary.header_struct.size)
+        fclass, fnum, _, length = binary.unpack_header(header)
+        return header + await self.__bin_msg_reader.readexactly(
+            binary.reply_data_size(fclass, fnum, length))
+
+    async def __read_replies(self):
+        """
+        Reads replies off the JSON connection for as long as it is open and hands each to the
+        request with the matching id.
+        """
+        while True:
+            try:
+                msg_incoming_packed = await self.__json_msg_reader.readuntil(b'\r\n')
+                received_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error receiving message!", exc_info=True)
+                logger.error(e)
+                self.__fail_pending_replies()
+                return
+
+            try:
+                msg_incoming_dict = _unpack_json_msg(
+                    memoryview(msg_incoming_packed)[:-2])
+                decoded_at = time.monotonic()
+            except Exception as e:
+                logger.error("Error unpacking incoming message!", exc_info=True)
+                logger.error("Message: " + str(msg_incoming_packed))
+                logger.error(e)
+                msg_incoming_dict = None
+                decoded_at = None
+
+            self.__route_reply(msg_incoming_dict, len(msg_incoming_packed), received_at, decoded_at)
+
+    def __route_reply(self, msg_incoming_dict: dict, num_bytes: int, received_at: float,
+                      decoded_at: float):
+        """
+        Hands a received reply to the request with the matching id.
+
+        Parameters
+        ----------
+        msg_incoming_dict : dict
+            The received reply. None if it could not be unpacked.
+        num_bytes : int
+            The size of the received reply.
+        received_at : float
+            When the reply was received.
+        decoded_at : float
+            When the reply was decoded. None if it could not be decoded.
+        """
+        awaiting = [msg_id for msg_id, reply in self.__pending_replies.items()
+                    if not reply.done()]
+
+        msg_id = msg_incoming_dict.get('id') if isinstance(
+            msg_incoming_dict, dict) else None
+        if msg_id not in awaiting:
+            if len(awaiting) == 1:
+                # Replies that can't be matched by id must belong to the only request in flight.
+                msg_id = awaiting[0]
+            else:
+                logger.error(
+                    f"Received reply with unknown id {msg_id}! Discarding it.")
+                return
+
+        self.__pending_replies[msg_id].set_result(
+            (msg_incoming_dict, num_bytes, received_at, decoded_at))
+
+    def __fail_pending_replies(self):
+        """
+        Marks every request still waiting for a reply as failed. Requests sent afterwards, e.g.
+        on a new connection, are tracked apart from the failed ones.
+        """
+        pending_replies, self.__pending_replies = self.__pending_replies, {}
+        for reply in pending_replies.values():
+            if not reply.done():
+                reply.set_result((None, 0, None, None))
+
+    async def __create_connection(self, ip: str, json_msg_port: int, bin_msg_port: int) -> bool:
+        """
+        Creates a connection with Maccor server to send/receive JSON and binary messages.
+
+        Parameters
+        ----------
+        ip : str
+            The IP address of the Maccor server.
+        json_msg_port : int
+            The TCP port use for JSON message communication.
+        bin_msg_port :
+            The TCP port used for binary message communication
+
+        Returns
+        ----------
+        success : bool
+            True or False based on whether the connection was created successfully
+        """
+        try:
+            logger.info(f'Creating connection to {ip}:{json_msg_port}')
+            self.__json_msg_reader, self.__json_msg_writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, json_msg_port), self.__msg_timeout_s)
+        except Exception as e:
+            logger.error(
+                "Failed to create JSON message connection!", exc_info=True)
+            logger.error(e)
+            return False
+        try:
+            logger.info(f'Creating connection to {ip}:{bin_msg_port}')
+            self.__bin_msg_reader, self.__bin_msg_writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, bin_msg_port), self.__msg_timeout_s)
+        except Exception as e:
+            logger.error(
+                "Failed to create binary message connection!", exc_info=True)
+            logger.error(e)
+            return False
+
+        self.__reply_reader_task = asyncio.ensure_future(self.__read_replies())
+
+        return True
+
+    async def __reconnect(self, json_msg_writer: asyncio.StreamWriter):
+        """
+        Reconnects to the Maccor server after a failure on the JSON connection of
+        `json_msg_writer`. Requests that fail together share one reconnect: once the connection
+        has been replaced, or closed, there is nothing left to do. Only the requests sent on the
+        failed connection are failed.
+        """
+        async with self.__reconnect_lock:
+            if json_msg_writer is not self.__json_msg_writer:
+                return
+            logger.warning("Reconnecting to Maccor server...")
+            self.__metrics.record_reconnect()
+            if self.__reply_reader_task:
+                self.__reply_reader_task.cancel()
+                self.__reply_reader_task = None
+            self.__fail_pending_replies()
+            json_msg_writer.close()
+            self.__json_msg_writer = None
+            # Don't pull the binary connection from under a binary request in progress.
+            async with self.__bin_msg_lock:
+                if self.__bin_msg_writer:
+                    self.__bin_msg_writer.close()
+                    self.__bin_msg_writer = None
+                await self.__create_connection(
+                    ip=self.__config['server_ip'], json_msg_port=self.__config['json_msg_port'],
+                    bin_msg_port=self.__config['bin_msg_port'])
+
+    async def __reconnect_bin(self):
+        """
+        Reconnects the binary message connection, e.g. after a partially received message. Must
+        be called while holding `__bin_msg_lock`.
+        """
+        logger.warning("Reconnecting binary message connection to Maccor server...")
+        self.__metrics.record_reconnect()
+        if self.__bin_msg_writer:
+            self.__bin_msg_writer.close()
+        try:
+            self.__bin_msg_reader, self.__bin_msg_writer = await asyncio.wait_for(
+                asyncio.open_connection(self.__config['server_ip'], self.__config['bin_msg_port']),
+                self.__msg_timeout_s)
+        except Exception as e:
+            logger.error(
+                "Failed to create binary message connection!", exc_info=True)
+            logger.error(e)
+            self.__bin_msg_writer = None
+
+
+def _create_socket(ip: str, port: int) -> socket.socket:
+    """
+    Creates a TCP connection to the Maccor server.
+
+    Parameters
+    ----------
+    ip : str
+        The IP address of the Maccor server.
+    port : int
+        The TCP port to connect to.
+
+    Returns
+    ----------
+    sock : socket.socket
+        The connected socket.
+    """
+    logger.info(f'Creating connection to {ip}:{port}')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.settimeout(2)
+    sock.connect((ip, port))
+    return sock
+
+
+def _json_msg_type(outgoing_msg_dict: dict) -> tuple:
+    """
+    Returns the `(FClass, FNum)` of a JSON message.
+    """
+    params = outgoing_msg_dict.get('params', {})
+    return (params.get('FClass'), params.get('FNum'))
+
+
+def _bin_msg_type(msg_outgoing_bytes: bytes) -> tuple:
+    """
+    Returns the `(FClass, FNum)` of a packed binary message.
+    """
+    return binary.unpack_header(msg_outgoing_bytes)[:2]
+
+
+def _record_bin_errors(metrics: SessionMetrics, msgs_outgoing_bytes: list, sent: bool = True):
+    """
+    Records binary messages that got no reply as failed requests.
+    """
+    for msg_outgoing_bytes in msgs_outgoing_bytes:
+        metrics.record_error('binary', _bin_msg_type(msg_outgoing_bytes),
+                             len(msg_outgoing_bytes) if sent else 0)
+
+
+def _bin_requests(hooks: list, msgs_outgoing_bytes: list) -> list:
+    """
+    Creates the `RequestInfo` of binary messages about to be sent and calls `before_encode` for
+    them. Empty if no hooks are registered.
+    """
+    if not hooks:
+        return []
+    requests = []
+    for msg_outgoing_bytes in msgs_outgoing_bytes:
+        request = RequestInfo('binary', _bin_msg_type(msg_outgoing_bytes))
+        request.encode_at = time.monotonic()
+        _call_hooks(hooks, 'before_encode', request)
+        requests.append(request)
+    return requests
+
+
+def _sent_requests(hooks: list, requests: list):
+    """
+    Calls `after_send` for binary messages that were sent.
+    """
+    sent_at = time.monotonic()
+    for request in requests:
+        request.sent_at = sent_at
+        _call_hooks(hooks, 'after_send', request)
+
+
+def _fail_requests(hooks: list, requests: list, error: str):
+    """
+    Calls `on_error` for binary messages that got no reply.
+    """
+    for request in requests:
+        _fail_request(hooks, request, error)
+
+
+def _pack_json_msg(outgoing_msg_dict: dict, msg_id: int) -> bytes:
+    """
+    Packs a JSON message for sending to the Maccor server. Takes care of channel zero indexing
+    and stamps the message with its JSON-RPC id.
+
+    Parameters
+    ----------
+    outgoing_msg_dict : dict
+        A dictionary containing the message to be sent. Modified in place.
+    msg_id : int
+        The JSON-RPC id to send the message with.
+
+    Returns
+    ----------
+    msg_outgoing_packed : bytes
+        The packed message.
+    """
+    # Take care of channel zero indexing on outgoing messages
+    if 'params' in outgoing_msg_dict:
+        _zero_index_params(outgoing_msg_dict['params'])
+    outgoing_msg_dict['id'] = msg_id
+
+    return codec.dumps(outgoing_msg_dict)
+
+
+def _pack_encoded_msg(encoder, params: dict, msg_id: int) -> bytes:
+    """
+    Packs a message using a compiled encoder. Takes care of channel zero indexing and stamps
+    the message with its JSON-RPC id.
+
+    Parameters
+    ----------
+    encoder : pymacnet.messages.MessageEncoder
+        The compiled message to send.
+    params : dict
+        Values for the variable fields of the message. Not modified.
+    msg_id : int
+        The JSON-RPC id to send the message with.
+
+    Returns
+    ----------
+    msg_outgoing_packed : bytes
+        The packed message.
+    """
+    # Take care of channel zero indexing on outgoing messages
+    if params and ('Chan' in params or 'Chans' in params):
+        params = dict(params)
+        _zero_index_params(params)
+
+    return encoder.encode(msg_id, params)
+
+
+def _zero_index_params(params: dict):
+    """
+    Converts the channel numbers of outgoing message parameters to MacNet's zero indexing, in
+    place. `all_selected_chan` is not a channel number and is left as it is.
+    """
+    if 'Chan' in params and params['Chan'] != all_selected_chan:
+        params['Chan'] -= 1
+    if 'Chans' in params:
+        params['Chans'] = [channel - 1 for channel in params['Chans']]
+
+
+def _unpack_json_msg(msg_incoming_packed) -> dict:
+    """
+    Unpacks a JSON message received from the Maccor server. Takes care of channel zero indexing.
+
+    Parameters
+    ----------
+    msg_incoming_packed : bytes-like
+        The received message without its terminator. May be a memoryview into a receive buffer.
+
+    Returns
+    ----------
+    msg_incoming_dict : dict
+        A dictionary containing the message.
+    """
+    msg_incoming_dict = codec.loads(msg_incoming_packed)
+
+    # Take care of channel zero indexing on incoming messages
+    if 'result' in msg_incoming_dict:
+        result = msg_incoming_dict['result']
+        if 'Chan' in result and result['Chan'] != all_selected_chan:
+            result['Chan'] += 1
+        if 'Chans' in result:
+            result['Chans'] = [channel + 1 for channel in result['Chans']]
+
+    return msg_incoming_dict
+
+
+def _pack_direct_output_bin_msg(channel: int, current_a: float, voltage_v: float, mode: str,
+                                current_range: int) -> bytes:
+    """
+    Packs a (6,8) set direct mode output binary message. Takes care of channel zero indexing.
+    Power and resistance are left at the values of `pymacnet.messages.tx_set_direct_output_msg`.
+
+    Parameters
+    ----------
+    channel : int
+        The channel to set the output of.
+    current_a : float
+        The current magnitude.
+    voltage_v : float
+        The voltage limit.
+    mode : str
+        'C' for charge, 'D' for discharge or 'R' for rest.
+    current_range : int
+        The current range, 1 to 4.
+
+    Returns
+    ----------
+    msg_outgoing_bytes : bytes
+        The packed binary message.
+    """
+    params = pymacnet.messages.tx_set_direct_output_msg['params']
+    return binary.pack_set_direct_output(channel - 1, current_a, voltage_v, params['Power'],
+                                         params['Resistance'], current_range, mode)
+
+
+# Upper current limits of current ranges 1 to 3, in amps. Larger currents use range 4.
+_current_range_limits_a = (0.000150, 0.005, 0.150)
+
+# Charge voltage limit of setpoints that don't give one, in volts. Well above any cell voltage, so
+# the charge is constant current until the voltage safety limit.
+_default_direct_output_voltage_v = 4900
+
+# MacNet replies "Command sent too fast" to (6, 8) messages sent less than 100 ms apart.
+_min_direct_output_interval_s = 0.1
+
+# Layout of a complete binary (6, 8) set direct mode output message, header included.
+_direct_output_bin_msg_dtype = np.dtype([
+    ('FClass', '<u2'),
+    ('FNum', '<u2'),
+    ('Chan', '<u2'),
+    ('Len', '<u2'),
+    ('Current', '<f4'),
+    ('Voltage', '<f4'),
+    ('Power', '<f4'),
+    ('Resistance', '<f4'),
+    ('CurrentRange', 'u1'),
+    ('ChMode', 'u1'),
+])
+
+assert (_direct_output_bin_msg_dtype.itemsize ==
+        binary.header_struct.size + binary.direct_output_struct.size)
+
+
+def _direct_output_setpoints(currents_a, voltages_v, v_min_v) -> tuple:
+    """
+    Works out the direct output setpoints to send for several requested currents at once, in
+    the same way as `ChannelInterface.set_direct_mode_output` does for one.
+
+    Parameters
+    ----------
+    currents_a : array-like
+        Requested currents. Positive charges, negative discharges and zero rests.
+    voltages_v : array-like or float
+        Voltage limits to charge to.
+    v_min_v : array-like or float
+        Voltage limits to discharge to.
+
+    Returns
+    -------
+    setpoints : tuple
+        Arrays of the current magnitudes, voltage limits, modes (as character codes) and current
+        ranges to send.
+
+    Raises
+    ------
+    ValueError
+        If a current is not a number.
+    """
+    currents_a = np.asarray(currents_a, dtype=np.float64)
+    if np.any(np.isnan(currents_a)):
+        raise ValueError("Currents must be numbers")
+
+    charge = currents_a > 0
+    discharge = currents_a < 0
+    set_currents_a = np.abs(currents_a)
+    set_voltages_v = np.where(charge, voltages_v, np.where(discharge, v_min_v, 0))
+    modes = np.where(charge, ord('C'), np.where(discharge, ord('D'), ord('R')))
+    current_ranges = np.searchsorted(_current_range_limits_a, set_currents_a, side='right') + 1
+    # Don't bother changing current range if we're just setting to zero.
+    current_ranges[set_currents_a == 0] = 4
+    return set_currents_a, set_voltages_v, modes, current_ranges
+
+
+def _pack_direct_output_bin_msgs(channels, currents_a, voltages_v, modes, current_ranges) -> list:
+    """
+    Packs (6,8) set direct mode output binary messages for several channels at once. Takes care
+    of channel zero indexing. Power and resistance are left at the values of
+    `pymacnet.messages.tx_set_direct_output_msg`.
+
+    Parameters
+    ----------
+    channels : array-like
+        The channels to set the output of.
+    currents_a, voltages_v, modes, current_ranges : array-like
+        The setpoints of each channel, see `_direct_output_setpoints`.
+
+    Returns
+    -------
+    msgs_outgoing_bytes : list
+        The packed binary message of each channel.
+    """
+    params = pymacnet.messages.tx_set_direct_output_msg['params']
+    msgs = np.zeros(len(channels), dtype=_direct_output_bin_msg_dtype)
+    msgs['FClass'] = 6
+    msgs['FNum'] = 8
+    msgs['Chan'] = np.asarray(channels) - 1
+    msgs['Len'] = binary.direct_output_struct.size
+    msgs['Current'] = currents_a
+    msgs['Voltage'] = voltages_v
+    msgs['Power'] = params['Power']
+    msgs['Resistance'] = params['Resistance']
+    msgs['CurrentRange'] = current_ranges
+    msgs['ChMode'] = modes
+
+    packed = msgs.tobytes()
+    size = msgs.itemsize
+    return [packed[start:start + size] for start in range(0, len(packed), size)]
+
+
+def _check_direct_output_bin_reply(msg_outgoing_bytes: bytes, response: bytes) -> bool:
+    """
+    Checks the reply to a (6,8) set direct mode output binary message.
+
+    Parameters
+    ----------
+    msg_outgoing_bytes : bytes
+        The message that was sent.
+    response : bytes
+        The reply. None if no reply was received.
+
+    Returns
+    ----------
+    success : bool
+        True if the reply is to the message that was sent and reports that the output was set.
+    """
+    if not response:
+        logger.error("No response for setting direct output!")
+        return False
+
+    try:
+        result = binary.unpack_result(response, request=msg_outgoing_bytes)
+    except Exception as e:
+        logger.error("Invalid response for setting direct output!", exc_info=True)
+        logger.error(e)
+        return False
+
+    if result != 0:
+        logger.error(
+            f"Error setting output! Result {result}: {binary.result_dictionary.get(result, 'Unknown')}")
+        return False
+
+    return True
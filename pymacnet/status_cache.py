@@ -0,0 +1,304 @@
+import time
+import asyncio
+import logging
+import functools
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _StatusCacheBase():
+    """
+    TTL bookkeeping and statistics shared by `StatusCache` and `AsyncStatusCache`. Entries are
+    keyed by `(FClass, FNum, Chan)` of the MacNet message that produced them.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        config = config if config else {}
+        self._cycler_interface = cycler_interface
+        self._default_ttl_s = config.get('default_ttl_s', 0.5)
+        self._ttls_s = dict(config.get('ttls_s', {}))
+        self._entries = {}
+        self._in_flight = {}
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+
+    def get_ttl_s(self, fclass: int, fnum: int) -> float:
+        """
+        Returns how long replies to a message type are cached.
+
+        Parameters
+        ----------
+        fclass : int
+            The function class of the message.
+        fnum : int
+            The function number of the message.
+
+        Returns
+        -------
+        ttl_s : float
+            The time to live in seconds.
+        """
+        return self._ttls_s.get((fclass, fnum), self._default_ttl_s)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the cache statistics.
+
+        Returns
+        -------
+        stats : dict
+            - `hits` - Reads answered from the cache.
+            - `misses` - Reads that sent a request to the cycler.
+            - `shared` - Reads that waited for a request already in flight for the same key.
+            - `hit_ratio` - Fraction of reads that did not send a request.
+        """
+        total = self._hits + self._misses + self._shared
+        return {'hits': self._hits, 'misses': self._misses, 'shared': self._shared,
+                'hit_ratio': (self._hits + self._shared) / total if total else 0.0}
+
+    def reset_stats(self):
+        """
+        Sets the cache statistics back to zero.
+        """
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+
+    def invalidate(self, channel: int = None):
+        """
+        Drops cached entries so the next read goes to the cycler. Reads already in flight still
+        return to their callers but are not cached, and later reads don't wait for them.
+
+        Parameters
+        ----------
+        channel : int
+            Only drop entries of this channel. If not given every entry is dropped.
+        """
+        if channel is None:
+            self._entries.clear()
+            self._in_flight.clear()
+        else:
+            for entries in (self._entries, self._in_flight):
+                for key in [key for key in entries if key[2] == channel]:
+                    del entries[key]
+
+    def _lookup(self, key: tuple):
+        """
+        Returns `(True, value)` if `key` has a live entry, otherwise `(False, None)`.
+        """
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._hits += 1
+            return True, entry[1]
+        return False, None
+
+    def _store(self, key: tuple, value):
+        """
+        Caches `value` under `key`. Failed reads (None) are not cached.
+        """
+        ttl_s = self.get_ttl_s(*key[:2])
+        if value is not None and ttl_s > 0:
+            self._entries[key] = (time.monotonic() + ttl_s, value)
+
+
+class _Flight():
+    """
+    A request in flight that other threads can wait on.
+    """
+    __slots__ = ('done', 'value')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class StatusCache(_StatusCacheBase):
+    """
+    Caches the status reads of a `CyclerInterface` so that several components polling the same
+    channels share replies instead of each sending their own requests. Values returned by the
+    cache are shared between callers and must not be modified.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        """
+        Creates a StatusCache class instance.
+
+        Parameters
+        ----------
+        cycler_interface : CyclerInterface
+            The interface to read through on a cache miss.
+        config : dict
+            An optional configuration dictionary, which may contain the following keys:
+            - `default_ttl_s` - How long replies are cached, in seconds. Defaults to 0.5.
+            - `ttls_s` - A dictionary of per message type TTLs keyed by `(FClass, FNum)`,
+                e.g. `{(4, 7): 0.2, (1, 2): 60}`. A TTL of 0 disables caching for that
+                message type, but concurrent reads still share one request.
+        """
+        super().__init__(cycler_interface, config)
+        self.__lock = threading.Lock()
+
+    def read_channel_status(self, channel: int):
+        """
+        Reads channel status for the specified `channel`, see `CyclerInterface.read_channel_status`.
+        MacNet message (4,7)
+        """
+        return self.__get((4, 7, channel), functools.partial(
+            self._cycler_interface.read_channel_status, channel))
+
+    def read_all_channel_statuses(self) -> list:
+        """
+        Reads the channel status for all channels, see `CyclerInterface.read_all_channel_statuses`.
+        MacNet message (4,1)
+        """
+        return self.__get((4, 1, None), self._cycler_interface.read_all_channel_statuses)
+
+    def read_system_info(self) -> dict:
+        """
+        Reads the system info from the cycler, see `CyclerInterface.read_system_info`.
+        MacNet message (1,1)
+        """
+        return self.__get((1, 1, None), self._cycler_interface.read_system_info)
+
+    def read_general_info(self) -> dict:
+        """
+        Reads the general info from the cycler, see `CyclerInterface.read_general_info`.
+        MacNet message (1,2)
+        """
+        return self.__get((1, 2, None), self._cycler_interface.read_general_info)
+
+    def invalidate(self, channel: int = None):
+        """
+        Drops cached entries so the next read goes to the cycler.
+
+        Parameters
+        ----------
+        channel : int
+            Only drop entries of this channel. If not given every entry is dropped.
+        """
+        with self.__lock:
+            super().invalidate(channel)
+
+    def __get(self, key: tuple, read):
+        """
+        Returns the cached value of `key`, or reads it with `read`. Only one read per key is in
+        flight at a time, concurrent misses wait for it and share its value.
+        """
+        with self.__lock:
+            hit, value = self._lookup(key)
+            if hit:
+                return value
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._in_flight[key] = flight
+                self._misses += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.value
+
+        try:
+            flight.value = read()
+        except Exception as e:
+            logger.error(f"Failed to read {key}", exc_info=True)
+            logger.error(e)
+        finally:
+            with self.__lock:
+                # An invalidate() while the read was in flight dropped the flight, and its value
+                # may predate whatever the invalidation was for.
+                if self._in_flight.get(key) is flight:
+                    self._store(key, flight.value)
+                    del self._in_flight[key]
+            flight.done.set()
+
+        return flight.value
+
+
+class AsyncStatusCache(_StatusCacheBase):
+    """
+    Caches the status reads of an `AsyncCyclerInterface` so that several coroutines polling the
+    same channels share replies instead of each sending their own requests. Values returned by
+    the cache are shared between callers and must not be modified.
+    """
+
+    def __init__(self, cycler_interface, config: dict = None):
+        """
+        Creates an AsyncStatusCache class instance.
+
+        Parameters
+        ----------
+        cycler_interface : AsyncCyclerInterface
+            The interface to read through on a cache miss.
+        config : dict
+            An optional configuration dictionary. Same keys as the `StatusCache` configuration.
+        """
+        super().__init__(cycler_interface, config)
+
+    async def read_channel_status(self, channel: int):
+        """
+        Reads channel status for the specified `channel`, see `AsyncCyclerInterface.read_channel_status`.
+        MacNet message (4,7)
+        """
+        return await self.__get((4, 7, channel), functools.partial(
+            self._cycler_interface.read_channel_status, channel))
+
+    async def read_all_channel_statuses(self) -> list:
+        """
+        Reads the channel status for all channels, see `AsyncCyclerInterface.read_all_channel_statuses`.
+        MacNet message (4,1)
+        """
+        return await self.__get((4, 1, None), self._cycler_interface.read_all_channel_statuses)
+
+    async def read_system_info(self) -> dict:
+        """
+        Reads the system info from the cycler, see `AsyncCyclerInterface.read_system_info`.
+        MacNet message (1,1)
+        """
+        return await self.__get((1, 1, None), self._cycler_interface.read_system_info)
+
+    async def read_general_info(self) -> dict:
+        """
+        Reads the general info from the cycler, see `AsyncCyclerInterface.read_general_info`.
+        MacNet message (1,2)
+        """
+        return await self.__get((1, 2, None), self._cycler_interface.read_general_info)
+
+    async def __get(self, key: tuple, read):
+        """
+        Returns the cached value of `key`, or reads it with `read`. Only one read per key is in
+        flight at a time, concurrent misses await it and share its value.
+        """
+        hit, value = self._lookup(key)
+        if hit:
+            return value
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self._shared += 1
+            try:
+                return await asyncio.shield(flight)
+            except Exception:
+                # The read that owns the flight logs the error.
+                return None
+
+        self._misses += 1
+        flight = asyncio.ensure_future(read())
+        self._in_flight[key] = flight
+        try:
+            value = await asyncio.shield(flight)
+        except Exception as e:
+            logger.error(f"Failed to read {key}", exc_info=True)
+            logger.error(e)
+            value = None
+        finally:
+            current = self._in_flight.get(key) is flight
+            if current:
+                del self._in_flight[key]
+        if current:
+            # Otherwise an invalidate() dropped the flight while it was being read.
+            self._store(key, value)
+        return value
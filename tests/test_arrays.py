@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from pymacnet import arrays
+from pymacnet.messages import binary
+
+
+def test_binary_and_json_statuses_to_array():
+    """
+    Binary and JSON status replies convert into the same columns.
+    """
+    frames = [binary.header_struct.pack(4, 7, chan, binary.read_status_struct.size) +
+              binary.read_status_struct.pack(
+                  1, 192, 2, 4225, 3, 5, 2.0, 1.0, 0.5, 1.75, -0.25, 3.85, 1665664376000)
+              for chan in (2, 0)]
+    from_bin = arrays.statuses_from_bin_msgs(frames)
+    assert (from_bin.dtype == arrays.status_dtype)
+    assert (list(from_bin['Chan']) == [3, 1])
+    assert (from_bin['TesterTime'][0] ==
+            np.datetime64(1665664376000, 'ms'))
+
+    results = [dict(binary.unpack_read_status(frame), Chan=chan)
+               for frame, chan in zip(frames, (3, 1))]
+    from_json = arrays.statuses_from_dicts(results)
+    for name in arrays.status_fields:
+        assert (np.allclose(from_json[name].astype(np.float64), from_bin[name].astype(np.float64)))
+
+    with pytest.raises(ValueError):
+        arrays.statuses_from_bin_msgs(frames + [binary.pack_read_status(0)])
+
+    # With the channels given, missing or broken replies become unread rows.
+    from_bin = arrays.statuses_from_bin_msgs([frames[0], None, binary.pack_read_status(0)], [3, 5, 1])
+    from_json = arrays.statuses_from_dicts([None, results[1]], [2, 1])
+    assert (list(from_bin['Chan']) == [3, 5, 1] and list(from_json['Chan']) == [2, 1])
+    assert (from_bin['Voltage'][0] == from_json['Voltage'][1])
+    for unread in (from_bin[1], from_bin[2], from_json[0]):
+        assert (np.isnan(unread['Voltage']) and np.isnat(unread['TesterTime']) and unread['Cycle'] == 0)
+
+
+def test_aux_to_array():
+    """
+    Aux readings are padded with NaN to the widest channel.
+    """
+    aux = arrays.aux_from_lists([[1.0, 2.0], None, [3.0]], num_aux_channels=1)
+    assert (aux.shape == (3, 2))
+    assert (np.array_equal(aux, [[1.0, 2.0], [np.nan, np.nan], [3.0, np.nan]], equal_nan=True))
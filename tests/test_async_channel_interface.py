@@ -0,0 +1,184 @@
+import copy
+import time
+import asyncio
+import pytest
+
+import pymacnet
+import pymacnet.messages
+import pymacnet.maccorspoofer
+
+
+# Create Maccor Spoofer server
+MACCOR_SPOOFER_CONFIG = {"server_ip": "127.0.0.1",
+                         "json_port": 5650,
+                         "tcp_port": 5750,
+                         "num_channels": 128}
+
+# Create the interface we will use for testing.
+CHANNEL_INTERFACE_CONFIG = {
+    'server_ip': MACCOR_SPOOFER_CONFIG['server_ip'],
+    'json_msg_port': MACCOR_SPOOFER_CONFIG['json_port'],
+    'bin_msg_port': MACCOR_SPOOFER_CONFIG['tcp_port'],
+    'msg_buffer_size_bytes': 4096,
+    'channel': 5,
+    'test_name': 'pymacnet_procedure_control',
+    'test_procedure': 'test_procedure_1',
+    'c_rate_ah': 1,
+    'v_max_safety_limit_v': 4.2,
+    'v_min_safety_limit_v': 2.9,
+    'i_max_safety_limit_a': 2.0,
+    'i_min_safety_limit_a': -2.0,
+    "power_safety_limit_chg_w": 25,
+    "power_safety_limit_dsg_w": 25,
+    'v_max_v': 4.2,
+    'v_min_v': 3.0,
+    'data_record_time_s': 1,
+    'data_record_voltage_delta_vbys': 1,
+    'data_record_current_delta_abys': 1,
+}
+
+
+def test_async_messages_basic():
+    """
+    Send basic messages to the MaccorSpoofer with the async interface and make sure we get the correct results.
+    """
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 1
+    spoofer_config['tcp_port'] += 1
+
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CHANNEL_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 1
+    config['bin_msg_port'] += 1
+
+    async def run():
+        channel_interface = pymacnet.AsyncChannelInterface(config)
+        assert (await channel_interface.connect())
+
+        # Read Status
+        response = await channel_interface.read_channel_status()
+        ans_key = copy.deepcopy(pymacnet.messages.rx_read_status_msg)
+        ans_key['result']['Chan'] = config['channel']
+        assert (response == ans_key['result'])
+
+        # Stream status, inherited from AsyncCyclerInterface
+        statuses = [status async for status in channel_interface.stream_status(
+            [config['channel']], 0.01, num_sweeps=2)]
+        assert ([status['Chan'] for status in statuses] == [config['channel']] * 2)
+
+        # Read Aux
+        response = await channel_interface.read_aux()
+        assert (response ==
+                pymacnet.messages.rx_read_aux_msg['result']['AuxValues'])
+
+        assert (await channel_interface.reset_channel())
+        assert (await channel_interface.set_channel_variable())
+        assert (await channel_interface.start_test_with_procedure())
+        assert (await channel_interface.start_test_with_direct_control())
+        assert ('start_s' in channel_interface.get_last_start_timings())
+
+        # Rest, charge and discharge.
+        assert (await channel_interface.set_direct_mode_output(current_a=0, voltage_v=4.2))
+        assert (await channel_interface.set_direct_mode_output(current_a=0.5, voltage_v=4.2))
+        assert (await channel_interface.set_direct_mode_output(current_a=-2.0))
+
+        timings = await channel_interface.play_direct_output_profile(
+            [(0, 0.5), (0.1, 0), (0.2, -0.5)])
+        assert (all(timings['Acknowledged']))
+
+        await channel_interface.close()
+
+        # Repeated setpoints are skipped and bursts are coalesced.
+        channel_interface = pymacnet.AsyncChannelInterface(
+            dict(config, direct_output_tolerance_a=0.01, direct_output_coalesce_s=0.2))
+        assert (await channel_interface.connect())
+        for current_a in (0.5, 0.5, 0.6, 0.7):
+            assert (await channel_interface.set_direct_mode_output(current_a=current_a, voltage_v=4.2))
+        await asyncio.sleep(0.4)
+        assert (channel_interface.get_direct_output_stats() ==
+                {'sent': 2, 'suppressed': 1, 'coalesced': 1})
+        await channel_interface.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    maccor_spoofer.stop()
+
+
+def test_async_bad_config():
+    """
+    Test that passing an invalid config raises an assertion error
+    """
+    bad_config = {'channel': 1}
+    with pytest.raises(AssertionError):
+        pymacnet.AsyncChannelInterface(bad_config)
+
+
+class RecordingHooks(pymacnet.RequestHooks):
+    def __init__(self):
+        self.sent = []
+
+    def before_encode(self, request):
+        self.sent.append((request.fclass, request.fnum))
+
+
+def test_async_direct_output_coalescing_order():
+    """
+    A setpoint held back by coalescing is never sent after a reset, a start or a close.
+    """
+    spoofer_config = dict(MACCOR_SPOOFER_CONFIG, json_port=5664, tcp_port=5764)
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = dict(CHANNEL_INTERFACE_CONFIG, json_msg_port=5664, bin_msg_port=5764,
+                  direct_output_coalesce_s=0.3)
+    direct_output = (pymacnet.messages.tx_set_direct_output_encoder.fclass,
+                     pymacnet.messages.tx_set_direct_output_encoder.fnum)
+    reset = (pymacnet.messages.tx_reset_channel_encoder.fclass,
+             pymacnet.messages.tx_reset_channel_encoder.fnum)
+
+    async def run():
+        channel_interface = pymacnet.AsyncChannelInterface(config)
+        assert (await channel_interface.connect())
+        hooks = RecordingHooks()
+        channel_interface.add_request_hooks(hooks)
+
+        assert (await channel_interface.set_direct_mode_output(current_a=0.5, voltage_v=4.1))
+        assert (await channel_interface.set_direct_mode_output(current_a=0.6, voltage_v=4.1))
+        assert (await channel_interface.reset_channel())
+        await asyncio.sleep(0.5)
+        assert (hooks.sent == [direct_output, reset])
+
+        assert (await channel_interface.set_direct_mode_output(current_a=0.7, voltage_v=4.1))
+        assert (await channel_interface.set_direct_mode_output(current_a=0.75, voltage_v=4.1))
+        num_sent = len(hooks.sent)
+        assert (await channel_interface.start_test_with_direct_control())
+        await asyncio.sleep(0.5)
+        assert (hooks.sent[num_sent - 1] == direct_output)
+        assert (direct_output not in hooks.sent[num_sent:])
+
+        assert (await channel_interface.set_direct_mode_output(current_a=0.8, voltage_v=4.1))
+        assert (await channel_interface.set_direct_mode_output(current_a=0.9, voltage_v=4.1))
+        num_sent = len(hooks.sent)
+        await channel_interface.close()
+        await asyncio.sleep(0.5)
+        assert (len(hooks.sent) == num_sent)
+        assert (channel_interface.get_direct_output_stats()['sent'] == 3)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    maccor_spoofer.stop()
@@ -0,0 +1,119 @@
+import time
+import asyncio
+
+import pymacnet
+import pymacnet.messages
+import pymacnet.maccorspoofer
+
+
+# Create Maccor Spoofer server
+MACCOR_SPOOFER_CONFIG = {"server_ip": "127.0.0.1",
+                         "json_port": 5640,
+                         "tcp_port": 5740,
+                         "num_channels": 128}
+
+# Create the interface we will use for testing.
+CYCLER_INTERFACE_CONFIG = {
+    'server_ip': MACCOR_SPOOFER_CONFIG['server_ip'],
+    'json_msg_port': MACCOR_SPOOFER_CONFIG['json_port'],
+    'bin_msg_port': MACCOR_SPOOFER_CONFIG['tcp_port'],
+    'msg_buffer_size_bytes': 4096,
+    'max_outstanding_requests': 8
+}
+
+EXPECTED_STATUS = {key: pymacnet.messages.rx_read_status_msg['result'][key]
+                   for key in ('RF1', 'RF2', 'Stat')}
+
+
+def test_async_cycler_interface_messages():
+    '''
+    Test the cycler level messages and concurrent status reads.
+    '''
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 1
+    spoofer_config['tcp_port'] += 1
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CYCLER_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 1
+    config['bin_msg_port'] += 1
+
+    async def run():
+        async with pymacnet.AsyncCyclerInterface(config) as cycler_interface:
+            system_info = await cycler_interface.read_system_info()
+            assert (system_info ==
+                    pymacnet.messages.rx_system_info_msg['result'])
+
+            channel_statues = await cycler_interface.read_all_channel_statuses()
+            assert (channel_statues ==
+                    [EXPECTED_STATUS] * cycler_interface.get_num_channels())
+
+            channels = list(range(1, cycler_interface.get_num_channels() + 1))
+            statuses = await asyncio.gather(
+                *[cycler_interface.read_channel_status(channel) for channel in channels])
+            assert ([status['Chan'] for status in statuses] == channels)
+
+            statuses = [status async for status in cycler_interface.stream_status(
+                channels[:4], 0.1, num_sweeps=2)]
+            assert (sorted(status['Chan'] for status in statuses) == [1, 1, 2, 2, 3, 3, 4, 4])
+
+            acknowledged, _ = await cycler_interface.set_direct_mode_outputs(
+                channels[:8], [0.5] * 8, v_min_v=3.0)
+            assert (all(acknowledged))
+
+            statuses = await cycler_interface.read_channel_statuses(channels)
+            assert (list(statuses['Chan']) == channels)
+            assert (all(statuses['Voltage'] ==
+                    pymacnet.messages.rx_read_status_msg['result']['Voltage']))
+
+            aux = await cycler_interface.read_aux_all(channels[:4])
+            assert (aux.shape == (4, pymacnet.messages.rx_general_info_msg['result']['AuxChannels']))
+            assert (all(aux[:, 0] == pymacnet.messages.rx_read_aux_msg['result']['AuxValues'][0]))
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    maccor_spoofer.stop()
+
+
+def test_async_reconnect():
+    '''
+    Requests that time out together on a silent connection share one reconnect.
+    '''
+    async def run():
+        connections = []
+
+        async def swallow(reader, writer):
+            connections.append(writer)
+            while await reader.read(1024):
+                pass
+        servers = [await asyncio.start_server(swallow, '127.0.0.1', port) for port in (5662, 5762)]
+        session = pymacnet.AsyncMacNetSession(
+            dict(CYCLER_INTERFACE_CONFIG, json_msg_port=5662, bin_msg_port=5762))
+        assert (await session.connect())
+
+        replies = await asyncio.gather(*[session.send_receive_encoded_msg(
+            pymacnet.messages.tx_read_status_encoder, {'Chan': channel}) for channel in range(1, 9)])
+        assert (replies == [None] * 8)
+        assert (session.get_metrics().snapshot()['reconnects'] == 1)
+        assert (len(connections) == 4)
+
+        await session.close()
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+        # Let the connection handlers see the connections close.
+        await asyncio.sleep(0.1)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
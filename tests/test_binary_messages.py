@@ -0,0 +1,103 @@
+import json
+import pytest
+
+from pymacnet import ChannelStatus
+from pymacnet.messages import binary
+from pymacnet.channel_interface import _direct_output_setpoint
+from pymacnet.session import (_pack_direct_output_bin_msg, _pack_direct_output_bin_msgs,
+                              _direct_output_setpoints)
+
+
+def test_binary_status_round_trip():
+    """
+    Binary status replies unpack into the same records as JSON replies.
+    """
+    frame = binary.header_struct.pack(4, 7, 2, binary.read_status_struct.size) + \
+        binary.read_status_struct.pack(
+            1, 192, 2, 4225, 3, 5, 2.0, 1.0, 0.5, 1.75, -0.25, 3.85, 1665664376000)
+    assert (binary.reply_data_size(*binary.unpack_header(frame)[:2], 0) ==
+            len(frame) - binary.header_struct.size)
+
+    status = binary.unpack_read_status(frame)
+    assert (isinstance(status, ChannelStatus))
+    assert ((status.FClass, status.FNum, status.Chan) == (4, 7, 2))
+    assert ((status.RF2, status.Stat, status.LastRecNum, status.Step) == (192, 2, 4225, 5))
+    assert (status.Voltage == pytest.approx(3.85))
+    assert (len(status.TesterTime) == len('2022-10-13T12:32:56'))
+
+    # Records are mappings but not dicts.
+    assert (json.loads(json.dumps(status.to_dict())) == status)
+    assert (not isinstance(status, dict))
+    with pytest.raises(TypeError):
+        status['Voltage'] = 0
+
+    with pytest.raises(ValueError):
+        binary.unpack_read_statuses(frame)
+
+
+def test_binary_multiple_statuses_and_readings():
+    """
+    Replies whose `Len` counts channels or readings unpack one entry per item.
+    """
+    frame = binary.header_struct.pack(4, 1, 0, 2) + \
+        binary.channel_status_struct.pack(1, 0, 2) + binary.channel_status_struct.pack(0, 0, 4)
+    assert (binary.reply_data_size(4, 1, 2) == len(frame) - binary.header_struct.size)
+    assert (binary.unpack_read_statuses(frame) ==
+            [{'RF1': 1, 'RF2': 0, 'Stat': 2}, {'RF1': 0, 'RF2': 0, 'Stat': 4}])
+
+    frame = binary.header_struct.pack(4, 4, 0, 2) + \
+        binary.reading_struct.pack(24.75) + binary.reading_struct.pack(-1.5)
+    assert (binary.unpack_readings(frame) == [24.75, -1.5])
+
+    msg = binary.pack_set_direct_output(3, 0.5, 4.2, 100, 0, 4, 'C')
+    assert (binary.unpack_header(msg) == (6, 8, 3, 18))
+    assert (binary.request_data_size(6, 8, 18) == len(msg) - binary.header_struct.size)
+    assert (binary.direct_output_struct.unpack_from(msg, binary.header_struct.size)[-1] == ord('C'))
+
+
+def test_binary_result_checks_request():
+    """
+    Result replies are checked against the request they answer.
+    """
+    request = binary.pack_set_direct_output(3, 0.5, 4.2, 100, 0, 4, 'C')
+    reply = binary.header_struct.pack(6, 8, 3, 2) + binary.result_struct.pack(3)
+    assert (binary.unpack_result(reply, request=request) == 3)
+    assert (binary.result_dictionary[3] == 'Command sent too fast')
+
+    other_channel_reply = binary.header_struct.pack(6, 8, 4, 2) + binary.result_struct.pack(0)
+    with pytest.raises(ValueError):
+        binary.unpack_result(other_channel_reply, request=request)
+
+
+def test_bulk_direct_output_matches_single():
+    """
+    Setpoints worked out and packed for many channels at once match those packed one at a time.
+    """
+    currents_a = [0, 0.0001, -0.001, 0.1, -2.0, 0.00015, 0.005]
+    channels = list(range(1, len(currents_a) + 1))
+    msgs = _pack_direct_output_bin_msgs(
+        channels, *_direct_output_setpoints(currents_a, 4.1, 2.8))
+    for channel, current_a, msg in zip(channels, currents_a, msgs):
+        assert (msg == _pack_direct_output_bin_msg(
+            channel, *_direct_output_setpoint(current_a, 4.1, 2.8)))
+
+    with pytest.raises(ValueError):
+        _direct_output_setpoints([float('nan')], 4.1, 2.8)
+    assert (_direct_output_setpoint(float('nan'), 4.1, 2.8) is None)
+
+
+def test_direct_output_setpoint_ranges():
+    """
+    Single and bulk setpoints agree on the mode and current range on both sides of every range
+    boundary.
+    """
+    currents_a = [0.000149, 0.00015, 0.004999, 0.005, 0.149, 0.15, 2.0]
+    currents_a = [0] + currents_a + [-current_a for current_a in currents_a]
+    set_currents_a, voltages_v, modes, current_ranges = _direct_output_setpoints(currents_a, 4.1, 2.8)
+    for i, current_a in enumerate(currents_a):
+        assert (_direct_output_setpoint(current_a, 4.1, 2.8) ==
+                (set_currents_a[i], voltages_v[i], chr(modes[i]), current_ranges[i]))
+    assert (list(current_ranges) == [4] + [1, 2, 2, 3, 3, 4, 4] * 2)
+    assert (''.join(chr(mode) for mode in modes) == 'R' + 'C' * 7 + 'D' * 7)
+    assert (_direct_output_setpoint(0.5, 4.1, 2.8) == (0.5, 4.1, 'C', 4))
+    assert (_direct_output_setpoint(-0.001, 4.1, 2.8) == (0.001, 2.8, 'D', 2))
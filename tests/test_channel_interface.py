@@ -2,6 +2,8 @@ import copy
 import time
 import pytest
 
+import numpy as np
+
 import pymacnet
 import pymacnet.messages
 import pymacnet.maccorspoofer
@@ -63,6 +65,10 @@ def test_messages_basic():
     ans_key['result']['Chan'] = config['channel']
     assert (response == ans_key['result'])
 
+    # Stream status, inherited from CyclerInterface
+    statuses = list(channel_interface.stream_status([config['channel']], 0.01, num_sweeps=2))
+    assert ([status['Chan'] for status in statuses] == [config['channel']] * 2)
+
     # Read Aux
     response = channel_interface.read_aux()
     ans_key = copy.deepcopy(pymacnet.messages.rx_read_aux_msg)
@@ -77,6 +83,9 @@ def test_messages_basic():
     response = channel_interface.set_channel_variable()
     assert (response)
 
+    # numpy values, e.g. taken from an array, are sent as plain numbers
+    assert (channel_interface.set_channel_variable(1, np.float64(2.0)))
+
     # Start test with procedure
     response = channel_interface.start_test_with_procedure()
     assert (response)
@@ -84,6 +93,8 @@ def test_messages_basic():
     # Start test with direct control
     response = channel_interface.start_test_with_direct_control()
     assert (response)
+    assert (set(channel_interface.get_last_start_timings()) ==
+            {'status_s', 'safety_limits_s', 'start_s', 'total_s'})
 
     # Set direct control output. Rest
     response = channel_interface.set_direct_mode_output(
@@ -98,10 +109,46 @@ def test_messages_basic():
     # Set direct control output. Charge CC
     response = channel_interface.set_direct_mode_output(current_a=0.5)
     assert (response)
+    assert (channel_interface.set_direct_mode_output(current_a=np.float64(0.5)))
 
     # Set direct control output. Discharge
     response = channel_interface.set_direct_mode_output(current_a=-2.0)
     assert (response)
+    channel_interface.close()
+
+    # Safety limits already set on the channel are not set again.
+    config['cache_safety_limits'] = True
+    channel_interface = pymacnet.ChannelInterface(config)
+    sent_msgs = []
+    send_receive_encoded_msgs = channel_interface._send_receive_encoded_msgs
+
+    def counting_send_receive_encoded_msgs(outgoing_msgs):
+        sent_msgs.extend(outgoing_msgs)
+        return send_receive_encoded_msgs(outgoing_msgs)
+    channel_interface._send_receive_encoded_msgs = counting_send_receive_encoded_msgs
+
+    assert (channel_interface.start_test_with_direct_control())
+    assert (len(sent_msgs) == 2)
+    assert (channel_interface.start_test_with_direct_control())
+    assert (len(sent_msgs) == 3)
+    assert (channel_interface.reset_channel())
+    assert (channel_interface.start_test_with_direct_control())
+    assert (len(sent_msgs) == 5)
+
+    # A channel running a test keeps its safety limits and is not started.
+    maccor_spoofer.update_channel_status(config['channel'] - 1, {'Stat': 2})
+    # Drops the cached limits, so they would be set again.
+    assert (channel_interface.reset_channel())
+    sent_msgs.clear()
+    assert (not channel_interface.start_test_with_direct_control())
+    assert ([encoder for encoder, _ in sent_msgs] == [pymacnet.messages.tx_read_status_encoder])
+    maccor_spoofer.update_channel_status(config['channel'] - 1, {'Stat': 0})
+
+    # An error reply to the status read fails the start.
+    error = {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32602, 'message': 'Invalid params'}}
+    channel_interface._send_receive_encoded_msgs = lambda outgoing_msgs: [error] * len(outgoing_msgs)
+    assert (not channel_interface.start_test_with_direct_control())
+    channel_interface.close()
 
     maccor_spoofer.stop()
 
@@ -125,3 +172,210 @@ def test_bad_config():
     bad_config = {'channel': 1}
     with pytest.raises(AssertionError):
         pymacnet.ChannelInterface(bad_config)
+
+
+def test_shared_session_channels():
+    """
+    Test that channel handles created from a CyclerInterface share its session.
+    """
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 3
+    spoofer_config['tcp_port'] += 3
+
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CHANNEL_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 3
+    config['bin_msg_port'] += 3
+
+    cycler_interface = pymacnet.CyclerInterface(config)
+    channel_interfaces = [cycler_interface.channel(channel, config)
+                          for channel in range(1, cycler_interface.get_num_channels() + 1)]
+
+    for channel, channel_interface in enumerate(channel_interfaces, start=1):
+        assert (channel_interface.get_session() is cycler_interface.get_session())
+        assert (channel_interface.get_channel_number() == channel)
+        assert (channel_interface.get_num_channels() ==
+                cycler_interface.get_num_channels())
+
+    # Every handle talks through the one connection.
+    for channel_interface in channel_interfaces[::16]:
+        response = channel_interface.read_channel_status()
+        assert (response['Chan'] == channel_interface.get_channel_number())
+        assert (channel_interface.set_direct_mode_output(current_a=0))
+
+    cycler_interface.close()
+    maccor_spoofer.stop()
+
+
+def test_binary_reads():
+    """
+    Test reading statuses and aux values with binary messages.
+    """
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 4
+    spoofer_config['tcp_port'] += 4
+
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CHANNEL_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 4
+    config['bin_msg_port'] += 4
+    config['use_binary_reads'] = True
+
+    channel_interface = pymacnet.ChannelInterface(config)
+
+    # Binary readings are single precision.
+    response = channel_interface.read_channel_status()
+    ans_key = copy.deepcopy(pymacnet.messages.rx_read_status_msg)
+    ans_key['result']['Chan'] = config['channel']
+    assert (response.keys() == ans_key['result'].keys())
+    for key, value in ans_key['result'].items():
+        assert (response[key] == pytest.approx(value)
+                if isinstance(value, float) else response[key] == value)
+
+    response = channel_interface.read_aux()
+    assert (response == pytest.approx(
+        pymacnet.messages.rx_read_aux_msg['result']['AuxValues']))
+
+    response = channel_interface.read_all_channel_statuses()
+    assert (len(response) == spoofer_config['num_channels'])
+    status = pymacnet.messages.rx_read_status_msg['result']
+    assert (response[0] == {'RF1': status['RF1'],
+            'RF2': status['RF2'], 'Stat': status['Stat']})
+
+    # Binary replies are consumed whole, so the rest message still gets its own reply.
+    assert (channel_interface.set_direct_mode_output(current_a=0))
+    response = channel_interface.read_channel_status()
+    assert (response['Chan'] == config['channel'])
+
+    channel_interface.close()
+    maccor_spoofer.stop()
+
+
+def test_binary_direct_output():
+    """
+    Test setting charge, discharge and rest outputs with binary messages.
+    """
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 5
+    spoofer_config['tcp_port'] += 5
+
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CHANNEL_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 5
+    config['bin_msg_port'] += 5
+    config['use_binary_direct_output'] = True
+
+    channel_interface = pymacnet.ChannelInterface(config)
+
+    assert (channel_interface.set_direct_mode_output(current_a=0.5, voltage_v=4.1))
+    assert (channel_interface.set_direct_mode_output(current_a=-0.001))
+    assert (channel_interface.set_direct_mode_output(current_a=0))
+
+    # A 10 Hz pulse train.
+    profile = [(0.1 * point, 0.5 if point % 2 else -0.5, 4.1) for point in range(10)]
+    timings = channel_interface.play_direct_output_profile(profile)
+    assert (np.all(timings['Sent']) and np.all(timings['Acknowledged']))
+    assert (np.all(timings['Jitter'] < 0.05))
+    assert (np.all(timings['Latency'] > 0))
+    assert (channel_interface.play_direct_output_profile([0, 1, 2]) is None)
+    # MacNet rejects setpoints less than 100 ms apart.
+    assert (channel_interface.play_direct_output_profile([(0, 0.5), (0.05, 0)]) is None)
+
+    # A point after a late one is held so setpoints stay 100 ms apart.
+    send_times = []
+    send_receive_bin_msg = channel_interface._send_receive_bin_msg
+
+    def slow_send_receive_bin_msg(msg):
+        send_times.append(time.monotonic())
+        if len(send_times) == 1:
+            time.sleep(0.15)
+        return send_receive_bin_msg(msg)
+    channel_interface._send_receive_bin_msg = slow_send_receive_bin_msg
+    timings = channel_interface.play_direct_output_profile([(0, 0.5), (0.1, 0), (0.2, -0.5), (0.5, 0)])
+    assert (np.all(timings['Acknowledged']))
+    assert (np.all(np.diff(send_times) >= 0.1))
+    channel_interface.close()
+
+    # Repeated setpoints are skipped and bursts are coalesced.
+    config['direct_output_tolerance_a'] = 0.01
+    config['direct_output_coalesce_s'] = 0.3
+    channel_interface = pymacnet.ChannelInterface(config)
+    for current_a in (0.5, 0.5, 0.505, 0.6, 0.7, 0.8):
+        assert (channel_interface.set_direct_mode_output(current_a=current_a, voltage_v=4.1))
+    time.sleep(0.5)
+    assert (channel_interface.get_direct_output_stats() ==
+            {'sent': 2, 'suppressed': 2, 'coalesced': 2})
+    assert (channel_interface.set_direct_mode_output(current_a=0.8, voltage_v=4.1))
+    assert (channel_interface.get_direct_output_stats()['suppressed'] == 3)
+
+    channel_interface.close()
+    maccor_spoofer.stop()
+
+
+class RecordingHooks(pymacnet.RequestHooks):
+    def __init__(self):
+        self.sent = []
+
+    def before_encode(self, request):
+        self.sent.append((request.fclass, request.fnum))
+
+
+def test_direct_output_coalescing_order():
+    """
+    A setpoint held back by coalescing is never sent after a reset, a start or a close.
+    """
+    spoofer_config = dict(MACCOR_SPOOFER_CONFIG, json_port=5663, tcp_port=5763)
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = dict(CHANNEL_INTERFACE_CONFIG, json_msg_port=5663, bin_msg_port=5763,
+                  direct_output_coalesce_s=0.3)
+    direct_output = (pymacnet.messages.tx_set_direct_output_encoder.fclass,
+                     pymacnet.messages.tx_set_direct_output_encoder.fnum)
+    reset = (pymacnet.messages.tx_reset_channel_encoder.fclass,
+             pymacnet.messages.tx_reset_channel_encoder.fnum)
+    channel_interface = pymacnet.ChannelInterface(config)
+    hooks = RecordingHooks()
+    channel_interface.add_request_hooks(hooks)
+
+    assert (channel_interface.set_direct_mode_output(current_a=0.5, voltage_v=4.1))
+    assert (channel_interface.set_direct_mode_output(current_a=0.6, voltage_v=4.1))
+    assert (channel_interface.reset_channel())
+    time.sleep(0.5)
+    assert (hooks.sent == [direct_output, reset])
+    assert (channel_interface.get_direct_output_stats()['sent'] == 1)
+
+    assert (channel_interface.set_direct_mode_output(current_a=0.7, voltage_v=4.1))
+    assert (channel_interface.set_direct_mode_output(current_a=0.75, voltage_v=4.1))
+    num_sent = len(hooks.sent)
+    assert (channel_interface.start_test_with_direct_control())
+    time.sleep(0.5)
+    assert (hooks.sent[num_sent - 1] == direct_output)
+    assert (direct_output not in hooks.sent[num_sent:])
+
+    assert (channel_interface.set_direct_mode_output(current_a=0.8, voltage_v=4.1))
+    assert (channel_interface.set_direct_mode_output(current_a=0.9, voltage_v=4.1))
+    num_sent = len(hooks.sent)
+    channel_interface.close()
+    time.sleep(0.5)
+    assert (len(hooks.sent) == num_sent)
+    assert (channel_interface.get_direct_output_stats()['sent'] == 3)
+
+    maccor_spoofer.stop()
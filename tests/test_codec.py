@@ -0,0 +1,51 @@
+import pytest
+
+import numpy as np
+
+from pymacnet import codec
+from pymacnet.messages import tx_set_direct_output_encoder
+
+
+def test_codec_backends():
+    """
+    Every installed backend decodes bytes-like input, including memoryviews, and encodes compact UTF-8 JSON.
+    """
+    default_backend = codec.backend
+    msg = {'jsonrpc': '2.0', 'result': {'Chan': 1, 'Voltage': 3.85, 'AuxValues': [24.75]}, 'id': 3}
+    packed = b'{"jsonrpc": "2.0", "result": {"Chan": 1, "Voltage": 3.85, "AuxValues": [24.75]}, "id": 3}\r\n'
+
+    try:
+        for backend in codec.available_backends():
+            codec.set_backend(backend)
+            assert (codec.loads(packed) == msg)
+            assert (codec.loads(memoryview(packed)[:-2]) == msg)
+            assert (codec.loads(bytearray(packed)) == msg)
+            assert (codec.loads(codec.dumps(msg)) == msg)
+            assert (b' ' not in codec.dumps(msg))
+    finally:
+        codec.set_backend(default_backend)
+
+    assert (codec.available_backends()[-1] == 'json')
+    with pytest.raises(ValueError):
+        codec.set_backend('not_a_json_library')
+
+
+def test_codec_numpy_values():
+    """
+    Every backend encodes numpy scalars and arrays as their plain Python values.
+    """
+    default_backend = codec.backend
+    msg = {'Current': np.float64(0.5), 'Voltage': np.float32(4.25), 'Chan': np.int64(2),
+           'Flag': np.bool_(True), 'AuxValues': np.array([1.5, 2.5])}
+    expected = {'Current': 0.5, 'Voltage': 4.25, 'Chan': 2, 'Flag': True, 'AuxValues': [1.5, 2.5]}
+
+    try:
+        for backend in codec.available_backends():
+            codec.set_backend(backend)
+            assert (codec.loads(codec.dumps(msg)) == expected)
+            packed = tx_set_direct_output_encoder.encode(
+                1, {'Chan': np.int64(0), 'Current': np.float64(0.5), 'Voltage': np.float32(4.25)})
+            params = codec.loads(packed)['params']
+            assert ((params['Chan'], params['Current'], params['Voltage']) == (0, 0.5, 4.25))
+    finally:
+        codec.set_backend(default_backend)
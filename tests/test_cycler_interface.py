@@ -1,4 +1,9 @@
+import copy
 import time
+import threading
+
+import numpy as np
+import pytest
 
 import pymacnet
 import pymacnet.messages
@@ -19,6 +24,9 @@ CYCLER_INTERFACE_CONFIG = {
     'msg_buffer_size_bytes': 4096
 }
 
+EXPECTED_STATUS = {key: pymacnet.messages.rx_read_status_msg['result'][key]
+                   for key in ('RF1', 'RF2', 'Stat')}
+
 
 def test_cycler_interface_messages():
     '''
@@ -46,6 +54,198 @@ def test_cycler_interface_messages():
 
     channel_statues = cycler_interface.read_all_channel_statuses()
     assert (channel_statues ==
-            pymacnet.messages.rx_channel_status_multiple_channels['result']['Status'])
+            [EXPECTED_STATUS] * cycler_interface.get_num_channels())
+
+    acknowledged, skew_s = cycler_interface.set_direct_mode_outputs(
+        [1, 2, 3, 4], [0.5, -0.5, 0, 1e-4], 4.1, v_min_v=3.0)
+    assert (list(acknowledged) == [True] * 4)
+    assert (0 <= skew_s < 0.5)
+    assert (cycler_interface.set_direct_mode_outputs([0], [1], v_min_v=3.0)[0] is None)
+
+    maccor_spoofer.stop()
+
+
+def test_stream_status():
+    '''
+    Test streaming statuses sweep after sweep.
+    '''
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 4
+    spoofer_config['tcp_port'] += 4
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CYCLER_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 4
+    config['bin_msg_port'] += 4
+    cycler_interface = pymacnet.CyclerInterface(config)
+
+    statuses = list(cycler_interface.stream_status(
+        [1, 2, 3], 0.01, num_sweeps=3))
+    assert ([status['Chan'] for status in statuses] == [1, 2, 3] * 3)
+
+    overruns = []
+    statuses = list(cycler_interface.stream_status(
+        [1, 2, 3], 1e-6, num_sweeps=2, on_overrun=lambda sweep, duration_s: overruns.append(sweep)))
+    assert (len(statuses) == 6)
+    assert (overruns == [1, 2])
+
+    cycler_interface.close()
+    maccor_spoofer.stop()
+
+
+def test_sweep_schedule(monkeypatch):
+    '''
+    Sweeps are due on a fixed grid and overrunning sweeps skip the sweeps they ran into.
+    '''
+    now = [100.0]
+    monkeypatch.setattr(pymacnet.cycler_interface.time, 'monotonic', lambda: now[0])
+    overruns = []
+    schedule = pymacnet.cycler_interface._SweepSchedule(
+        0.2, lambda sweep, duration_s: overruns.append((sweep, duration_s)))
+
+    # Time spent reading does not push back the next deadline.
+    now[0] += 0.05
+    assert (np.isclose(schedule.finish_sweep(), 0.15))
+    now[0] += 0.15 + 0.12
+    assert (np.isclose(schedule.finish_sweep(), 0.08))
+    assert (overruns == [])
+
+    # Sweep 3 starts at 100.4 and ends at 100.85, past the deadlines at 100.6 and 100.8.
+    now[0] += 0.08 + 0.45
+    assert (np.isclose(schedule.finish_sweep(), 0.15))
+    assert (schedule.sweep == 3)
+    assert ([sweep for sweep, _ in overruns] == [3])
+    assert (np.isclose(overruns[0][1], 0.45))
+
+    for interval_s in (0, -1):
+        with pytest.raises(ValueError):
+            pymacnet.cycler_interface._SweepSchedule(interval_s)
+
+
+def test_pipelined_requests():
+    '''
+    Test that pipelined requests from several threads each get their own reply.
+    '''
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 2
+    spoofer_config['tcp_port'] += 2
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CYCLER_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 2
+    config['bin_msg_port'] += 2
+    config['max_outstanding_requests'] = 8
+    cycler_interface = pymacnet.CyclerInterface(config)
+
+    # Batch of requests sent back to back on the one socket.
+    channels = list(range(1, 33))
+    msgs = []
+    for channel in channels:
+        msg = copy.deepcopy(pymacnet.messages.tx_read_status_msg)
+        msg['params']['Chan'] = channel
+        msgs.append(msg)
+    replies = cycler_interface._send_receive_json_msgs(msgs)
+    assert ([reply['result']['Chan'] for reply in replies] == channels)
+
+    # Requests from several threads sharing the socket.
+    statuses = {}
+
+    def read_status(channel):
+        statuses[channel] = cycler_interface.read_channel_status(channel)
+
+    threads = [threading.Thread(target=read_status, args=(channel,))
+               for channel in channels]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (all(statuses[channel]['Chan'] ==
+            channel for channel in channels))
+
+    # Channels are numbered from 1 up to the number of channels.
+    for channel in (0, cycler_interface.get_num_channels() + 1):
+        assert (cycler_interface.read_channel_status(channel) is None)
+
+    maccor_spoofer.stop()
+
+
+def test_read_statuses_of_large_cycler():
+    '''
+    Test reading the status of more channels than fit in one (4,1) message.
+    '''
+    spoofer_config = MACCOR_SPOOFER_CONFIG.copy()
+    spoofer_config['json_port'] += 3
+    spoofer_config['tcp_port'] += 3
+    spoofer_config['num_channels'] = 300
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        spoofer_config)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    config = CYCLER_INTERFACE_CONFIG.copy()
+    config['json_msg_port'] += 3
+    config['bin_msg_port'] += 3
+    config['max_outstanding_requests'] = 4
+    for use_binary_reads in (False, True):
+        config['use_binary_reads'] = use_binary_reads
+        cycler_interface = pymacnet.CyclerInterface(config)
+        assert (cycler_interface.get_num_channels() == 300)
+
+        channel_statues = cycler_interface.read_all_channel_statuses()
+        assert (channel_statues == [EXPECTED_STATUS] * 300)
+
+        channel_statues = cycler_interface.read_multiple_channel_statuses(
+            100, 150)
+        assert (channel_statues == [EXPECTED_STATUS] * 150)
+
+        assert (cycler_interface.read_multiple_channel_statuses(
+            250, 100) is None)
+
+        channels = list(range(1, 93)) + [300]
+        statuses = cycler_interface.read_channel_statuses(channels)
+        assert (list(statuses['Chan']) == channels)
+        for name in ('Voltage', 'Current', 'Capacity', 'TestTime'):
+            assert (np.allclose(statuses[name],
+                    pymacnet.messages.rx_read_status_msg['result'][name], rtol=1e-6))
+        assert (cycler_interface.read_channel_statuses([0, 1]) is None)
+
+        aux = cycler_interface.read_aux_all([1, 2, 300])
+        num_aux_channels = pymacnet.messages.rx_general_info_msg['result']['AuxChannels']
+        assert (aux.shape == (3, num_aux_channels))
+        assert (np.allclose(aux[:, 0], pymacnet.messages.rx_read_aux_msg['result']['AuxValues'][0]))
+        assert (np.all(np.isnan(aux[:, 1:])))
+        assert (cycler_interface.read_aux_all().shape == (300, num_aux_channels))
+
+        transport = 'binary' if use_binary_reads else 'json'
+        metrics = cycler_interface.get_session().get_metrics().snapshot()
+        assert (metrics[transport][(4, 7)]['count'] == 93)
+        assert (metrics[transport][(4, 7)]['errors'] == 0)
+        assert (metrics[transport][(4, 7)]['latency_p50_s'] > 0)
+
+        # A channel without a reply doesn't hide the others.
+        name = '_send_receive_bin_msgs' if use_binary_reads else '_send_receive_encoded_msgs'
+        send_receive = getattr(cycler_interface, name)
+        setattr(cycler_interface, name, lambda msgs: [None] + send_receive(msgs)[1:])
+        statuses = cycler_interface.read_channel_statuses([1, 2, 3])
+        assert (list(statuses['Chan']) == [1, 2, 3])
+        assert (np.isnan(statuses['Voltage'][0]) and not np.isnan(statuses['Voltage'][1:]).any())
+        delattr(cycler_interface, name)
+
+        # An error reply only blanks its own channel.
+        if not use_binary_reads:
+            error = {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32602, 'message': 'Invalid params'}}
+            setattr(cycler_interface, name, lambda msgs: [error] + send_receive(msgs)[1:])
+            aux = cycler_interface.read_aux_all([1, 2])
+            assert (np.all(np.isnan(aux[0])) and not np.isnan(aux[1, 0]))
+            delattr(cycler_interface, name)
 
     maccor_spoofer.stop()
@@ -0,0 +1,65 @@
+import copy
+import json
+
+import pytest
+import numpy as np
+
+import pymacnet.messages
+from pymacnet.messages import MessageEncoder
+
+
+def test_encoders_match_templates():
+    """
+    Every compiled encoder produces compact JSON equal to its template with the variable fields and id filled in.
+    """
+    encoders = [
+        (pymacnet.messages.tx_read_status_msg,
+         pymacnet.messages.tx_read_status_encoder),
+        (pymacnet.messages.tx_set_direct_output_msg,
+         pymacnet.messages.tx_set_direct_output_encoder),
+        (pymacnet.messages.tx_set_safety_limits_msg,
+         pymacnet.messages.tx_set_safety_limits_encoder),
+        (pymacnet.messages.tx_start_test_with_procedure_msg,
+         pymacnet.messages.tx_start_test_with_procedure_encoder),
+        (pymacnet.messages.tx_select_channels_msg,
+         pymacnet.messages.tx_select_channels_encoder),
+        (pymacnet.messages.tx_general_info_msg,
+         pymacnet.messages.tx_general_info_encoder),
+    ]
+    for template, encoder in encoders:
+        expected = copy.deepcopy(template)
+        expected['id'] = 7
+        msg_packed = encoder.encode(7)
+        assert (json.loads(msg_packed) == expected)
+        assert (msg_packed == json.dumps(
+            expected, separators=(',', ':')).encode())
+
+    msg_packed = pymacnet.messages.tx_set_direct_output_encoder.encode(
+        12, {'Chan': 3, 'Current': 0.5, 'Voltage': 4.2, 'ChMode': 'C'})
+    expected = copy.deepcopy(pymacnet.messages.tx_set_direct_output_msg)
+    expected['params'].update(Chan=3, Current=0.5, Voltage=4.2, ChMode='C')
+    expected['id'] = 12
+    assert (json.loads(msg_packed) == expected)
+
+
+def test_encoder_fields():
+    """
+    Only the declared fields can be filled in.
+    """
+    encoder = MessageEncoder(
+        pymacnet.messages.tx_set_variable_msg, fields=('Chan', 'Value'))
+    assert (json.loads(encoder.encode(1, {'Chan': 2, 'Value': 1.5}))[
+            'params']['Value'] == 1.5)
+    with pytest.raises(ValueError):
+        encoder.encode(1, {'VarNum': 2})
+
+
+def test_encoder_non_finite_values():
+    """
+    NaN and infinite values are rejected rather than encoded as invalid JSON.
+    """
+    encoder = pymacnet.messages.tx_set_direct_output_encoder
+    for value in (float('nan'), float('inf'), -float('inf'), np.float64('nan'), np.float32('inf')):
+        with pytest.raises(ValueError):
+            encoder.encode(1, {'Current': value})
+    assert (json.loads(encoder.encode(1, {'Current': np.float32(0.5)}))['params']['Current'] == 0.5)
@@ -0,0 +1,45 @@
+import socket
+
+import pytest
+
+from pymacnet.framing import FrameDecoder
+
+
+def test_frames_split_across_receives():
+    """
+    Frames that arrive split across receives, or several to a receive, are reassembled without losing bytes.
+    """
+    tx_sock, rx_sock = socket.socketpair()
+    frame_decoder = FrameDecoder(16)
+
+    tx_sock.sendall(b'{"a": 1}\r')
+    tx_sock.sendall(b'\n{"b": 2}\r\n{"c"')
+    assert (bytes(frame_decoder.recv_frame(rx_sock)) == b'{"a": 1}')
+    assert (bytes(frame_decoder.recv_frame(rx_sock)) == b'{"b": 2}')
+
+    tx_sock.sendall(b': 3}\r\n')
+    assert (bytes(frame_decoder.recv_frame(rx_sock)) == b'{"c": 3}')
+
+    # Frames larger than the initial buffer grow it.
+    large_frame = b'x' * 1000
+    tx_sock.sendall(large_frame + b'\r\n' + large_frame + b'\r\n')
+    assert (bytes(frame_decoder.recv_frame(rx_sock)) == large_frame)
+    assert (bytes(frame_decoder.recv_frame(rx_sock)) == large_frame)
+
+    tx_sock.close()
+    with pytest.raises(ConnectionError):
+        frame_decoder.recv_frame(rx_sock)
+    rx_sock.close()
+
+
+def test_feed():
+    """
+    Frames can be decoded from fed bytes without a socket.
+    """
+    frame_decoder = FrameDecoder(8)
+    frame_decoder.feed(b'abc\r\nde')
+    assert (bytes(frame_decoder.next_frame()) == b'abc')
+    assert (frame_decoder.next_frame() is None)
+    frame_decoder.feed(b'f\r\n')
+    assert (bytes(frame_decoder.next_frame()) == b'def')
+    assert (frame_decoder.next_frame() is None)
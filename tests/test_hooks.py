@@ -0,0 +1,125 @@
+import time
+import asyncio
+
+import pymacnet
+import pymacnet.maccorspoofer
+
+
+# Create Maccor Spoofer server
+MACCOR_SPOOFER_CONFIG = {"server_ip": "127.0.0.1",
+                         "json_port": 5661,
+                         "tcp_port": 5761,
+                         "num_channels": 8}
+
+# Create the interface we will use for testing.
+CYCLER_INTERFACE_CONFIG = {
+    'server_ip': MACCOR_SPOOFER_CONFIG['server_ip'],
+    'json_msg_port': MACCOR_SPOOFER_CONFIG['json_port'],
+    'bin_msg_port': MACCOR_SPOOFER_CONFIG['tcp_port'],
+    'msg_buffer_size_bytes': 4096,
+    'max_outstanding_requests': 4,
+}
+
+
+class RecordingHooks(pymacnet.RequestHooks):
+    def __init__(self):
+        self.events = []
+
+    def before_encode(self, request):
+        self.events.append(('before_encode', request))
+
+    def after_send(self, request):
+        self.events.append(('after_send', request))
+
+    def first_byte_received(self, request):
+        self.events.append(('first_byte_received', request))
+
+    def after_decode(self, request, reply):
+        self.events.append(('after_decode', request))
+        request.context['after_decode_at'] = time.monotonic()
+
+    def on_error(self, request):
+        self.events.append(('on_error', request))
+
+    def get_requests(self) -> list:
+        requests = []
+        for _, request in self.events:
+            if request not in requests:
+                requests.append(request)
+        return requests
+
+    def get_names(self, request) -> list:
+        return [name for name, event_request in self.events if event_request is request]
+
+
+class FailingHooks(pymacnet.RequestHooks):
+    def after_send(self, request):
+        raise RuntimeError("Broken hook")
+
+
+def check_answered(hooks: RecordingHooks, transport: str, num_requests: int):
+    requests = hooks.get_requests()
+    assert (len(requests) == num_requests)
+    for request in requests:
+        assert (request.transport == transport)
+        assert ((request.fclass, request.fnum) == (4, 7))
+        assert (hooks.get_names(request) == ['before_encode', 'after_send',
+                                             'first_byte_received', 'after_decode'])
+        assert (request.encode_at <= request.sent_at <= request.received_at <= request.decoded_at)
+        assert (request.error is None)
+
+
+def test_request_hooks():
+    '''
+    Hooks see every step of JSON and binary requests, including failures.
+    '''
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        MACCOR_SPOOFER_CONFIG)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    for use_binary_reads in (False, True):
+        config = dict(CYCLER_INTERFACE_CONFIG, use_binary_reads=use_binary_reads)
+        cycler_interface = pymacnet.CyclerInterface(config)
+        hooks = RecordingHooks()
+        cycler_interface.add_request_hooks(hooks)
+        cycler_interface.add_request_hooks(FailingHooks())
+
+        statuses = cycler_interface.read_channel_statuses([1, 2, 3])
+        assert (list(statuses['Chan']) == [1, 2, 3])
+        check_answered(hooks, 'binary' if use_binary_reads else 'json', 3)
+        # Each reply is reported as it arrives rather than once the whole batch is done.
+        first, _, last = hooks.get_requests()
+        assert (first.context['after_decode_at'] < last.received_at)
+        if not use_binary_reads:
+            assert (sorted(request.msg_id for request in hooks.get_requests()) ==
+                    sorted(set(request.msg_id for request in hooks.get_requests())))
+
+        cycler_interface.remove_request_hooks(hooks)
+        cycler_interface.read_channel_statuses([1])
+        assert (len(hooks.get_requests()) == 3)
+
+        cycler_interface.add_request_hooks(hooks)
+        cycler_interface.close()
+        hooks.events.clear()
+        assert (cycler_interface.read_channel_status(1) is None)
+        request = hooks.get_requests()[0]
+        assert (hooks.get_names(request)[-1] == 'on_error')
+        assert (request.error)
+
+    async def run():
+        async with pymacnet.AsyncCyclerInterface(CYCLER_INTERFACE_CONFIG) as cycler_interface:
+            hooks = RecordingHooks()
+            cycler_interface.add_request_hooks(hooks)
+            statuses = await cycler_interface.read_channel_statuses([1, 2])
+            assert (list(statuses['Chan']) == [1, 2])
+            check_answered(hooks, 'json', 2)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    maccor_spoofer.stop()
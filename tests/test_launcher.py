@@ -0,0 +1,133 @@
+import time
+import asyncio
+
+import pymacnet
+import pymacnet.maccorspoofer
+
+
+# Create Maccor Spoofer server
+MACCOR_SPOOFER_CONFIG = {"server_ip": "127.0.0.1",
+                         "json_port": 5660,
+                         "tcp_port": 5760,
+                         "num_channels": 128}
+
+# Create the interface we will use for testing.
+CYCLER_INTERFACE_CONFIG = {
+    'server_ip': MACCOR_SPOOFER_CONFIG['server_ip'],
+    'json_msg_port': MACCOR_SPOOFER_CONFIG['json_port'],
+    'bin_msg_port': MACCOR_SPOOFER_CONFIG['tcp_port'],
+    'msg_buffer_size_bytes': 4096,
+}
+
+LAUNCH_CONFIG = {
+    'test_name': 'pymacnet_launch',
+    'test_procedure': 'test_procedure_1',
+    'c_rate_ah': 1,
+    'v_max_safety_limit_v': 4.2,
+    'v_min_safety_limit_v': 2.9,
+    'i_max_safety_limit_a': 2.0,
+    'i_min_safety_limit_a': -2.0,
+    "power_safety_limit_chg_w": 25,
+    "power_safety_limit_dsg_w": 25,
+}
+
+
+def test_launcher():
+    '''
+    Channels running the same test are started together and the others one by one.
+    '''
+    maccor_spoofer = pymacnet.maccorspoofer.MaccorSpoofer(
+        MACCOR_SPOOFER_CONFIG)
+    maccor_spoofer.start()
+    # Give time for the spoofer to start.
+    time.sleep(5)
+
+    # Channel 3 completed its last test and has to be reset. The spoofer numbers channels from 0.
+    maccor_spoofer.update_channel_status(2, {'Stat': 4})
+    channel_configs = [dict(LAUNCH_CONFIG, channel=channel) for channel in range(1, 6)]
+    channel_configs[4]['test_procedure'] = 'test_procedure_2'
+    channel_configs.append({'channel': 6})
+    # Channels the cycler doesn't have, including the "all selected" channel, are rejected.
+    channel_configs.extend(dict(LAUNCH_CONFIG, channel=channel)
+                           for channel in (0, 129, pymacnet.messages.all_selected_chan))
+
+    cycler_interface = pymacnet.CyclerInterface(CYCLER_INTERFACE_CONFIG)
+    sent_msgs = []
+    fail_selects = []
+    fail_resets = []
+    error = {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32602, 'message': 'Invalid params'}}
+    send_receive_encoded_msgs = cycler_interface._send_receive_encoded_msgs
+
+    def counting_send_receive_encoded_msgs(outgoing_msgs):
+        sent_msgs.extend(outgoing_msgs)
+        replies = send_receive_encoded_msgs(outgoing_msgs)
+        failing = ([pymacnet.messages.tx_select_channels_encoder] if fail_selects else []) + \
+            ([pymacnet.messages.tx_reset_channel_encoder] if fail_resets else [])
+        return [error if encoder in failing else reply for (encoder, _), reply in zip(outgoing_msgs, replies)]
+    cycler_interface._send_receive_encoded_msgs = counting_send_receive_encoded_msgs
+
+    launcher = pymacnet.TestLauncher(cycler_interface, {'max_in_flight': 4})
+    results = launcher.start_tests(channel_configs)
+    assert (sorted(results) == [1, 2, 3, 4, 5])
+    assert (all(result['started'] for result in results.values()))
+    assert (set(results[3]) == {'started', 'status_s', 'reset_s', 'start_s', 'total_s'})
+    assert (set(results[1]) == {'started', 'status_s', 'safety_limits_s', 'start_s', 'total_s'})
+
+    starts = [params for encoder, params in sent_msgs
+              if encoder is pymacnet.messages.tx_start_test_with_procedure_encoder]
+    assert ([params['Chan'] for params in starts] == [pymacnet.messages.all_selected_chan, 5])
+    selects = [params for encoder, params in sent_msgs
+               if encoder is pymacnet.messages.tx_select_channels_encoder]
+    assert ([params['Chans'] for params in selects] == [[1, 2, 3, 4]])
+    # The start is only sent once the select is confirmed.
+    assert (sent_msgs.index((pymacnet.messages.tx_start_test_with_procedure_encoder, starts[0])) >
+            sent_msgs.index((pymacnet.messages.tx_select_channels_encoder, selects[0])))
+
+    # A failed select falls back to individual starts and no "all selected" start is sent.
+    sent_msgs.clear()
+    fail_selects.append(True)
+    results = launcher.start_tests(channel_configs[:4])
+    assert (all(result['started'] for result in results.values()))
+    starts = [params['Chan'] for encoder, params in sent_msgs
+              if encoder is pymacnet.messages.tx_start_test_with_procedure_encoder]
+    assert (sorted(starts) == [1, 2, 3, 4])
+    fail_selects.clear()
+
+    # Channel 8, left selected by someone else, must not be started, so nothing is selected.
+    maccor_spoofer.update_channel_status(7, {'Stat': 1})
+    sent_msgs.clear()
+    results = launcher.start_tests(channel_configs[:4])
+    assert (all(result['started'] for result in results.values()))
+    assert (not any(encoder is pymacnet.messages.tx_select_channels_encoder for encoder, _ in sent_msgs))
+    starts = [params['Chan'] for encoder, params in sent_msgs
+              if encoder is pymacnet.messages.tx_start_test_with_procedure_encoder]
+    assert (sorted(starts) == [1, 2, 3, 4])
+    maccor_spoofer.update_channel_status(7, {'Stat': 0})
+
+    # A channel whose reset fails is not started, and a running channel keeps its safety limits.
+    maccor_spoofer.update_channel_status(0, {'Stat': 2})
+    fail_resets.append(True)
+    sent_msgs.clear()
+    results = launcher.start_tests(channel_configs[:4])
+    assert ([channel for channel, result in results.items() if result['started']] == [2, 4])
+    limits = [params['Chan'] for encoder, params in sent_msgs
+              if encoder is pymacnet.messages.tx_set_safety_limits_encoder]
+    assert (sorted(limits) == [2, 3, 4])
+    fail_resets.clear()
+    maccor_spoofer.update_channel_status(0, {'Stat': 0})
+    cycler_interface.close()
+
+    async def run():
+        async with pymacnet.AsyncCyclerInterface(CYCLER_INTERFACE_CONFIG) as cycler_interface:
+            launcher = pymacnet.AsyncTestLauncher(cycler_interface)
+            results = await launcher.start_tests(channel_configs[:5])
+            assert (all(result['started'] for result in results.values()))
+            assert (sorted(results) == [1, 2, 3, 4, 5])
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    maccor_spoofer.stop()
@@ -0,0 +1,36 @@
+import math
+
+from pymacnet import SessionMetrics
+
+
+def test_session_metrics():
+    '''
+    Requests are counted per transport and message type and latency percentiles cover the window.
+    '''
+    metrics = SessionMetrics(window=100)
+    for i in range(200):
+        metrics.record_request('json', (4, 7), 0.001 * (i % 100 + 1), 60, 300)
+    metrics.record_error('json', (4, 7), 60)
+    metrics.record_request('binary', (6, 8), 0.002, 26, 10)
+    metrics.record_error('binary', (4, 4))
+    metrics.record_timeout()
+    metrics.record_reconnect()
+
+    snapshot = metrics.snapshot()
+    status = snapshot['json'][(4, 7)]
+    assert (status['count'] == 200 and status['errors'] == 1)
+    assert (status['bytes_sent'] == 201 * 60 and status['bytes_received'] == 200 * 300)
+    assert (math.isclose(status['latency_p50_s'], 0.0505))
+    assert (math.isclose(status['latency_p99_s'], 0.09901))
+    assert (snapshot['binary'][(6, 8)]['count'] == 1)
+    assert (math.isnan(snapshot['binary'][(4, 4)]['latency_p95_s']))
+    assert (snapshot['timeouts'] == 1 and snapshot['reconnects'] == 1)
+
+    text = metrics.to_prometheus()
+    assert ('pymacnet_requests_total{transport="json",fclass="4",fnum="7"} 200\n' in text)
+    assert ('pymacnet_request_latency_seconds{transport="binary",fclass="4",fnum="4",quantile="0.5"} NaN\n' in text)
+    assert ('pymacnet_request_latency_seconds_count{transport="binary",fclass="6",fnum="8"} 1\n' in text)
+    assert ('pymacnet_timeouts_total 1\n' in text)
+
+    metrics.reset()
+    assert (metrics.snapshot() == {'json': {}, 'binary': {}, 'timeouts': 0, 'reconnects': 0})
@@ -0,0 +1,82 @@
+import numpy as np
+
+from pymacnet import StatusPoller
+from pymacnet.arrays import status_dtype, unread_statuses
+
+
+class FakeCycler():
+    """
+    Stand in for a cycler interface with settable channel flags.
+    """
+
+    def __init__(self, num_channels):
+        self.stats = [0] * num_channels
+        self.reads = []
+        self.failing = set()
+
+    def get_num_channels(self):
+        return len(self.stats)
+
+    def read_all_channel_statuses(self):
+        return [{'RF1': 0, 'RF2': 0, 'Stat': stat} for stat in self.stats]
+
+    def read_channel_statuses(self, channels):
+        self.reads.append(list(channels))
+        statuses = np.zeros(len(channels), dtype=status_dtype)
+        statuses['Chan'] = channels
+        statuses['Stat'] = [self.stats[channel - 1] for channel in channels]
+        statuses['TesterTime'] = np.datetime64(1665664376000, 'ms')
+        for i, channel in enumerate(channels):
+            if channel in self.failing:
+                statuses[i] = unread_statuses([channel])[0]
+        return statuses
+
+
+def test_status_poller():
+    '''
+    The read budget goes to changed channels first, then active ones, and idle channels are only re-read
+    once their interval has passed.
+    '''
+    cycler = FakeCycler(10)
+    cycler.stats[6] = 2
+    poller = StatusPoller(cycler, {'requests_per_cycle': 4, 'idle_interval_s': 60})
+
+    # Every channel is unread, so the whole rack is read four channels at a time.
+    for _ in range(3):
+        poller.poll()
+    assert (set(sum(cycler.reads, [])) == set(range(1, 11)))
+    assert (np.all(np.isfinite(poller.get_ages_s())))
+
+    # Only the active channel is due.
+    cycler.reads.clear()
+    poller.poll()
+    assert (cycler.reads == [[7]])
+
+    # A changed channel is read before the active one.
+    cycler.reads.clear()
+    cycler.stats[2] = 4
+    statuses = poller.poll()
+    assert (cycler.reads == [[3, 7]])
+    assert (list(statuses['Chan']) == [3, 7])
+    assert (poller.get_latest_statuses()['Stat'][2] == 4)
+
+
+def test_status_poller_failed_read():
+    '''
+    A channel that fails to read keeps its last status and is read again next cycle.
+    '''
+    cycler = FakeCycler(3)
+    poller = StatusPoller(cycler, {'idle_interval_s': 60})
+    poller.poll()
+
+    cycler.stats[1] = 4
+    cycler.failing.add(2)
+    poller.poll()
+    assert (poller.get_latest_statuses()['Stat'][1] == 0)
+    assert (not np.isnat(poller.get_latest_statuses()['TesterTime'][1]))
+
+    cycler.failing.clear()
+    cycler.reads.clear()
+    poller.poll()
+    assert (cycler.reads == [[2]])
+    assert (poller.get_latest_statuses()['Stat'][1] == 4)
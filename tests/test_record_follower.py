@@ -0,0 +1,69 @@
+import numpy as np
+
+from pymacnet import RecordFollower
+from pymacnet.arrays import status_dtype, unread_statuses
+
+
+class FakeCycler():
+    """
+    Stand in for a cycler interface with settable record numbers.
+    """
+
+    def __init__(self, num_channels):
+        self.rec_nums = [0] * num_channels
+        self.failing = set()
+
+    def read_channel_statuses(self, channels):
+        statuses = np.zeros(len(channels), dtype=status_dtype)
+        statuses['Chan'] = channels
+        statuses['LastRecNum'] = [self.rec_nums[channel - 1] for channel in channels]
+        statuses['TesterTime'] = np.datetime64(1665664376000, 'ms')
+        for i, channel in enumerate(channels):
+            if channel in self.failing:
+                statuses[i] = unread_statuses([channel])[0]
+        return statuses
+
+
+def test_record_follower():
+    '''
+    Only channels that logged a new record are returned, and skipped records are counted.
+    '''
+    cycler = FakeCycler(4)
+    cycler.rec_nums = [5, 5, 5, 5]
+    follower = RecordFollower(cycler, [1, 2, 3], {2: 5})
+
+    assert (list(follower.poll()['Chan']) == [1, 3])
+    assert (len(follower.poll()) == 0)
+
+    cycler.rec_nums = [6, 9, 5, 5]
+    records = follower.poll()
+    assert (list(records['Chan']) == [1, 2])
+    assert (list(records['LastRecNum']) == [6, 9])
+    assert (follower.get_missed_records() == {1: 0, 2: 3, 3: 0})
+
+    # A new test restarts the record numbers.
+    cycler.rec_nums = [1, 9, 5, 5]
+    assert (list(follower.poll()['Chan']) == [1])
+    assert (follower.get_last_rec_nums() == {1: 1, 2: 9, 3: 5})
+
+
+def test_record_follower_failed_read():
+    '''
+    A channel that fails to read is not returned and keeps its last record number.
+    '''
+    cycler = FakeCycler(2)
+    cycler.rec_nums = [5, 5]
+    follower = RecordFollower(cycler, [1, 2])
+    assert (list(follower.poll()['Chan']) == [1, 2])
+
+    cycler.rec_nums = [6, 6]
+    cycler.failing = {2}
+    assert (list(follower.poll()['Chan']) == [1])
+    assert (follower.get_last_rec_nums() == {1: 6, 2: 5})
+
+    cycler.rec_nums = [6, 7]
+    cycler.failing = set()
+    records = follower.poll()
+    assert (list(records['Chan']) == [2])
+    assert (list(records['LastRecNum']) == [7])
+    assert (follower.get_missed_records() == {1: 0, 2: 1})
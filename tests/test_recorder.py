@@ -0,0 +1,90 @@
+import copy
+import time
+
+import numpy as np
+
+import pymacnet.messages
+from pymacnet import StatusRecorder, read_recording, ChannelStatus
+from pymacnet.arrays import status_dtype, unread_mask
+
+
+def make_statuses(channels):
+    statuses = []
+    for channel in channels:
+        result = copy.deepcopy(pymacnet.messages.rx_read_status_msg['result'])
+        result['Chan'] = channel
+        statuses.append(ChannelStatus.from_dict(result))
+    return statuses
+
+
+def test_status_recorder(tmp_path):
+    '''
+    Recorded rows are written in batches and read back in order, across recorder restarts.
+    '''
+    with StatusRecorder(str(tmp_path), {'batch_rows': 4}) as recorder:
+        for _ in range(3):
+            recorder.record_statuses(make_statuses(range(1, 4)))
+        recorder.record_aux(2, [24.75, 25.0])
+
+    with StatusRecorder(str(tmp_path), {'batch_rows': 4, 'compress': False}) as recorder:
+        recorder.record_statuses(make_statuses([7]))
+
+    statuses = read_recording(str(tmp_path))
+    assert (list(statuses['Chan']) == [1, 2, 3] * 3 + [7])
+    assert (np.all(statuses['Voltage'] ==
+            pymacnet.messages.rx_read_status_msg['result']['Voltage']))
+
+    aux = read_recording(str(tmp_path), 'aux')
+    assert (list(aux['Chan']) == [2, 2])
+    assert (list(aux['Value']) == [24.75, 25.0])
+
+
+def test_status_recorder_flush_interval(tmp_path):
+    '''
+    Rows are written once they are older than the flush interval, even if the batch is not full.
+    '''
+    recorder = StatusRecorder(str(tmp_path), {'flush_interval_s': 0.2})
+    recorder.record_statuses(make_statuses([1]))
+    time.sleep(0.6)
+    assert (len(read_recording(str(tmp_path))) == 1)
+    recorder.close()
+
+    # The interval runs from the first row, not from an empty record call.
+    recorder = StatusRecorder(str(tmp_path), {'flush_interval_s': 0.5})
+    recorder.record_statuses(np.zeros(0, dtype=status_dtype))
+    time.sleep(0.4)
+    recorder.record_statuses(make_statuses([2]))
+    time.sleep(0.35)
+    assert (len(read_recording(str(tmp_path))) == 1)
+    recorder.close()
+    assert (len(read_recording(str(tmp_path))) == 2)
+
+
+def test_status_recorder_unread_and_closed(tmp_path):
+    '''
+    Channels that could not be read are recorded as unread rows, and records after closing are
+    refused.
+    '''
+    recorder = StatusRecorder(str(tmp_path))
+    assert (recorder.record_statuses(make_statuses([1]) + [None]))
+    assert (recorder.record_statuses([None, make_statuses([4])[0]], channels=[3, 4]))
+    recorder.close()
+    assert (not recorder.record_statuses(make_statuses([5])))
+    assert (not recorder.record_aux(5, [25.0]))
+
+    statuses = read_recording(str(tmp_path))
+    assert (list(statuses['Chan']) == [1, 0, 3, 4])
+    assert (list(unread_mask(statuses)) == [False, True, True, False])
+
+
+def test_status_recorder_concurrent_reads(tmp_path):
+    '''
+    Segments appear complete to readers while the recorder is writing, even with no flush interval.
+    '''
+    recorder = StatusRecorder(str(tmp_path), {'batch_rows': 2, 'flush_interval_s': 0})
+    for _ in range(50):
+        recorder.record_statuses(make_statuses([1, 2, 3]))
+        assert (len(read_recording(str(tmp_path))) <= 150)
+    recorder.close()
+    assert (len(read_recording(str(tmp_path))) == 150)
+    assert (not [name for name in tmp_path.iterdir() if name.name.endswith('.tmp')])
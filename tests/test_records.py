@@ -0,0 +1,47 @@
+import copy
+import pickle
+
+import pytest
+
+import pymacnet.messages
+from pymacnet import ChannelStatus, AuxReading, SafetyLimits
+
+
+def test_channel_status_record():
+    """
+    Records built from replies behave like the reply dictionaries they replace.
+    """
+    result = copy.deepcopy(pymacnet.messages.rx_read_status_msg['result'])
+    status = ChannelStatus.from_dict(result)
+
+    assert (status == result)
+    assert (status.Voltage == status['Voltage'] == result['Voltage'])
+    assert (status.to_dict() == result)
+    assert (list(status) == list(result))
+    assert (pickle.loads(pickle.dumps(status)) == status)
+    assert (not hasattr(status, '__dict__'))
+    with pytest.raises(KeyError):
+        status['NotAField']
+
+    aux = AuxReading.from_dict(pymacnet.messages.rx_read_aux_msg['result'])
+    assert (aux.AuxValues == [24.75])
+
+
+def test_safety_limits_record():
+    """
+    Safety limits requested by a config can be compared with the limits a channel reports.
+    """
+    config = {'channel': 3, 'v_max_safety_limit_v': 4.5, 'v_min_safety_limit_v': 2.5,
+              'i_max_safety_limit_a': 4.3, 'i_min_safety_limit_a': 2.5,
+              'power_safety_limit_chg_w': 25, 'power_safety_limit_dsg_w': 25}
+    requested = SafetyLimits.from_config(config)
+    reported = copy.deepcopy(
+        pymacnet.messages.rx_set_safety_limits_msg['result'])
+    reported.update(Chan=3, VSafeMax=4.5001, VSafeMin=2.5, ISafeChg=4.3,
+                    ISafeDis=2.5, PBatSafeChg=25, PBatSafeDis=25)
+
+    assert (requested.is_close(SafetyLimits.from_dict(reported)))
+    reported['ISafeChg'] = 4.0
+    assert (not requested.is_close(SafetyLimits.from_dict(reported)))
+    assert (not requested.is_close(
+        SafetyLimits.from_dict(dict(requested, Chan=4))))
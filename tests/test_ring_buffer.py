@@ -0,0 +1,34 @@
+import copy
+
+import numpy as np
+
+import pymacnet.messages
+from pymacnet import StatusRingBuffer
+from pymacnet.arrays import status_dtype
+
+
+def test_status_ring_buffer():
+    '''
+    The buffer keeps the most recent samples of each channel and returns them as views.
+    '''
+    ring_buffer = StatusRingBuffer(4, 3)
+    assert (ring_buffer.latest(2) is None)
+    assert (len(ring_buffer.window(2)) == 0)
+
+    for sample in range(5):
+        statuses = np.zeros(2, dtype=status_dtype)
+        statuses['Chan'] = [2, 4]
+        statuses['Voltage'] = [sample, -sample]
+        statuses['TesterTime'] = np.datetime64(1665664376000 + sample * 1000, 'ms')
+        ring_buffer.append_statuses(statuses)
+
+    assert (list(ring_buffer.window(2)['Voltage']) == [2, 3, 4])
+    assert (list(ring_buffer.window(4, num_samples=2)['Voltage']) == [-3, -4])
+    assert (list(ring_buffer.window(2, duration_s=1)['Voltage']) == [3, 4])
+    assert (ring_buffer.latest(2)['Voltage'] == 4)
+    assert (ring_buffer.get_count(1) == 0 and ring_buffer.get_count(2) == 3)
+    assert (ring_buffer.window(2).base is not None)
+
+    status = copy.deepcopy(pymacnet.messages.rx_read_status_msg['result'])
+    ring_buffer.append(1, status)
+    assert (ring_buffer.latest(1)['Voltage'] == status['Voltage'])
@@ -0,0 +1,99 @@
+import time
+import asyncio
+import threading
+
+from pymacnet import StatusCache, AsyncStatusCache
+
+
+class SlowCycler():
+    """
+    Stand in for a cycler interface that counts the reads reaching the cycler.
+    """
+
+    def __init__(self):
+        self.reads = 0
+
+    def read_channel_status(self, channel):
+        self.reads += 1
+        time.sleep(0.2)
+        return {'Chan': channel, 'Voltage': 3.7}
+
+
+class AsyncSlowCycler():
+
+    def __init__(self):
+        self.reads = 0
+
+    async def read_channel_status(self, channel):
+        self.reads += 1
+        await asyncio.sleep(0.2)
+        return {'Chan': channel, 'Voltage': 3.7}
+
+
+def test_status_cache():
+    '''
+    Concurrent misses share one request and later reads hit the cache until the TTL expires.
+    '''
+    cycler = SlowCycler()
+    cache = StatusCache(cycler, {'default_ttl_s': 10, 'ttls_s': {(4, 7): 0.5}})
+
+    statuses = []
+    threads = [threading.Thread(target=lambda: statuses.append(cache.read_channel_status(3)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cycler.reads == 1)
+    assert (all(status['Chan'] == 3 for status in statuses))
+
+    assert (cache.read_channel_status(3)['Chan'] == 3)
+    assert (cache.read_channel_status(4)['Chan'] == 4)
+    assert (cycler.reads == 2)
+    stats = cache.get_stats()
+    assert ((stats['hits'], stats['misses'], stats['shared']) == (1, 2, 7))
+
+    time.sleep(0.6)
+    cache.read_channel_status(3)
+    assert (cycler.reads == 3)
+    cache.invalidate(3)
+    cache.read_channel_status(3)
+    assert (cycler.reads == 4)
+
+    # A read in flight during invalidate() is returned but not cached.
+    thread = threading.Thread(target=cache.read_channel_status, args=(6,))
+    thread.start()
+    time.sleep(0.1)
+    cache.invalidate(6)
+    thread.join()
+    cache.read_channel_status(6)
+    assert (cycler.reads == 6)
+
+
+def test_async_status_cache():
+    '''
+    Concurrent coroutines missing the cache share one request.
+    '''
+    cycler = AsyncSlowCycler()
+    cache = AsyncStatusCache(cycler)
+
+    async def run():
+        statuses = await asyncio.gather(*[cache.read_channel_status(5) for _ in range(8)])
+        assert (all(status['Chan'] == 5 for status in statuses))
+        await cache.read_channel_status(5)
+        assert (cycler.reads == 1)
+        assert (cache.get_stats()['hits'] == 1)
+
+        # A read in flight during invalidate() is returned but not cached.
+        read = asyncio.ensure_future(cache.read_channel_status(6))
+        await asyncio.sleep(0.1)
+        cache.invalidate()
+        assert ((await read)['Chan'] == 6)
+        await cache.read_channel_status(6)
+        assert (cycler.reads == 3)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()